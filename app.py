@@ -5,19 +5,20 @@ Aplicación Web Flask para Sistema de Reservas
 Versión Completa con ABM + Reportes BI
 """
 
-from flask import Flask, render_template, request, redirect, url_for, session, flash, jsonify
+from flask import Flask, render_template, request, redirect, url_for, session, flash, jsonify, g, Response
 from functools import wraps
-import bcrypt
 from datetime import datetime, date, timedelta
-from db.connection import ejecutar_query, conectar
+from db.connection import ejecutar_query, conectar, estadisticas_pool
+from db.cache import estadisticas_caches
+from db.sentencias import ejecutar_sentencia
 from mysql.connector import Error
-from modules.validations import (
-    validar_sancion, validar_limite_horas_dia, validar_limite_reservas_semana,
-    validar_capacidad_sala, es_usuario_privilegiado, sala_compatible_usuario
-)
-from modules import participantes, salas, reservas, sanciones
+from db import unidad_trabajo, instrumentacion, consultas_lentas
+from modules import participantes, salas, reservas, sanciones, admision, disponibilidad, catalogo, reportes, exportacion, metricas, perfil, sanciones_activas, importacion
+from modules.seguridad import verificar_password, necesita_rehash, SistemaOcupado
+import io
 import re
 import os
+import time
 
 app = Flask(__name__)
 app.secret_key = 'reservas_salas_secret_key_2024'
@@ -75,6 +76,120 @@ def cargar_consultas_sql(archivo='sql/consultas_reportes.sql'):
 
 CONSULTAS_SQL = cargar_consultas_sql()
 
+# ============= MÉTRICAS =============
+
+# Si está definido, /metrics exige el header "Authorization: Bearer <token>"
+METRICAS_TOKEN = os.getenv('METRICAS_TOKEN', '')
+
+metricas.instalar()
+consultas_lentas.instalar()
+sanciones_activas.cargar()
+
+@app.before_request
+def iniciar_metricas_request():
+    g.metricas_inicio = time.perf_counter()
+
+@app.after_request
+def registrar_metricas_request(response):
+    inicio = g.get('metricas_inicio')
+    if inicio is not None:
+        # Endpoint y no ruta: las URLs con parámetros o inexistentes no multiplican las series
+        endpoint = request.endpoint or 'sin_ruta'
+        metricas.http_latencia.observar(time.perf_counter() - inicio, endpoint, request.method)
+        metricas.http_solicitudes.incrementar(endpoint, request.method, str(response.status_code))
+    return response
+
+@app.teardown_request
+def registrar_excepcion_request(error=None):
+    if error is not None:
+        metricas.http_excepciones.incrementar(request.endpoint or 'sin_ruta')
+
+# ============= CONTABILIDAD DE SQL POR REQUEST =============
+
+# Presupuesto global de SQL por request (0 = sin límite); modo 'avisar' o 'fallar'
+SQL_PRESUPUESTO_SENTENCIAS = int(os.getenv('SQL_PRESUPUESTO_SENTENCIAS', '0'))
+SQL_PRESUPUESTO_MS = float(os.getenv('SQL_PRESUPUESTO_MS', '0'))
+SQL_PRESUPUESTO_MODO = os.getenv('SQL_PRESUPUESTO_MODO', 'avisar')
+
+def presupuesto_sql(sentencias=None, ms=None):
+    """Decorador: presupuesto de SQL propio de una ruta (reemplaza al global)"""
+    def decorador(f):
+        f.presupuesto_sql = (sentencias, ms)
+        return f
+    return decorador
+
+@app.before_request
+def abrir_contabilidad_sql():
+    g.contabilidad_sql, g.contabilidad_sql_token = instrumentacion.iniciar()
+
+@app.after_request
+def informar_contabilidad_sql(response):
+    """Server-Timing, línea de debug y aviso de N+1 (el presupuesto se controla antes del commit)"""
+    contabilidad = g.get('contabilidad_sql')
+    if contabilidad is None:
+        return response
+    
+    response.headers.add('Server-Timing', contabilidad.server_timing())
+    app.logger.debug(f"{request.method} {request.path} -> {response.status_code} | {contabilidad.resumen()}")
+    
+    for sql, veces in contabilidad.posibles_n_mas_uno():
+        app.logger.warning(f"Posible N+1 en {request.endpoint}: {veces} veces {sql[:150]}")
+    return response
+
+def controlar_presupuesto_sql():
+    """
+    Aplica el presupuesto de SQL del request. Se llama desde
+    confirmar_unidad_trabajo antes del commit: en modo 'fallar' la excepción
+    revierte la transacción en lugar de llegar con las escrituras ya confirmadas.
+    """
+    contabilidad = g.get('contabilidad_sql')
+    if contabilidad is None:
+        return
+    
+    vista = app.view_functions.get(request.endpoint)
+    sentencias, ms = getattr(vista, 'presupuesto_sql', (SQL_PRESUPUESTO_SENTENCIAS, SQL_PRESUPUESTO_MS))
+    excesos = contabilidad.excesos(sentencias, ms)
+    if excesos:
+        mensaje = f"Presupuesto de SQL excedido en {request.endpoint}: {', '.join(excesos)}"
+        if SQL_PRESUPUESTO_MODO == 'fallar':
+            raise instrumentacion.PresupuestoSQLExcedido(mensaje)
+        app.logger.warning(mensaje)
+
+@app.teardown_request
+def cerrar_contabilidad_sql(error=None):
+    token = g.pop('contabilidad_sql_token', None)
+    g.pop('contabilidad_sql', None)
+    if token is not None:
+        instrumentacion.finalizar(token)
+
+# ============= UNIDAD DE TRABAJO POR REQUEST =============
+
+@app.before_request
+def abrir_unidad_trabajo():
+    """Una conexión y una transacción por request (se toma del pool en el primer uso)"""
+    g.unidad_trabajo, g.unidad_trabajo_token = unidad_trabajo.iniciar()
+
+@app.after_request
+def confirmar_unidad_trabajo(response):
+    # Los after_request corren en orden inverso: este es el primero, antes de cualquier commit
+    controlar_presupuesto_sql()
+    unidad = g.get('unidad_trabajo')
+    if unidad is None:
+        return response
+    try:
+        if response.status_code < 500:
+            unidad.confirmar()
+    except Error as e:
+        print(f"❌ Error al confirmar la transacción: {e}")
+        return app.response_class('Error al confirmar la transacción', status=500)
+    return response
+
+@app.teardown_request
+def cerrar_unidad_trabajo(error=None):
+    unidad = g.pop('unidad_trabajo', None)
+    if unidad is not None:
+        unidad_trabajo.finalizar(unidad, g.pop('unidad_trabajo_token'), error)
+
 # ============= DECORADORES =============
 
 def login_required(f):
@@ -110,23 +225,29 @@ def login():
         email = request.form.get('email')
         password = request.form.get('password')
         
-        user = ejecutar_query("SELECT * FROM login WHERE correo = %s", (email,), fetchone=True)
+        # Credenciales, participante y perfil de capacidades en una sola consulta
+        user = ejecutar_sentencia('login_perfil', (email,), fetchone=True)
         
-        if user and bcrypt.checkpw(password.encode('utf-8'), user['contrasena'].encode('utf-8')):
-            session['user_email'] = email
-            
-            participante = ejecutar_query("SELECT * FROM participante WHERE email = %s", (email,), fetchone=True)
+        try:
+            valida = bool(user) and verificar_password(password, user['contrasena'])
+        except SistemaOcupado as e:
+            flash(str(e), 'warning')
+            return render_template('login.html'), 503, {'Retry-After': '5'}
+        
+        if valida:
+            if necesita_rehash(user['contrasena']):
+                # Cambió BCRYPT_ROUNDS: se aprovecha la contraseña en claro para actualizar el hash
+                try:
+                    participantes.actualizar_password(email, password)
+                except SistemaOcupado:
+                    pass
             
-            if participante:
-                session['user_ci'] = participante['ci']
-                session['user_name'] = f"{participante['nombre']} {participante['apellido']}"
-                
-                es_docente = ejecutar_query(
-                    "SELECT * FROM participante_programa_academico WHERE ci_participante = %s AND rol = 'docente'",
-                    (participante['ci'],), fetchone=True
-                )
-                
-                session['is_admin'] = bool(es_docente)
+            if user['ci'] is not None:
+                session['user_email'] = email
+                session['user_ci'] = user['ci']
+                session['user_name'] = f"{user['nombre']} {user['apellido']}"
+                session['perfil'] = perfil.construir_perfil(user)
+                session['is_admin'] = session['perfil']['admin']
                 flash(f'Bienvenido, {session["user_name"]}!', 'success')
                 
                 return redirect(url_for('admin_dashboard') if session['is_admin'] else url_for('user_dashboard'))
@@ -151,17 +272,17 @@ def register():
         
         if not all([ci, nombre, apellido, email, password, confirm_password, programa, rol]):
             flash('Todos los campos son obligatorios.', 'danger')
-            programas = ejecutar_query("SELECT * FROM programa_academico ORDER BY nombre_programa", fetchall=True)
+            programas = catalogo.obtener_programas()
             return render_template('register.html', programas=programas)
         
         if password != confirm_password:
             flash('Las contraseñas no coinciden.', 'danger')
-            programas = ejecutar_query("SELECT * FROM programa_academico ORDER BY nombre_programa", fetchall=True)
+            programas = catalogo.obtener_programas()
             return render_template('register.html', programas=programas)
         
         if len(password) < 6:
             flash('La contraseña debe tener al menos 6 caracteres.', 'danger')
-            programas = ejecutar_query("SELECT * FROM programa_academico ORDER BY nombre_programa", fetchall=True)
+            programas = catalogo.obtener_programas()
             return render_template('register.html', programas=programas)
         
         exito, mensaje = participantes.crear_participante(ci, nombre, apellido, email, password, programa, rol)
@@ -170,7 +291,7 @@ def register():
         if exito:
             return redirect(url_for('login'))
     
-    programas = ejecutar_query("SELECT * FROM programa_academico ORDER BY nombre_programa", fetchall=True)
+    programas = catalogo.obtener_programas()
     return render_template('register.html', programas=programas)
 
 @app.route('/logout')
@@ -182,13 +303,11 @@ def logout():
 # ============= PANEL DE USUARIO =============
 
 @app.route('/user/dashboard')
+@presupuesto_sql(sentencias=4)
 @login_required
 def user_dashboard():
     reservas_list = reservas.obtener_reservas_participante(session['user_ci'])
-    sancion = ejecutar_query("""
-        SELECT * FROM sancion_participante
-        WHERE ci_participante = %s AND CURDATE() BETWEEN fecha_inicio AND fecha_fin
-    """, (session['user_ci'],), fetchone=True)
+    sancion = sanciones_activas.sancion_activa(session['user_ci'])
     
     return render_template('user/dashboard.html', reservas=reservas_list, sancion=sancion)
 
@@ -196,7 +315,40 @@ def user_dashboard():
 @login_required
 def user_salas():
     salas_list = salas.obtener_salas()
-    return render_template('user/salas.html', salas=salas_list)
+    libres_hoy = {
+        f"{nombre_sala}|{edificio}": cantidad
+        for (nombre_sala, edificio), cantidad in disponibilidad.cantidad_turnos_libres(date.today()).items()
+    }
+    return render_template('user/salas.html', salas=salas_list, libres_hoy=libres_hoy)
+
+@app.route('/user/disponibilidad/sala')
+@login_required
+def user_disponibilidad_sala():
+    """Turnos libres de una sala en una fecha (índice en memoria)"""
+    try:
+        fecha = datetime.strptime(request.args.get('fecha', ''), '%Y-%m-%d').date()
+    except ValueError:
+        return jsonify({'error': 'Fecha inválida'}), 400
+    
+    libres = disponibilidad.turnos_libres(request.args.get('nombre_sala'), request.args.get('edificio'), fecha)
+    return jsonify({'fecha': fecha.isoformat(), 'turnos_libres': libres})
+
+@app.route('/user/disponibilidad/turno')
+@login_required
+def user_disponibilidad_turno():
+    """Salas libres en una fecha y turno (índice en memoria)"""
+    try:
+        fecha = datetime.strptime(request.args.get('fecha', ''), '%Y-%m-%d').date()
+        id_turno = int(request.args.get('id_turno', ''))
+    except ValueError:
+        return jsonify({'error': 'Datos inválidos'}), 400
+    
+    libres = disponibilidad.salas_libres(fecha, id_turno)
+    return jsonify({
+        'fecha': fecha.isoformat(),
+        'id_turno': id_turno,
+        'salas_libres': [{'nombre_sala': n, 'edificio': e} for n, e in libres]
+    })
 
 @app.route('/user/reservar', methods=['GET', 'POST'])
 @login_required
@@ -214,35 +366,64 @@ def user_reservar():
             flash('Datos inválidos.', 'danger')
             return redirect(url_for('user_reservar'))
         
-        if not validar_sancion(session['user_ci']):
-            return redirect(url_for('user_dashboard'))
+        veredicto = admision.admitir_reserva(nombre_sala, edificio, fecha, id_turno, session['user_ci'],
+                                             perfil=session.get('perfil'))
+        if veredicto.detalle.get('perfil_desactualizado'):
+            session['perfil'] = perfil.cargar_perfil(session['user_ci'])
         
-        if not sala_compatible_usuario(nombre_sala, edificio, session['user_ci']):
-            flash(f'No puedes reservar este tipo de sala.', 'danger')
-            return redirect(url_for('user_reservar'))
-        
-        if not es_usuario_privilegiado(session['user_ci']):
-            if not validar_limite_horas_dia(session['user_ci'], fecha, id_turno):
-                return redirect(url_for('user_reservar'))
-            if not validar_limite_reservas_semana(session['user_ci'], fecha):
-                return redirect(url_for('user_reservar'))
-        
-        exito, mensaje, id_nueva_reserva = reservas.crear_reserva(nombre_sala, edificio, fecha, id_turno, session['user_ci'])
+        if veredicto.admitida:
+            flash(f'Reserva #{veredicto.id_reserva} creada exitosamente!', 'success')
+            return redirect(url_for('user_dashboard'))
         
-        if exito:
-            if not validar_capacidad_sala(nombre_sala, edificio, id_nueva_reserva, 1):
-                reservas.eliminar_reserva(id_nueva_reserva)
-                return redirect(url_for('user_reservar'))
-            
-            flash(f'Reserva #{id_nueva_reserva} creada exitosamente!', 'success')
+        flash(veredicto.mensaje, 'danger')
+        if veredicto.regla == 'sancion':
             return redirect(url_for('user_dashboard'))
-        else:
-            flash(mensaje, 'danger')
+        return redirect(url_for('user_reservar'))
     
     salas_list = salas.obtener_salas()
     turnos_list = reservas.obtener_turnos()
     return render_template('user/reservar.html', salas=salas_list, turnos=turnos_list, today=date.today().isoformat())
 
+DIAS_SEMANA = [(0, 'Lunes'), (1, 'Martes'), (2, 'Miércoles'), (3, 'Jueves'), (4, 'Viernes'), (5, 'Sábado')]
+
+@app.route('/user/reservar/serie', methods=['GET', 'POST'])
+@login_required
+def user_reservar_serie():
+    salas_list = salas.obtener_salas()
+    turnos_list = reservas.obtener_turnos()
+    veredicto = None
+    
+    if request.method == 'POST':
+        nombre_sala = request.form.get('nombre_sala')
+        edificio = request.form.get('edificio')
+        
+        try:
+            fecha_desde = datetime.strptime(request.form.get('fecha_desde', ''), '%Y-%m-%d').date()
+            fecha_hasta = datetime.strptime(request.form.get('fecha_hasta', ''), '%Y-%m-%d').date()
+            id_turno = int(request.form.get('id_turno'))
+            dias_semana = [int(d) for d in request.form.getlist('dias_semana')]
+        except (TypeError, ValueError):
+            flash('Datos inválidos.', 'danger')
+            return redirect(url_for('user_reservar_serie'))
+        
+        if fecha_desde < date.today() or fecha_hasta < fecha_desde or not dias_semana:
+            flash('Elija un período desde hoy en adelante y al menos un día de la semana.', 'danger')
+            return redirect(url_for('user_reservar_serie'))
+        
+        veredicto = admision.admitir_serie(nombre_sala, edificio, fecha_desde, fecha_hasta, dias_semana,
+                                           id_turno, session['user_ci'], perfil=session.get('perfil'),
+                                           parcial=request.form.get('parcial') == '1')
+        if veredicto.admitida and not veredicto.conflictos:
+            flash(veredicto.mensaje, 'success')
+            return redirect(url_for('user_dashboard'))
+        
+        flash(veredicto.mensaje, 'warning' if veredicto.admitida else 'danger')
+        if veredicto.regla == 'sancion':
+            return redirect(url_for('user_dashboard'))
+    
+    return render_template('user/reservar_serie.html', salas=salas_list, turnos=turnos_list,
+                           dias_semana=DIAS_SEMANA, veredicto=veredicto, today=date.today().isoformat())
+
 @app.route('/user/cancelar/<int:id_reserva>', methods=['POST'])
 @login_required
 def user_cancelar(id_reserva):
@@ -268,11 +449,15 @@ def user_cambiar_password():
         password_nueva = request.form.get('password_nueva')
         password_confirmar = request.form.get('password_confirmar')
         
-        user = ejecutar_query("SELECT * FROM login WHERE correo = %s", 
-                             (session['user_email'],), fetchone=True)
+        user = ejecutar_sentencia('login_por_correo', (session['user_email'],), fetchone=True)
         
-        if not user or not bcrypt.checkpw(password_actual.encode('utf-8'), 
-                                          user['contrasena'].encode('utf-8')):
+        try:
+            valida = bool(user) and verificar_password(password_actual, user['contrasena'])
+        except SistemaOcupado as e:
+            flash(str(e), 'warning')
+            return render_template('user/cambiar_password.html'), 503, {'Retry-After': '5'}
+        
+        if not valida:
             flash('Contraseña actual incorrecta', 'danger')
             return render_template('user/cambiar_password.html')
         
@@ -284,7 +469,13 @@ def user_cambiar_password():
             flash('La contraseña debe tener al menos 6 caracteres', 'danger')
             return render_template('user/cambiar_password.html')
         
-        if participantes.actualizar_password(session['user_email'], password_nueva):
+        try:
+            actualizada = participantes.actualizar_password(session['user_email'], password_nueva)
+        except SistemaOcupado as e:
+            flash(str(e), 'warning')
+            return render_template('user/cambiar_password.html'), 503, {'Retry-After': '5'}
+        
+        if actualizada:
             flash('Contraseña actualizada exitosamente', 'success')
             return redirect(url_for('user_dashboard'))
         else:
@@ -295,6 +486,7 @@ def user_cambiar_password():
 # ============= PANEL DE ADMINISTRADOR =============
 
 @app.route('/admin/dashboard')
+@presupuesto_sql(sentencias=8)
 @admin_required
 def admin_dashboard():
     stats = {
@@ -307,15 +499,7 @@ def admin_dashboard():
         """, fetchone=True)['total']
     }
     
-    reservas_list = ejecutar_query("""
-        SELECT r.id_reserva, r.nombre_sala, r.edificio, r.fecha, r.estado,
-               CONCAT(t.hora_inicio, ' - ', t.hora_fin) as horario,
-               COUNT(rp.ci_participante) as num_participantes
-        FROM reserva r
-        JOIN turno t ON r.id_turno = t.id_turno
-        LEFT JOIN reserva_participante rp ON r.id_reserva = rp.id_reserva
-        GROUP BY r.id_reserva ORDER BY r.fecha DESC, t.hora_inicio DESC LIMIT 10
-    """, fetchall=True)
+    reservas_list = reservas.obtener_reservas(10)
     
     return render_template('admin/dashboard.html', stats=stats, reservas=reservas_list)
 
@@ -324,8 +508,30 @@ def admin_dashboard():
 @app.route('/admin/participantes')
 @admin_required
 def admin_participantes():
-    participantes_list = participantes.obtener_participantes()
-    return render_template('admin/participantes.html', participantes=participantes_list)
+    participantes_list, siguiente = participantes.pagina_participantes(request.args.get('cursor'))
+    return render_template('admin/participantes.html', participantes=participantes_list,
+                           siguiente=siguiente, primera=bool(request.args.get('cursor')))
+
+@app.route('/admin/participantes/importar', methods=['GET', 'POST'])
+@admin_required
+def admin_importar_participantes():
+    if request.method == 'POST':
+        archivo = request.files.get('archivo')
+        if not archivo or not archivo.filename:
+            flash('Seleccione un archivo CSV.', 'danger')
+            return redirect(url_for('admin_importar_participantes'))
+        
+        # Se lee en streaming desde el upload, sin cargar el archivo entero
+        texto = io.TextIOWrapper(archivo.stream, encoding='utf-8-sig', newline='')
+        exito, mensaje, reporte = importacion.importar_participantes(texto)
+        if request.accept_mimetypes.best == 'application/json':
+            return jsonify(dict(reporte.como_dict(), mensaje=mensaje)), 200 if exito else 400
+        
+        flash(mensaje, 'success' if exito and not reporte.total_errores else 'warning' if exito else 'danger')
+        return render_template('admin/importar_participantes.html', reporte=reporte,
+                               columnas=importacion.COLUMNAS)
+    
+    return render_template('admin/importar_participantes.html', reporte=None, columnas=importacion.COLUMNAS)
 
 @app.route('/admin/participantes/editar/<ci>', methods=['GET', 'POST'])
 @admin_required
@@ -346,7 +552,7 @@ def admin_editar_participante(ci):
         flash('Participante no encontrado', 'danger')
         return redirect(url_for('admin_participantes'))
     
-    programas = ejecutar_query("SELECT * FROM programa_academico ORDER BY nombre_programa", fetchall=True)
+    programas = catalogo.obtener_programas()
     return render_template('admin/editar_participante.html', participante=participante, programas=programas)
 
 @app.route('/admin/participantes/eliminar/<ci>', methods=['POST'])
@@ -360,12 +566,10 @@ def admin_eliminar_participante(ci):
 @admin_required
 def admin_eliminar_programa(ci, programa):
 
-    ejecutar_query("""
-        DELETE FROM participante_programa_academico
-        WHERE ci_participante = %s AND nombre_programa = %s
-    """, (ci, programa), commit=True)
-
-    flash("Programa eliminado correctamente", "success")
+    if participantes.eliminar_programa_participante(ci, programa):
+        flash("Programa eliminado correctamente", "success")
+    else:
+        flash("No se pudo eliminar el programa", "danger")
     return redirect(url_for('admin_editar_participante', ci=ci))
 
 @app.route('/admin/participantes/<ci>/agregar_programa', methods=['POST'])
@@ -383,12 +587,8 @@ def admin_agregar_programa(ci):
         flash("Debe seleccionar programa y rol", "danger")
         return redirect(url_for('admin_editar_participante', ci=ci))
 
-    ejecutar_query("""
-        INSERT INTO participante_programa_academico (ci_participante, nombre_programa, rol)
-        VALUES (%s, %s, %s)
-    """, (ci, nombre_programa, rol), commit=True)
-
-    flash("Programa agregado correctamente", "success")
+    exito, mensaje = participantes.agregar_programa_participante(ci, nombre_programa, rol)
+    flash(mensaje, 'success' if exito else 'danger')
     return redirect(url_for('admin_editar_participante', ci=ci))
 
 
@@ -463,23 +663,23 @@ def admin_crear_edificio():
         nombre = request.form.get('nombre_edificio')
         direccion = request.form.get('direccion')
 
-        ejecutar_query("""
-            INSERT INTO edificio (nombre_edificio, direccion)
-            VALUES (%s, %s)
-        """, (nombre, direccion), commit=True)
+        exito, mensaje = salas.crear_edificio(nombre, direccion)
+        flash(mensaje, 'success' if exito else 'danger')
 
-        flash("Edificio creado correctamente", "success")
-        return redirect(url_for('admin_salas'))
+        if exito:
+            return redirect(url_for('admin_salas'))
 
     return render_template('admin/crear_edificio.html')
 
 # ========== RESERVAS ==========
 
 @app.route('/admin/reservas')
+@presupuesto_sql(sentencias=3)
 @admin_required
 def admin_reservas():
-    reservas_list = reservas.obtener_reservas()
-    return render_template('admin/reservas.html', reservas=reservas_list)
+    reservas_list, siguiente = reservas.pagina_reservas(request.args.get('cursor'))
+    return render_template('admin/reservas.html', reservas=reservas_list,
+                           siguiente=siguiente, primera=bool(request.args.get('cursor')))
 
 @app.route('/admin/reservas/editar/<int:id_reserva>', methods=['GET', 'POST'])
 @admin_required
@@ -535,34 +735,21 @@ def admin_gestionar_participantes_reserva(id_reserva):
 
         # 1) AGREGAR PARTICIPANTE
         if accion == "agregar":
-            ejecutar_query("""
-                INSERT INTO reserva_participante (ci_participante, id_reserva, fecha_solicitud_reserva)
-                VALUES (%s, %s, NOW())
-            """, (ci, id_reserva), commit=True)
-
-            flash("Participante agregado correctamente", "success")
+            exito, mensaje = reservas.agregar_participante_reserva(id_reserva, ci)
+            flash(mensaje, 'success' if exito else 'danger')
             return redirect(url_for('admin_gestionar_participantes_reserva', id_reserva=id_reserva))
 
         # 2) ELIMINAR PARTICIPANTE
         if accion == "eliminar":
-            ejecutar_query("""
-                DELETE FROM reserva_participante
-                WHERE ci_participante = %s AND id_reserva = %s
-            """, (ci, id_reserva), commit=True)
-
-            flash("Participante eliminado", "success")
+            exito, mensaje = reservas.eliminar_participante_reserva(id_reserva, ci)
+            flash(mensaje, 'success' if exito else 'danger')
             return redirect(url_for('admin_gestionar_participantes_reserva', id_reserva=id_reserva))
 
         # 3) MARCAR ASISTENCIA
         if accion == "asistencia":
             asistio = request.form.get("asistio")  # 1 o 0
-            ejecutar_query("""
-                UPDATE reserva_participante
-                SET asistencia = %s
-                WHERE ci_participante = %s AND id_reserva = %s
-            """, (asistio, ci, id_reserva), commit=True)
-
-            flash("Asistencia actualizada", "success")
+            exito, mensaje = reservas.marcar_asistencia(id_reserva, ci, asistio)
+            flash(mensaje, 'success' if exito else 'danger')
             return redirect(url_for('admin_gestionar_participantes_reserva', id_reserva=id_reserva))
 
     # -------------------------------
@@ -631,23 +818,81 @@ def admin_marcar_asistencia(id_reserva):
         flash("Datos inválidos", "danger")
         return redirect(url_for('admin_gestionar_participantes_reserva', id_reserva=id_reserva))
 
-    ejecutar_query("""
-        UPDATE reserva_participante
-        SET asistencia = %s
-        WHERE id_reserva = %s AND ci_participante = %s
-    """, (asistio, id_reserva, ci))
-
-    flash("Asistencia actualizada.", "success")
+    exito, mensaje = reservas.marcar_asistencia(id_reserva, ci, asistio)
+    flash(mensaje, 'success' if exito else 'danger')
     return redirect(url_for('admin_gestionar_participantes_reserva', id_reserva=id_reserva))
 
 
+def _valor_asistencia(valor):
+    """true/false/1/0 -> bool, null -> None (borra la marca); ValueError si no es válido"""
+    if valor is None or isinstance(valor, bool):
+        return valor
+    if valor in (0, 1, '0', '1'):
+        return valor in (1, '1')
+    raise ValueError(valor)
+
+def _responder_asistencia(asistencias):
+    exito, mensaje, no_encontrados = reservas.marcar_asistencia_masiva(asistencias)
+    if not exito:
+        return jsonify({'error': mensaje}), 400
+    
+    ids_reserva = sorted({id_reserva for id_reserva, _, _ in asistencias})
+    return jsonify({
+        'mensaje': mensaje,
+        'no_encontrados': [{'id_reserva': i, 'ci_participante': ci} for i, ci in no_encontrados],
+        'reservas': reservas.obtener_planilla_reservas(ids_reserva) or [],
+    })
+
+# Planilla de asistencia de todas las reservas de un turno
+@app.route('/admin/asistencia', methods=['GET'])
+@admin_required
+def admin_planilla_asistencia():
+    try:
+        fecha = datetime.strptime(request.args.get('fecha', ''), '%Y-%m-%d').date()
+        id_turno = int(request.args.get('id_turno', ''))
+    except ValueError:
+        return jsonify({'error': 'Datos inválidos'}), 400
+    
+    planilla = reservas.obtener_planilla_turno(fecha, id_turno)
+    if planilla is None:
+        return jsonify({'error': 'Error al obtener la planilla'}), 500
+    return jsonify({'fecha': fecha.isoformat(), 'id_turno': id_turno, 'reservas': planilla})
+
+# Asistencia de varias reservas en una transacción:
+# {"asistencias": [{"id_reserva": 1, "ci_participante": "...", "asistio": true}, ...]}
+@app.route('/admin/asistencia', methods=['POST'])
+@admin_required
+def admin_marcar_asistencia_masiva():
+    datos = request.get_json(silent=True) or {}
+    try:
+        asistencias = [(int(a['id_reserva']), str(a['ci_participante']), _valor_asistencia(a.get('asistio')))
+                       for a in datos.get('asistencias', [])]
+    except (KeyError, TypeError, ValueError, AttributeError):
+        return jsonify({'error': 'Datos inválidos'}), 400
+    
+    return _responder_asistencia(asistencias)
+
+# Asistencia de todos los participantes de una reserva: {"asistencias": {"<ci>": true, ...}}
+@app.route('/admin/reservas/<int:id_reserva>/asistencia', methods=['POST'])
+@admin_required
+def admin_marcar_asistencia_reserva(id_reserva):
+    datos = request.get_json(silent=True) or {}
+    try:
+        asistencias = [(id_reserva, str(ci), _valor_asistencia(asistio))
+                       for ci, asistio in datos.get('asistencias', {}).items()]
+    except (TypeError, ValueError, AttributeError):
+        return jsonify({'error': 'Datos inválidos'}), 400
+    
+    return _responder_asistencia(asistencias)
+
 # ========== SANCIONES ==========
 
 @app.route('/admin/sanciones')
 @admin_required
 def admin_sanciones():
-    sanciones_list = sanciones.obtener_sanciones()
-    return render_template('admin/sanciones.html', sanciones=sanciones_list)
+    sanciones_list, siguiente = sanciones.pagina_sanciones(request.args.get('cursor'))
+    return render_template('admin/sanciones.html', sanciones=sanciones_list,
+                           siguiente=siguiente, primera=bool(request.args.get('cursor')))
 
 @app.route('/admin/sanciones/crear', methods=['GET', 'POST'])
 @admin_required
@@ -709,12 +954,50 @@ def admin_reporte_data(tipo):
     
     try:
         query = CONSULTAS_SQL[tipo]
-        datos = ejecutar_query(query, fetchall=True)
+        # ?historico=1 incluye las reservas archivadas
+        datos = reportes.ejecutar_reporte(tipo, query, historico=request.args.get('historico') == '1')
         return jsonify(datos if datos else [])
     except Exception as e:
+        metricas.reportes_errores.incrementar(tipo)
         print(f"❌ Error ejecutando reporte {tipo}: {e}")
         return jsonify({'error': f'Error al ejecutar la consulta: {str(e)}'}), 500
 
+@app.route('/admin/reportes/<tipo>/exportar')
+@admin_required
+def admin_exportar_reporte(tipo):
+    if tipo not in CONSULTAS_SQL:
+        return jsonify({'error': f'Tipo de reporte no válido: {tipo}'}), 400
+    if request.args.get('historico') == '1':
+        return respuesta_exportacion(reportes.con_historico(CONSULTAS_SQL[tipo]), f'reporte_{tipo}_historico')
+    return respuesta_exportacion(CONSULTAS_SQL[tipo], f'reporte_{tipo}')
+
+@app.route('/admin/exportar/<listado>')
+@admin_required
+def admin_exportar_listado(listado):
+    if listado not in exportacion.LISTADOS:
+        return jsonify({'error': f'Listado no válido: {listado}'}), 400
+    return respuesta_exportacion(exportacion.LISTADOS[listado], listado)
+
+def respuesta_exportacion(query, nombre):
+    """Respuesta en streaming; ?formato=csv|ndjson y ?gzip=1"""
+    formato = request.args.get('formato', 'csv')
+    comprimir = request.args.get('gzip') == '1'
+    if formato not in exportacion.FORMATOS:
+        return jsonify({'error': f'Formato no válido: {formato}'}), 400
+    
+    contenido = exportacion.exportar(query, formato=formato, comprimir=comprimir)
+    if contenido is None:
+        return jsonify({'error': 'Error al ejecutar la exportación'}), 500
+    
+    mimetype, extension = exportacion.tipo_contenido(formato, comprimir)
+    respuesta = Response(contenido, mimetype=mimetype, headers={
+        'Content-Disposition': f'attachment; filename={nombre}_{date.today().isoformat()}.{extension}',
+        'X-Accel-Buffering': 'no'
+    })
+    # Libera la conexión aunque el cuerpo nunca se lea (HEAD, cliente que corta antes)
+    respuesta.call_on_close(contenido.close)
+    return respuesta
+
 @app.route('/admin/reportes/disponibles')
 @admin_required
 def admin_reportes_disponibles():
@@ -733,6 +1016,39 @@ def admin_reportes_disponibles():
     ]
     return jsonify(reportes_list)
 
+# ========== SISTEMA ==========
+
+@app.route('/admin/sistema/pool')
+@admin_required
+def admin_estadisticas_pool():
+    return jsonify(estadisticas_pool())
+
+@app.route('/admin/sistema/caches')
+@admin_required
+def admin_estadisticas_caches():
+    return jsonify(estadisticas_caches())
+
+@app.route('/admin/sistema/consultas-lentas')
+@admin_required
+def admin_consultas_lentas():
+    return render_template('admin/consultas_lentas.html',
+                           consultas=consultas_lentas.top(50),
+                           estado=consultas_lentas.estadisticas())
+
+@app.route('/admin/sistema/consultas-lentas/reiniciar', methods=['POST'])
+@admin_required
+def admin_reiniciar_consultas_lentas():
+    consultas_lentas.reiniciar()
+    flash('Totales de consultas lentas reiniciados', 'success')
+    return redirect(url_for('admin_consultas_lentas'))
+
+@app.route('/metrics')
+def metrics():
+    """Métricas del proceso en formato de texto de Prometheus"""
+    if METRICAS_TOKEN and request.headers.get('Authorization') != f'Bearer {METRICAS_TOKEN}':
+        return Response('No autorizado\n', status=401, mimetype='text/plain')
+    return Response(metricas.exponer(), mimetype='text/plain; version=0.0.4; charset=utf-8')
+
 if __name__ == '__main__':
     print("\n🔍 Consultas SQL cargadas:")
     for key in CONSULTAS_SQL.keys():
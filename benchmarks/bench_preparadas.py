@@ -0,0 +1,142 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Benchmark: sentencias preparadas vs protocolo de texto
+Ejecuta cada sentencia registrada en db/sentencias.py N veces por los dos
+caminos, sobre la misma conexión del pool, y compara latencias y contadores
+del servidor (Com_stmt_prepare / Com_stmt_execute).
+
+Uso:
+    python benchmarks/bench_preparadas.py [-n 2000] [--min-mejora 0.0]
+"""
+
+import argparse
+import os
+import statistics
+import sys
+import time
+from datetime import date
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from mysql.connector import Error
+from db.connection import obtener_pool
+from db.sentencias import SENTENCIAS
+
+
+def parametros_ejemplo(conn):
+    """Arma parámetros realistas para cada sentencia a partir de datos existentes"""
+    cursor = conn.cursor(dictionary=True)
+    cursor.execute("SELECT correo FROM login LIMIT 1")
+    login = cursor.fetchone()
+    cursor.execute("SELECT ci_participante FROM reserva_participante LIMIT 1")
+    participante = cursor.fetchone()
+    cursor.close()
+    if not login or not participante:
+        return None
+
+    ci = participante['ci_participante']
+    hoy = date.today()
+    return {
+        'login_por_correo': (login['correo'],),
+        'sancion_activa': (ci, hoy),
+        'reservas_activas_dia': (ci, hoy),
+        'reservas_activas_semana': (ci, hoy),
+        'reservas_participante': (ci, 20),
+    }
+
+
+def contadores_servidor(conn):
+    cursor = conn.cursor()
+    cursor.execute("SHOW SESSION STATUS WHERE Variable_name IN "
+                   "('Com_stmt_prepare', 'Com_stmt_execute', 'Com_select')")
+    valores = {nombre: int(valor) for nombre, valor in cursor.fetchall()}
+    cursor.close()
+    return valores
+
+
+def medir(ejecutar, n):
+    tiempos = []
+    for _ in range(n):
+        inicio = time.perf_counter()
+        ejecutar()
+        tiempos.append((time.perf_counter() - inicio) * 1000)
+    tiempos.sort()
+    return {
+        'media': statistics.mean(tiempos),
+        'p50': tiempos[len(tiempos) // 2],
+        'p95': tiempos[int(len(tiempos) * 0.95)],
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('-n', type=int, default=2000, help='ejecuciones por sentencia y camino')
+    parser.add_argument('--min-mejora', type=float, default=None,
+                        help='falla si la mejora media total (%%) queda por debajo de este valor')
+    args = parser.parse_args()
+
+    try:
+        conn = obtener_pool().obtener()
+    except Error as e:
+        print(f"❌ Error al conectar a MySQL: {e}")
+        return 1
+
+    try:
+        params = parametros_ejemplo(conn)
+        if params is None:
+            print("❌ La base no tiene datos suficientes (login y reserva_participante)")
+            return 1
+
+        print(f"{'sentencia':<26} {'texto p50':>10} {'prep p50':>10} {'texto p95':>10} {'prep p95':>10} {'mejora':>8}")
+        total_texto = total_prep = 0.0
+        for nombre, sql in SENTENCIAS.items():
+            if nombre not in params:
+                print(f"{nombre:<26} (sin parámetros de ejemplo, se omite)")
+                continue
+            p = params[nombre]
+
+            def texto():
+                cursor = conn.cursor(dictionary=True)
+                cursor.execute(sql, p)
+                cursor.fetchall()
+                cursor.close()
+
+            def preparada():
+                cursor = conn.cursor_preparado(sql)
+                cursor.execute(sql, p)
+                cursor.fetchall()
+
+            # Calentamiento: la primera ejecución preparada incluye el PREPARE
+            texto()
+            preparada()
+
+            antes = contadores_servidor(conn)
+            r_texto = medir(texto, args.n)
+            medio = contadores_servidor(conn)
+            r_prep = medir(preparada, args.n)
+            despues = contadores_servidor(conn)
+
+            total_texto += r_texto['media']
+            total_prep += r_prep['media']
+            mejora = (1 - r_prep['media'] / r_texto['media']) * 100
+            print(f"{nombre:<26} {r_texto['p50']:>9.3f}ms {r_prep['p50']:>9.3f}ms "
+                  f"{r_texto['p95']:>9.3f}ms {r_prep['p95']:>9.3f}ms {mejora:>7.1f}%")
+            print(f"{'':<26} texto: Com_select +{medio['Com_select'] - antes['Com_select']} | "
+                  f"preparada: Com_stmt_prepare +{despues['Com_stmt_prepare'] - medio['Com_stmt_prepare']}, "
+                  f"Com_stmt_execute +{despues['Com_stmt_execute'] - medio['Com_stmt_execute']}")
+    finally:
+        conn.close()
+
+    if not total_texto:
+        return 1
+    mejora_total = (1 - total_prep / total_texto) * 100
+    print(f"\nMejora media total: {mejora_total:.1f}%")
+    if args.min_mejora is not None and mejora_total < args.min_mejora:
+        print(f"❌ Mejora por debajo del mínimo ({args.min_mejora}%)")
+        return 1
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,311 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Prueba de carga HTTP de punta a punta contra la aplicación Flask
+
+Simula usuarios concurrentes sobre las rutas reales de app.py:
+login, /user/dashboard, ráfagas de POST a /user/reservar,
+/admin/dashboard y los once /admin/reportes/<tipo>.
+
+Las credenciales y las salas se toman de la base (sembrada con
+scripts/generar_datos.py); todos los usuarios generados usan la misma
+contraseña. Informa throughput, latencias p50/p95/p99 y tasa de error por
+ruta, y guarda el resultado en JSON con el commit actual para comparar
+corridas.
+
+Uso:
+    python benchmarks/carga_http.py --url http://localhost:5000 --usuarios 50 --duracion 60
+    python benchmarks/carga_http.py --comparar benchmarks/resultados/carga_abc1234.json
+"""
+
+import argparse
+import http.cookiejar
+import json
+import os
+import random
+import subprocess
+import sys
+import threading
+import time
+import urllib.error
+import urllib.parse
+import urllib.request
+from datetime import date, datetime, timedelta
+
+RAIZ = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, RAIZ)
+
+from db.connection import ejecutar_query
+
+REPORTES = [
+    'salas_mas_reservadas', 'turnos_demandados', 'promedio_participantes',
+    'reservas_por_carrera', 'ocupacion_edificio', 'reservas_por_tipo',
+    'sanciones_por_tipo', 'efectividad', 'horas_semana',
+    'participantes_sancionados', 'edificios_cancelaciones',
+]
+
+# Acciones de cada tipo de usuario con su peso relativo
+MEZCLA_USUARIO = [('dashboard', 50), ('reservar_form', 20), ('reservar_rafaga', 30)]
+MEZCLA_ADMIN = [('admin_dashboard', 40), ('reporte', 60)]
+
+
+class _SinRedirecciones(urllib.request.HTTPRedirectHandler):
+    """Las redirecciones se registran como respuesta (302) sin seguirlas"""
+
+    def redirect_request(self, req, fp, code, msg, headers, newurl):
+        return None
+
+
+class Estadisticas:
+    """Latencias y resultados por ruta (compartidas entre hilos)"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.rutas = {}
+
+    def registrar(self, ruta, segundos, estado, error=False, rechazo=False):
+        with self._lock:
+            r = self.rutas.setdefault(ruta, {'latencias': [], 'estados': {}, 'errores': 0, 'rechazos': 0})
+            r['latencias'].append(segundos * 1000)
+            r['estados'][str(estado)] = r['estados'].get(str(estado), 0) + 1
+            r['errores'] += int(error)
+            r['rechazos'] += int(rechazo)
+
+    def resumen(self, duracion):
+        resumen = {}
+        with self._lock:
+            for ruta, r in sorted(self.rutas.items()):
+                latencias = sorted(r['latencias'])
+                n = len(latencias)
+                resumen[ruta] = {
+                    'solicitudes': n,
+                    'rps': round(n / duracion, 2),
+                    'p50_ms': round(_percentil(latencias, 50), 2),
+                    'p95_ms': round(_percentil(latencias, 95), 2),
+                    'p99_ms': round(_percentil(latencias, 99), 2),
+                    'media_ms': round(sum(latencias) / n, 2) if n else 0,
+                    'errores': r['errores'],
+                    'tasa_error': round(r['errores'] / n, 4) if n else 0,
+                    'rechazos': r['rechazos'],
+                    'estados': r['estados'],
+                }
+        return resumen
+
+
+def _percentil(ordenados, p):
+    """Percentil por rango más cercano"""
+    if not ordenados:
+        return 0
+    indice = max(0, min(len(ordenados) - 1, int(round(p / 100 * len(ordenados) + 0.5)) - 1))
+    return ordenados[indice]
+
+
+class UsuarioVirtual(threading.Thread):
+    """Un usuario con su propia sesión (cookies) que repite acciones hasta el fin de la prueba"""
+
+    def __init__(self, args, credencial, es_admin, salas, turnos, estadisticas, fin, semilla):
+        super().__init__(daemon=True)
+        self.args = args
+        self.correo = credencial
+        self.es_admin = es_admin
+        self.salas = salas
+        self.turnos = turnos
+        self.estadisticas = estadisticas
+        self.fin = fin
+        self.rng = random.Random(semilla)
+        self.opener = urllib.request.build_opener(
+            urllib.request.HTTPCookieProcessor(http.cookiejar.CookieJar()),
+            _SinRedirecciones()
+        )
+
+    def pedir(self, ruta, metodo='GET', datos=None, etiqueta=None):
+        """Hace una solicitud y la registra; retorna (estado, Location)"""
+        url = self.args.url.rstrip('/') + ruta
+        cuerpo = urllib.parse.urlencode(datos).encode() if datos is not None else None
+        solicitud = urllib.request.Request(url, data=cuerpo, method=metodo)
+        inicio = time.perf_counter()
+        estado, destino = 0, ''
+        try:
+            with self.opener.open(solicitud, timeout=self.args.timeout) as respuesta:
+                respuesta.read()
+                estado = respuesta.status
+        except urllib.error.HTTPError as e:
+            # 3xx sin seguir y 4xx/5xx llegan como HTTPError
+            e.read()
+            estado, destino = e.code, e.headers.get('Location', '')
+        except (urllib.error.URLError, OSError):
+            estado = 'conexion'
+        segundos = time.perf_counter() - inicio
+
+        error = estado == 'conexion' or (isinstance(estado, int) and estado >= 500)
+        rechazo = etiqueta == 'POST /user/reservar' and '/user/reservar' in destino
+        self.estadisticas.registrar(etiqueta or f"{metodo} {ruta}", segundos, estado, error, rechazo)
+        return estado, destino
+
+    def login(self):
+        estado, destino = self.pedir('/login', 'POST',
+                                     {'email': self.correo, 'password': self.args.password},
+                                     etiqueta='POST /login')
+        return estado == 302 and '/login' not in destino
+
+    def accion(self, nombre):
+        if nombre == 'dashboard':
+            self.pedir('/user/dashboard')
+        elif nombre == 'reservar_form':
+            self.pedir('/user/reservar')
+        elif nombre == 'reservar_rafaga':
+            for _ in range(self.args.rafaga):
+                sala = self.rng.choice(self.salas)
+                fecha = date.today() + timedelta(days=self.rng.randint(0, 13))
+                self.pedir('/user/reservar', 'POST', {
+                    'nombre_sala': sala[0], 'edificio': sala[1],
+                    'fecha': fecha.isoformat(), 'id_turno': self.rng.choice(self.turnos),
+                }, etiqueta='POST /user/reservar')
+        elif nombre == 'admin_dashboard':
+            self.pedir('/admin/dashboard')
+        elif nombre == 'reporte':
+            tipo = self.rng.choice(REPORTES)
+            self.pedir(f'/admin/reportes/{tipo}', etiqueta=f'GET /admin/reportes/{tipo}')
+
+    def run(self):
+        if not self.login():
+            return
+        mezcla = MEZCLA_ADMIN if self.es_admin else MEZCLA_USUARIO
+        acciones = [a for a, _ in mezcla]
+        pesos = [p for _, p in mezcla]
+        while not self.fin.is_set():
+            self.accion(self.rng.choices(acciones, weights=pesos)[0])
+            if self.args.pausa:
+                self.fin.wait(self.rng.expovariate(1 / self.args.pausa))
+
+
+def datos_de_prueba(args):
+    """Credenciales, salas y turnos reales de la base"""
+    alumnos = ejecutar_query("""
+        SELECT p.email FROM participante p
+        JOIN login l ON l.correo = p.email
+        WHERE NOT EXISTS (SELECT 1 FROM participante_programa_academico ppa
+                          WHERE ppa.ci_participante = p.ci AND ppa.rol = 'docente')
+        ORDER BY p.ci LIMIT %s
+    """, (args.usuarios * 4,), fetchall=True) or []
+    docentes = ejecutar_query("""
+        SELECT DISTINCT p.email FROM participante p
+        JOIN login l ON l.correo = p.email
+        JOIN participante_programa_academico ppa ON ppa.ci_participante = p.ci AND ppa.rol = 'docente'
+        ORDER BY p.email LIMIT %s
+    """, (max(args.admins, 1),), fetchall=True) or []
+    salas = ejecutar_query("SELECT nombre_sala, edificio FROM sala WHERE tipo_sala = 'libre'",
+                           fetchall=True) or []
+    turnos = ejecutar_query("SELECT id_turno FROM turno", fetchall=True) or []
+    return ([a['email'] for a in alumnos], [d['email'] for d in docentes],
+            [(s['nombre_sala'], s['edificio']) for s in salas], [t['id_turno'] for t in turnos])
+
+
+def commit_actual():
+    try:
+        commit = subprocess.check_output(['git', 'rev-parse', '--short', 'HEAD'], cwd=RAIZ,
+                                         text=True, stderr=subprocess.DEVNULL).strip()
+        sucio = subprocess.call(['git', 'diff', '--quiet', 'HEAD'], cwd=RAIZ,
+                                stderr=subprocess.DEVNULL) != 0
+        return commit + ('-sucio' if sucio else '')
+    except (OSError, subprocess.CalledProcessError):
+        return 'desconocido'
+
+
+def imprimir(resumen, anterior=None):
+    print(f"\n{'ruta':<45} {'n':>7} {'rps':>8} {'p50':>8} {'p95':>8} {'p99':>8} {'error%':>7} {'rech.':>6}")
+    print('-' * 103)
+    for ruta, r in resumen.items():
+        linea = (f"{ruta:<45} {r['solicitudes']:>7} {r['rps']:>8.1f} {r['p50_ms']:>7.1f}ms "
+                 f"{r['p95_ms']:>6.1f}ms {r['p99_ms']:>6.1f}ms {r['tasa_error'] * 100:>6.2f}% {r['rechazos']:>6}")
+        previo = (anterior or {}).get(ruta)
+        if previo and previo['p95_ms']:
+            cambio = (r['p95_ms'] / previo['p95_ms'] - 1) * 100
+            linea += f"   p95 {cambio:+.1f}% vs anterior"
+        print(linea)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--url', default=os.getenv('CARGA_URL', 'http://localhost:5000'))
+    parser.add_argument('--usuarios', type=int, default=20, help='usuarios (alumnos) concurrentes')
+    parser.add_argument('--admins', type=int, default=2, help='administradores concurrentes')
+    parser.add_argument('--duracion', type=float, default=60, help='segundos de carga')
+    parser.add_argument('--rafaga', type=int, default=3, help='POST a /user/reservar por ráfaga')
+    parser.add_argument('--pausa', type=float, default=0.2, help='pausa media entre acciones (s); 0 = sin pausa')
+    parser.add_argument('--timeout', type=float, default=30)
+    parser.add_argument('--password', default=os.getenv('CARGA_PASSWORD', 'password123'))
+    parser.add_argument('--semilla', type=int, default=42)
+    parser.add_argument('--salida', help='archivo JSON de resultados (por defecto benchmarks/resultados/carga_<commit>.json)')
+    parser.add_argument('--comparar', help='JSON de una corrida anterior para comparar')
+    parser.add_argument('--max-error', type=float, default=None,
+                        help='falla si la tasa de error de alguna ruta supera este valor (0-1)')
+    args = parser.parse_args()
+
+    alumnos, docentes, salas, turnos = datos_de_prueba(args)
+    if not alumnos or not salas or not turnos:
+        print("❌ La base no tiene usuarios, salas o turnos (ver scripts/generar_datos.py)")
+        return 1
+    if args.admins and not docentes:
+        print("⚠️ No hay docentes: se corre sin administradores")
+        args.admins = 0
+
+    estadisticas = Estadisticas()
+    fin = threading.Event()
+    hilos = [UsuarioVirtual(args, alumnos[i % len(alumnos)], False, salas, turnos, estadisticas, fin, args.semilla + i)
+             for i in range(args.usuarios)]
+    hilos += [UsuarioVirtual(args, docentes[i % len(docentes)], True, salas, turnos, estadisticas, fin,
+                             args.semilla + 10000 + i)
+              for i in range(args.admins)]
+
+    print(f"🚀 {args.usuarios} usuarios + {args.admins} admins contra {args.url} durante {args.duracion:.0f}s")
+    inicio = time.monotonic()
+    for hilo in hilos:
+        hilo.start()
+    fin.wait(args.duracion)
+    fin.set()
+    for hilo in hilos:
+        hilo.join(args.timeout)
+    duracion = time.monotonic() - inicio
+
+    resumen = estadisticas.resumen(duracion)
+    commit = commit_actual()
+    resultado = {
+        'commit': commit,
+        'fecha': datetime.now().isoformat(timespec='seconds'),
+        'duracion_s': round(duracion, 2),
+        'parametros': {k: v for k, v in vars(args).items() if k not in ('password', 'comparar', 'salida')},
+        'total': {
+            'solicitudes': sum(r['solicitudes'] for r in resumen.values()),
+            'rps': round(sum(r['solicitudes'] for r in resumen.values()) / duracion, 2),
+            'errores': sum(r['errores'] for r in resumen.values()),
+        },
+        'rutas': resumen,
+    }
+
+    anterior = None
+    if args.comparar:
+        with open(args.comparar, encoding='utf-8') as f:
+            previo = json.load(f)
+        anterior = previo.get('rutas')
+        print(f"📎 Comparando con {previo.get('commit')} ({previo.get('fecha')})")
+    imprimir(resumen, anterior)
+    print(f"\nTotal: {resultado['total']['solicitudes']} solicitudes, "
+          f"{resultado['total']['rps']} rps, {resultado['total']['errores']} errores")
+
+    salida = args.salida or os.path.join(RAIZ, 'benchmarks', 'resultados', f'carga_{commit}.json')
+    os.makedirs(os.path.dirname(salida), exist_ok=True)
+    with open(salida, 'w', encoding='utf-8') as f:
+        json.dump(resultado, f, ensure_ascii=False, indent=2)
+    print(f"💾 Resultados en {salida}")
+
+    if args.max_error is not None:
+        peores = [ruta for ruta, r in resumen.items() if r['tasa_error'] > args.max_error]
+        if peores:
+            print(f"❌ Tasa de error por encima de {args.max_error}: {', '.join(peores)}")
+            return 1
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
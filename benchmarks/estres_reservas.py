@@ -0,0 +1,254 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Prueba de estrés de concurrencia: muchas reservas simultáneas del mismo turno
+
+Por ronda se elige un turno libre de una sala 'libre' y se lanzan --intentos
+hilos que lo reservan a la vez, cada uno con un participante distinto
+(reservas.crear_reserva o, con --via usuario, admision.admitir_reserva).
+Verifica que gane exactamente uno, que el resto se rechace sin errores y
+que en la base quede una sola reserva. Después lanza capacidad + --extra
+altas simultáneas de participantes en la reserva ganadora y verifica que
+nunca se supere la capacidad de la sala.
+
+Informa throughput, latencias y los deadlocks del servidor (resueltos con
+los reintentos de db/reintentos.py). Sale con código 1 si alguna
+verificación falla. Las reservas creadas se eliminan al terminar cada
+ronda (salvo --conservar).
+
+Uso:
+    DB_POOL_SIZE=32 python benchmarks/estres_reservas.py [--intentos 300] [--rondas 5] [--via admin|usuario]
+"""
+
+import argparse
+import os
+import sys
+import threading
+import time
+from datetime import date, timedelta
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from db.connection import ejecutar_query
+from modules import reservas, admision
+from modules.perfil import TIPOS_SALA_BASICOS
+
+
+def elegir_sala():
+    """Sala de un tipo que cualquiera puede reservar, la de menor capacidad"""
+    marcas = ', '.join(['%s'] * len(TIPOS_SALA_BASICOS))
+    return ejecutar_query(f"""
+        SELECT nombre_sala, edificio, capacidad FROM sala
+        WHERE tipo_sala IN ({marcas})
+        ORDER BY capacidad, nombre_sala, edificio
+        LIMIT 1
+    """, tuple(TIPOS_SALA_BASICOS), fetchone=True)
+
+
+def elegir_participantes(cantidad):
+    """CI de participantes sin sanción vigente"""
+    filas = ejecutar_query("""
+        SELECT p.ci FROM participante p
+        WHERE NOT EXISTS (SELECT 1 FROM sancion_participante s
+                          WHERE s.ci_participante = p.ci AND s.fecha_fin >= CURDATE())
+        ORDER BY p.ci
+        LIMIT %s
+    """, (cantidad,), fetchall=True) or []
+    return [f['ci'] for f in filas]
+
+
+def turnos_libres(sala, id_turno, desde, cantidad):
+    """Las primeras `cantidad` fechas desde `desde` sin reserva para la sala y el turno"""
+    ocupadas = {f['fecha'] for f in ejecutar_query("""
+        SELECT fecha FROM reserva
+        WHERE nombre_sala = %s AND edificio = %s AND id_turno = %s AND fecha >= %s
+    """, (sala['nombre_sala'], sala['edificio'], id_turno, desde), fetchall=True) or []}
+    fechas = []
+    fecha = desde
+    while len(fechas) < cantidad:
+        if fecha not in ocupadas:
+            fechas.append(fecha)
+        fecha += timedelta(days=1)
+    return fechas
+
+
+def deadlocks_servidor():
+    """Contador lock_deadlocks de InnoDB (None si la métrica no está disponible)"""
+    fila = ejecutar_query("SELECT `COUNT` AS total FROM information_schema.INNODB_METRICS "
+                          "WHERE NAME = 'lock_deadlocks'", fetchone=True)
+    return fila['total'] if fila else None
+
+
+def rafaga(tarea, argumentos):
+    """
+    Ejecuta tarea(*args) en un hilo por elemento de `argumentos`, todos
+    liberados a la vez. Retorna ([(resultado, ms)], segundos totales).
+    """
+    salida = [None] * len(argumentos)
+    largada = threading.Event()
+
+    def correr(i, args):
+        largada.wait()
+        inicio = time.perf_counter()
+        try:
+            resultado = tarea(*args)
+        except Exception as e:
+            resultado = ('error', str(e), None)
+        salida[i] = (resultado, (time.perf_counter() - inicio) * 1000)
+
+    hilos = [threading.Thread(target=correr, args=(i, a)) for i, a in enumerate(argumentos)]
+    for hilo in hilos:
+        hilo.start()
+    inicio = time.perf_counter()
+    largada.set()
+    for hilo in hilos:
+        hilo.join()
+    return salida, time.perf_counter() - inicio
+
+
+def reservar_admin(sala, fecha, id_turno, ci):
+    exito, mensaje, id_reserva = reservas.crear_reserva(sala['nombre_sala'], sala['edificio'], fecha, id_turno, ci)
+    if exito:
+        return 'ok', mensaje, id_reserva
+    if mensaje == "Este turno ya está reservado":
+        return 'turno_ocupado', mensaje, None
+    return 'error', mensaje, None
+
+
+def reservar_usuario(sala, fecha, id_turno, ci):
+    veredicto = admision.admitir_reserva(sala['nombre_sala'], sala['edificio'], fecha, id_turno, ci)
+    if veredicto.admitida:
+        return 'ok', veredicto.mensaje, veredicto.id_reserva
+    if veredicto.regla in ('error', 'conexion', 'sala'):
+        return 'error', veredicto.mensaje, None
+    return veredicto.regla, veredicto.mensaje, None
+
+
+def agregar(id_reserva, ci):
+    exito, mensaje = reservas.agregar_participante_reserva(id_reserva, ci)
+    if exito:
+        return 'ok', mensaje, None
+    if mensaje == "La sala ha alcanzado su capacidad máxima":
+        return 'sin_lugar', mensaje, None
+    return 'error', mensaje, None
+
+
+def percentiles(tiempos):
+    tiempos = sorted(tiempos)
+    return tuple(tiempos[min(len(tiempos) - 1, int(len(tiempos) * p))] for p in (0.5, 0.95, 0.99))
+
+
+def resumen(nombre, salida, segundos):
+    """Imprime throughput y latencias; retorna {categoria: cantidad}"""
+    categorias = {}
+    for (categoria, _, _), _ in salida:
+        categorias[categoria] = categorias.get(categoria, 0) + 1
+    p50, p95, p99 = percentiles([ms for _, ms in salida])
+    detalle = ', '.join(f"{c}={n}" for c, n in sorted(categorias.items()))
+    print(f"   {nombre:<14} {len(salida):>5} ops en {segundos:6.2f}s = {len(salida) / segundos:8.1f} ops/s | "
+          f"p50 {p50:7.1f}ms p95 {p95:7.1f}ms p99 {p99:7.1f}ms | {detalle}")
+    return categorias
+
+
+def eliminar(id_reserva):
+    reservas.cancelar_reserva(id_reserva)
+    reservas.eliminar_reserva(id_reserva)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--intentos', type=int, default=300, help='reservas simultáneas del mismo turno por ronda')
+    parser.add_argument('--rondas', type=int, default=5, help='turnos distintos a disputar')
+    parser.add_argument('--via', choices=('admin', 'usuario'), default='admin',
+                        help='admin: reservas.crear_reserva | usuario: admision.admitir_reserva')
+    parser.add_argument('--extra', type=int, default=50,
+                        help='altas de participantes por encima de la capacidad de la sala')
+    parser.add_argument('--turno', type=int, default=None, help='id_turno a disputar (por defecto el primero)')
+    parser.add_argument('--conservar', action='store_true', help='no eliminar las reservas creadas')
+    args = parser.parse_args()
+
+    sala = elegir_sala()
+    if not sala:
+        print(f"❌ No hay salas de tipo {', '.join(TIPOS_SALA_BASICOS)} (sembrar con scripts/generar_datos.py)")
+        return 1
+    turno = ejecutar_query("SELECT MIN(id_turno) AS id_turno FROM turno", fetchone=True)
+    id_turno = args.turno or (turno and turno['id_turno'])
+    necesarios = max(args.intentos, sala['capacidad'] + args.extra)
+    participantes = elegir_participantes(necesarios)
+    if not id_turno or len(participantes) < necesarios:
+        print(f"❌ Se necesitan un turno y {necesarios} participantes sin sanción "
+              f"(hay {len(participantes)})")
+        return 1
+
+    # Lejos en el futuro: el libro de cuotas de los participantes está vacío esas semanas
+    fechas = turnos_libres(sala, id_turno, date.today() + timedelta(days=365), args.rondas)
+    tarea = reservar_admin if args.via == 'admin' else reservar_usuario
+    print(f"Sala {sala['nombre_sala']} ({sala['edificio']}), capacidad {sala['capacidad']}, turno {id_turno}, "
+          f"vía {args.via}: {args.intentos} reservas simultáneas x {args.rondas} rondas")
+
+    fallas = []
+    deadlocks_antes = deadlocks_servidor()
+    total_ops = total_segundos = 0
+    for ronda, fecha in enumerate(fechas, 1):
+        print(f"Ronda {ronda} ({fecha})")
+        salida, segundos = rafaga(tarea, [(sala, fecha, id_turno, ci) for ci in participantes[:args.intentos]])
+        categorias = resumen('reservar', salida, segundos)
+        total_ops += len(salida)
+        total_segundos += segundos
+
+        ganadores = [id_reserva for (categoria, _, id_reserva), _ in salida if categoria == 'ok']
+        errores = [mensaje for (categoria, mensaje, _), _ in salida if categoria == 'error']
+        en_base = ejecutar_query("""
+            SELECT id_reserva FROM reserva
+            WHERE nombre_sala = %s AND edificio = %s AND fecha = %s AND id_turno = %s
+        """, (sala['nombre_sala'], sala['edificio'], fecha, id_turno), fetchall=True) or []
+        if len(ganadores) != 1:
+            fallas.append(f"ronda {ronda}: {len(ganadores)} reservas aceptadas (se esperaba 1)")
+        if errores:
+            fallas.append(f"ronda {ronda}: {len(errores)} errores, p. ej. {errores[0]}")
+        if len(en_base) != 1:
+            fallas.append(f"ronda {ronda}: {len(en_base)} reservas en la base para el turno")
+        if len(ganadores) != 1:
+            if not args.conservar:
+                for id_reserva in ganadores:
+                    eliminar(id_reserva)
+            continue
+
+        # Capacidad: el creador ya ocupa un lugar
+        id_reserva = ganadores[0]
+        ganador = next(ci for ci, ((categoria, _, _), _) in zip(participantes, salida) if categoria == 'ok')
+        otros = [ci for ci in participantes[:sala['capacidad'] + args.extra] if ci != ganador]
+        salida, segundos = rafaga(agregar, [(id_reserva, ci) for ci in otros])
+        categorias = resumen('participantes', salida, segundos)
+        total_ops += len(salida)
+        total_segundos += segundos
+
+        cantidad = ejecutar_query("SELECT COUNT(*) AS total FROM reserva_participante WHERE id_reserva = %s",
+                                  (id_reserva,), fetchone=True)['total']
+        if cantidad > sala['capacidad']:
+            fallas.append(f"ronda {ronda}: {cantidad} participantes en una sala de capacidad {sala['capacidad']}")
+        if categorias.get('ok', 0) != min(sala['capacidad'] - 1, len(otros)):
+            fallas.append(f"ronda {ronda}: {categorias.get('ok', 0)} altas aceptadas "
+                          f"(se esperaban {min(sala['capacidad'] - 1, len(otros))})")
+        if categorias.get('error'):
+            errores = [mensaje for (categoria, mensaje, _), _ in salida if categoria == 'error']
+            fallas.append(f"ronda {ronda}: {len(errores)} errores al agregar, p. ej. {errores[0]}")
+
+        if not args.conservar:
+            eliminar(id_reserva)
+
+    deadlocks_despues = deadlocks_servidor()
+    print(f"\nThroughput total: {total_ops / total_segundos:.1f} ops/s ({total_ops} operaciones)")
+    if deadlocks_antes is not None and deadlocks_despues is not None:
+        print(f"Deadlocks del servidor durante la prueba: {deadlocks_despues - deadlocks_antes}")
+
+    if fallas:
+        for falla in fallas:
+            print(f"❌ {falla}")
+        return 1
+    print("✅ Un solo ganador por turno y capacidad respetada en todas las rondas")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,151 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Cachés en memoria de proceso
+"""
+
+import threading
+import time
+from collections import OrderedDict
+
+# Registro de cachés por nombre (para estadísticas y métricas)
+CACHES = {}
+
+
+class CacheTTL:
+    """
+    Caché read-through con vencimiento por TTL e invalidación explícita.
+    Los valores None no se guardan (ejecutar_query retorna None ante errores).
+    """
+
+    def __init__(self, nombre, ttl):
+        self.nombre = nombre
+        self.ttl = ttl
+        self._datos = {}  # clave -> (vence, valor)
+        self._lock = threading.Lock()
+        self.aciertos = 0
+        self.fallos = 0
+        self.invalidaciones = 0
+        CACHES[nombre] = self
+
+    def obtener(self, clave, cargador):
+        """Retorna el valor de `clave`; si no está o venció, lo carga con `cargador()`"""
+        ahora = time.monotonic()
+        with self._lock:
+            entrada = self._datos.get(clave)
+            if entrada and entrada[0] > ahora:
+                self.aciertos += 1
+                return entrada[1]
+            self.fallos += 1
+
+        valor = cargador()
+        if valor is not None:
+            with self._lock:
+                self._datos[clave] = (ahora + self.ttl, valor)
+        return valor
+
+    def invalidar(self, *claves):
+        """Descarta las claves indicadas (todas si no se indica ninguna)"""
+        with self._lock:
+            self.invalidaciones += 1
+            if not claves:
+                self._datos.clear()
+            for clave in claves:
+                self._datos.pop(clave, None)
+
+    def estadisticas(self):
+        with self._lock:
+            total = self.aciertos + self.fallos
+            return {
+                'entradas': len(self._datos),
+                'aciertos': self.aciertos,
+                'fallos': self.fallos,
+                'invalidaciones': self.invalidaciones,
+                'tasa_aciertos': round(self.aciertos / total, 4) if total else 0,
+            }
+
+
+class CacheLRU:
+    """
+    Caché acotada por cantidad de entradas (desaloja la menos usada) con marca de agua.
+
+    Cada entrada guarda la marca de agua (p. ej. versiones de las tablas de las
+    que depende) vigente al cargarla. Dentro de `ventana` segundos se sirve sin
+    verificar nada; pasada la ventana se compara la marca guardada con la actual
+    y solo se recarga si cambió.
+    """
+
+    def __init__(self, nombre, max_entradas, ventana):
+        self.nombre = nombre
+        self.max_entradas = max_entradas
+        self.ventana = ventana
+        self._datos = OrderedDict()  # clave -> [verificada, marca, valor]
+        self._lock = threading.Lock()
+        self.aciertos = 0
+        self.fallos = 0
+        self.revalidaciones = 0
+        self.desalojos = 0
+        CACHES[nombre] = self
+
+    def obtener(self, clave, cargador, marca_actual):
+        """
+        Retorna el valor de `clave`.
+        cargador():     calcula el valor
+        marca_actual(): retorna la marca de agua actual (None si no se pudo leer)
+        """
+        ahora = time.monotonic()
+        with self._lock:
+            entrada = self._datos.get(clave)
+            if entrada and ahora - entrada[0] < self.ventana:
+                self._datos.move_to_end(clave)
+                self.aciertos += 1
+                return entrada[2]
+
+        marca = marca_actual()
+        if entrada and marca is not None and marca == entrada[1]:
+            with self._lock:
+                entrada[0] = ahora
+                if clave in self._datos:
+                    self._datos.move_to_end(clave)
+                self.aciertos += 1
+                self.revalidaciones += 1
+            return entrada[2]
+
+        with self._lock:
+            self.fallos += 1
+
+        valor = cargador()
+        if valor is not None and marca is not None:
+            with self._lock:
+                self._datos[clave] = [ahora, marca, valor]
+                self._datos.move_to_end(clave)
+                while len(self._datos) > self.max_entradas:
+                    self._datos.popitem(last=False)
+                    self.desalojos += 1
+        return valor
+
+    def invalidar(self, *claves):
+        """Descarta las claves indicadas (todas si no se indica ninguna)"""
+        with self._lock:
+            if not claves:
+                self._datos.clear()
+            for clave in claves:
+                self._datos.pop(clave, None)
+
+    def estadisticas(self):
+        with self._lock:
+            total = self.aciertos + self.fallos
+            return {
+                'entradas': len(self._datos),
+                'max_entradas': self.max_entradas,
+                'aciertos': self.aciertos,
+                'fallos': self.fallos,
+                'revalidaciones': self.revalidaciones,
+                'desalojos': self.desalojos,
+                'tasa_aciertos': round(self.aciertos / total, 4) if total else 0,
+            }
+
+
+def estadisticas_caches():
+    """Estadísticas de todas las cachés registradas"""
+    return {nombre: cache.estadisticas() for nombre, cache in CACHES.items()}
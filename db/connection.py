@@ -7,6 +7,9 @@ Módulo de conexión a base de datos MySQL
 import mysql.connector
 from mysql.connector import Error
 import os
+import threading
+from db.pool import PoolConexiones
+from db.unidad_trabajo import unidad_actual
 
 # Configuración de conexión (puede usar variables de entorno)
 DB_CONFIG = {
@@ -15,37 +18,75 @@ DB_CONFIG = {
     'user': os.getenv('DB_USER', 'root'),
     'password': os.getenv('DB_PASSWORD', 'root'),
     'database': os.getenv('DB_NAME', 'reserva_salas'),
-    'charset': 'utf8mb4'
+    # El charset se negocia una sola vez al abrir la conexión
+    'charset': 'utf8mb4',
+    'collation': 'utf8mb4_unicode_ci'
 }
 
+# Configuración del pool de conexiones
+POOL_CONFIG = {
+    'tamano': int(os.getenv('DB_POOL_SIZE', '5')),
+    'desborde': int(os.getenv('DB_POOL_MAX_OVERFLOW', '10')),
+    'vida_maxima': int(os.getenv('DB_POOL_RECYCLE', '1800')),
+    'timeout': float(os.getenv('DB_POOL_TIMEOUT', '10')),
+    'ping_inactividad': float(os.getenv('DB_POOL_PING_AFTER', '30'))
+}
+
+_pool = None
+_pool_pid = None
+_pool_lock = threading.Lock()
+
+
+def obtener_pool():
+    """Retorna el pool del proceso (se recrea tras un fork)"""
+    global _pool, _pool_pid
+    if _pool is None or _pool_pid != os.getpid():
+        with _pool_lock:
+            if _pool is None or _pool_pid != os.getpid():
+                _pool = PoolConexiones(DB_CONFIG, **POOL_CONFIG)
+                _pool_pid = os.getpid()
+    return _pool
+
+def estadisticas_pool():
+    """Estadísticas del pool de conexiones en tiempo de ejecución"""
+    return obtener_pool().estadisticas()
+
 def conectar():
-    """Establece conexión con MySQL"""
+    """
+    Obtiene una conexión del pool (close() la devuelve al pool).
+    Dentro de una unidad de trabajo retorna la conexión compartida de la unidad.
+    """
     try:
-        conn = mysql.connector.connect(**DB_CONFIG)
-        # Asegurar UTF-8 en la conexión
-        cursor = conn.cursor()
-        cursor.execute("SET NAMES utf8mb4")
-        cursor.execute("SET CHARACTER SET utf8mb4")
-        cursor.execute("SET character_set_connection=utf8mb4")
-        cursor.close()
-        return conn
+        unidad = unidad_actual()
+        if unidad is not None:
+            return unidad.conexion()
+        return obtener_pool().obtener()
     except Error as e:
         print(f"❌ Error al conectar con MySQL: {e}")
         return None
 
-def ejecutar_query(query, params=None, fetchall=False, fetchone=False, commit=False):
-    """Ejecuta una query SQL y retorna resultados"""
+def ejecutar_query(query, params=None, fetchall=False, fetchone=False, commit=False, preparada=False):
+    """
+    Ejecuta una query SQL y retorna resultados.
+    Con preparada=True la sentencia se prepara en el servidor una vez por
+    conexión del pool y las ejecuciones siguientes solo envían parámetros.
+    """
+    if preparada:
+        return _ejecutar_preparada(query, params, fetchall, fetchone, commit)
+
     conn = conectar()
     if not conn:
         return None
     
+    cursor = None
     try:
         cursor = conn.cursor(dictionary=True)
         cursor.execute(query, params or ())
         
         if commit:
             conn.commit()
-            return cursor.lastrowid
+            # INSERT con AUTO_INCREMENT: id generado; UPDATE/DELETE: filas afectadas
+            return cursor.lastrowid or cursor.rowcount
         elif fetchall:
             return cursor.fetchall()
         elif fetchone:
@@ -53,9 +94,70 @@ def ejecutar_query(query, params=None, fetchall=False, fetchone=False, commit=Fa
         return True
     except Error as e:
         print(f"❌ Error en query: {e}")
+        if commit:
+            conn.rollback()
         return None
     finally:
+        if cursor:
+            cursor.close()
+        conn.close()
+
+def consultar_aparte(query, params=None):
+    """
+    Lectura en una conexión propia del pool, fuera de la unidad de trabajo
+    del request: no ve sus escrituras sin confirmar ni su snapshot. Para las
+    cargas de las estructuras en memoria. Retorna las filas o None si hubo error.
+    """
+    try:
+        conn = obtener_pool().obtener()
+    except Error as e:
+        print(f"❌ Error al conectar con MySQL: {e}")
+        return None
+    
+    try:
+        cursor = conn.cursor(dictionary=True)
+        cursor.execute(query, params or ())
+        filas = cursor.fetchall()
         cursor.close()
+        return filas
+    except Error as e:
+        print(f"❌ Error en query: {e}")
+        return None
+    finally:
+        # El pool revierte la transacción de lectura al recibirla
+        conn.close()
+
+def _ejecutar_preparada(query, params, fetchall, fetchone, commit):
+    """Camino de ejecutar_query para sentencias preparadas (protocolo binario)"""
+    conn = conectar()
+    if not conn:
+        return None
+    
+    try:
+        cursor = conn.cursor_preparado(query)
+        cursor.execute(query, params or ())
+        
+        if commit:
+            conn.commit()
+            return cursor.lastrowid or cursor.rowcount
+        
+        if cursor.description is None:
+            return True
+        
+        # El cursor se reutiliza: leer siempre todo el resultado
+        columnas = cursor.column_names
+        filas = [dict(zip(columnas, fila)) for fila in cursor.fetchall()]
+        if fetchall:
+            return filas
+        elif fetchone:
+            return filas[0] if filas else None
+        return True
+    except Error as e:
+        print(f"❌ Error en query: {e}")
+        if commit:
+            conn.rollback()
+        return None
+    finally:
         conn.close()
 
 def test_connection():
@@ -67,4 +169,4 @@ def test_connection():
         return True
     else:
         print("❌ No se pudo conectar a MySQL. Verifique la configuración.")
-        return False
\ No newline at end of file
+        return False
@@ -0,0 +1,234 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Log de consultas lentas con EXPLAIN automático
+Toda sentencia que pasa por los cursores del pool y supera el umbral
+(ejecución más lectura del resultado) se registra con su SQL normalizada,
+parámetros ocultos, duración, filas y la función que la originó. El EXPLAIN
+se captura en un hilo aparte con una conexión propia, fuera del request.
+Los totales para la página de administración son por proceso.
+"""
+
+import json
+import logging
+import os
+import queue
+import sys
+import threading
+import time
+from datetime import date, datetime, timedelta
+from decimal import Decimal
+from logging.handlers import RotatingFileHandler
+
+import mysql.connector
+from mysql.connector import Error
+
+from db import instrumentacion
+from db.connection import DB_CONFIG
+
+# Configuración
+UMBRAL_MS = float(os.getenv('SQL_LENTA_MS', '200'))
+ARCHIVO_LOG = os.getenv('SQL_LENTA_LOG', os.path.join('logs', 'consultas_lentas.log'))
+LOG_MAX_BYTES = int(os.getenv('SQL_LENTA_LOG_BYTES', str(5 * 1024 * 1024)))
+LOG_ARCHIVOS = int(os.getenv('SQL_LENTA_LOG_ARCHIVOS', '5'))
+# Un EXPLAIN por sentencia normalizada cada tantos segundos
+EXPLAIN_VIGENCIA = float(os.getenv('SQL_LENTA_EXPLAIN_SEGUNDOS', '600'))
+MAX_PENDIENTES = 200
+MAX_SENTENCIAS = 500
+
+_VERBOS_EXPLAIN = ('SELECT', 'WITH', 'UPDATE', 'DELETE', 'INSERT', 'REPLACE')
+_RAIZ = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+_DIR_DB = os.path.join(_RAIZ, 'db')
+
+_pendientes = queue.Queue(maxsize=MAX_PENDIENTES)
+_totales = {}  # sql normalizada -> totales
+_lock = threading.Lock()
+_log = logging.getLogger('consultas_lentas')
+_instalado = False
+_descartadas = 0
+
+
+# ============= REGISTRO (hilo del request) =============
+
+def ocultar(valor):
+    """Parámetro apto para el log: números, fechas y NULL se conservan; textos no"""
+    if valor is None or isinstance(valor, (bool, int, float, Decimal)):
+        return valor
+    if isinstance(valor, (date, datetime, timedelta)):
+        return str(valor)
+    if isinstance(valor, (str, bytes, bytearray)):
+        return f'<texto:{len(valor)}>'
+    return f'<{type(valor).__name__}>'
+
+
+def _es_lote(params):
+    """Parámetros de executemany (una secuencia por fila)"""
+    return isinstance(params, (list, tuple)) and bool(params) and isinstance(params[0], (list, tuple, dict))
+
+
+def ocultar_params(params):
+    if params is None:
+        return None
+    if isinstance(params, dict):
+        return {clave: ocultar(valor) for clave, valor in params.items()}
+    if _es_lote(params):
+        return f'<{len(params)} filas>'
+    if isinstance(params, (list, tuple)):
+        return [ocultar(valor) for valor in params]
+    return ocultar(params)
+
+
+def funcion_llamadora():
+    """Primera función fuera de db/ en la pila ('modulo.funcion:linea')"""
+    frame = sys._getframe(1)
+    while frame is not None:
+        archivo = frame.f_code.co_filename
+        if not archivo.startswith(_DIR_DB) and f'{os.sep}mysql{os.sep}' not in archivo:
+            modulo = os.path.splitext(os.path.relpath(archivo, _RAIZ))[0].replace(os.sep, '.')
+            return f"{modulo}.{frame.f_code.co_name}:{frame.f_lineno}"
+        frame = frame.f_back
+    return '?'
+
+
+def _sentencia_completa(sql, params, segundos, filas, error):
+    """Observador de db.instrumentacion: descarta rápido lo que no es lento"""
+    global _descartadas
+    if segundos * 1000 < UMBRAL_MS:
+        return
+    if isinstance(sql, (bytes, bytearray)):
+        sql = sql.decode('utf-8', errors='replace')
+
+    normalizada = instrumentacion.normalizar(sql)
+    funcion = funcion_llamadora()
+    with _lock:
+        total = _totales.get(normalizada)
+        if total is None:
+            if len(_totales) >= MAX_SENTENCIAS:
+                # Se descarta la de menor tiempo total para hacer lugar
+                menor = min(_totales, key=lambda clave: _totales[clave]['tiempo_total'])
+                del _totales[menor]
+            total = _totales[normalizada] = {
+                'sql': normalizada, 'veces': 0, 'tiempo_total': 0.0, 'tiempo_max': 0.0,
+                'filas_max': 0, 'errores': 0, 'funciones': set(),
+                'ultima': None, 'explain': None, 'explain_en': 0.0,
+            }
+        total['veces'] += 1
+        total['tiempo_total'] += segundos
+        total['tiempo_max'] = max(total['tiempo_max'], segundos)
+        total['filas_max'] = max(total['filas_max'], filas)
+        total['errores'] += error is not None
+        total['funciones'].add(funcion)
+        total['ultima'] = datetime.now()
+        pedir_explain = (time.monotonic() - total['explain_en'] > EXPLAIN_VIGENCIA
+                         and not _es_lote(params)
+                         and sql.lstrip().split(None, 1)[0].upper() in _VERBOS_EXPLAIN)
+        if pedir_explain:
+            total['explain_en'] = time.monotonic()
+
+    registro = {
+        'fecha': datetime.now().isoformat(timespec='milliseconds'),
+        'ms': round(segundos * 1000, 2),
+        'filas': filas,
+        'funcion': funcion,
+        'sql': normalizada,
+        'params': ocultar_params(params),
+        'error': str(error) if error is not None else None,
+    }
+    try:
+        # Los parámetros reales solo viajan al hilo del EXPLAIN, nunca al log
+        _pendientes.put_nowait((registro, sql if pedir_explain else None, params))
+    except queue.Full:
+        _descartadas += 1
+
+
+# ============= EXPLAIN Y ESCRITURA (hilo de fondo) =============
+
+class _Explicador:
+    """Conexión propia sin instrumentar: su EXPLAIN no se cuenta ni se vuelve a registrar"""
+
+    def __init__(self):
+        self.conn = None
+
+    def explicar(self, sql, params):
+        try:
+            if self.conn is None or not self.conn.is_connected():
+                self.conn = mysql.connector.connect(**DB_CONFIG)
+            cursor = self.conn.cursor(dictionary=True)
+            try:
+                cursor.execute(f"EXPLAIN {sql}", params or ())
+                return [{clave: fila.get(clave) for clave in
+                         ('table', 'type', 'possible_keys', 'key', 'rows', 'filtered', 'Extra')}
+                        for fila in cursor.fetchall()]
+            finally:
+                cursor.close()
+                # EXPLAIN de un DML no modifica nada, pero no deja transacción abierta
+                self.conn.rollback()
+        except Error as e:
+            return [{'error': str(e)}]
+
+
+def _trabajar():
+    explicador = _Explicador()
+    while True:
+        registro, sql, params = _pendientes.get()
+        try:
+            if sql is not None:
+                plan = explicador.explicar(sql, params)
+                registro['explain'] = plan
+                with _lock:
+                    total = _totales.get(registro['sql'])
+                    if total is not None:
+                        total['explain'] = plan
+            _log.warning(json.dumps(registro, ensure_ascii=False, default=str))
+        except Exception as e:
+            print(f"⚠️ Error registrando consulta lenta: {e}")
+
+
+def instalar():
+    """Configura el log rotativo, arranca el hilo de EXPLAIN y se registra como observador"""
+    global _instalado
+    if _instalado:
+        return
+    _instalado = True
+
+    directorio = os.path.dirname(ARCHIVO_LOG)
+    if directorio:
+        os.makedirs(directorio, exist_ok=True)
+    manejador = RotatingFileHandler(ARCHIVO_LOG, maxBytes=LOG_MAX_BYTES,
+                                    backupCount=LOG_ARCHIVOS, encoding='utf-8')
+    manejador.setFormatter(logging.Formatter('%(message)s'))
+    _log.addHandler(manejador)
+    _log.setLevel(logging.WARNING)
+    _log.propagate = False
+
+    threading.Thread(target=_trabajar, name='consultas-lentas', daemon=True).start()
+    instrumentacion.registrar_observador_completa(_sentencia_completa)
+
+
+# ============= CONSULTA =============
+
+def top(limite=30, orden='tiempo_total'):
+    """Sentencias lentas de este proceso ordenadas por tiempo total (o 'veces', 'tiempo_max')"""
+    with _lock:
+        totales = [dict(total, funciones=sorted(total['funciones'])) for total in _totales.values()]
+    totales.sort(key=lambda total: total[orden], reverse=True)
+    for total in totales[:limite]:
+        total['tiempo_promedio'] = total['tiempo_total'] / total['veces']
+    return totales[:limite]
+
+
+def estadisticas():
+    with _lock:
+        sentencias = len(_totales)
+    return {
+        'umbral_ms': UMBRAL_MS,
+        'archivo': ARCHIVO_LOG,
+        'sentencias': sentencias,
+        'pendientes': _pendientes.qsize(),
+        'descartadas': _descartadas,
+    }
+
+
+def reiniciar():
+    with _lock:
+        _totales.clear()
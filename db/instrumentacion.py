@@ -0,0 +1,259 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Instrumentación de SQL
+Los cursores que entrega el pool cronometran cada sentencia e informan a:
+  - la contabilidad del request (o bloque) en curso, si hay una activa
+  - los observadores registrados (métricas, ...) al terminar cada execute
+  - los observadores de sentencias completas (log de consultas lentas, ...)
+    cuando se terminó de leer el resultado, con el tiempo total y las filas
+"""
+
+import os
+import re
+import time
+from collections import Counter
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+# Misma sentencia (normalizada) repetida esta cantidad de veces en un request: posible N+1
+UMBRAL_N_MAS_UNO = int(os.getenv('SQL_UMBRAL_N_MAS_UNO', '5'))
+
+_contabilidad_actual = ContextVar('contabilidad_sql', default=None)
+_observadores = []
+_observadores_completas = []
+
+
+class PresupuestoSQLExcedido(Exception):
+    """Un request ejecutó más SQL que su presupuesto (modo 'fallar')"""
+
+
+def registrar_observador(funcion):
+    """Registra funcion(sql, params, segundos, error) para que se llame después de cada sentencia"""
+    _observadores.append(funcion)
+    return funcion
+
+
+def registrar_observador_completa(funcion):
+    """
+    Registra funcion(sql, params, segundos, filas, error) para cuando una sentencia
+    termina: ejecución más lectura del resultado
+    """
+    _observadores_completas.append(funcion)
+    return funcion
+
+
+_RE_CADENA = re.compile(r"'(?:[^'\\]|\\.|'')*'")
+_RE_NUMERO = re.compile(r'\b\d+(?:\.\d+)?\b')
+_RE_LISTA = re.compile(r'\(\s*(?:\?|%s)(?:\s*,\s*(?:\?|%s))+\s*\)')
+_RE_ESPACIOS = re.compile(r'\s+')
+
+
+def normalizar(sql):
+    """Forma canónica de una sentencia: sin literales ni espacios repetidos"""
+    if isinstance(sql, (bytes, bytearray)):
+        sql = sql.decode('utf-8', errors='replace')
+    sql = _RE_CADENA.sub('?', sql)
+    sql = _RE_NUMERO.sub('?', sql)
+    sql = _RE_LISTA.sub('(...)', sql)
+    return _RE_ESPACIOS.sub(' ', sql).strip()
+
+
+class Contabilidad:
+    """Totales de SQL de un request: sentencias, conexiones, filas y tiempo en la base"""
+
+    def __init__(self):
+        self.inicio = time.perf_counter()
+        self.sentencias = 0
+        self.conexiones = 0
+        self.filas = 0
+        self.tiempo_db = 0.0
+        self.por_sentencia = Counter()
+
+    @property
+    def tiempo_total(self):
+        return time.perf_counter() - self.inicio
+
+    def posibles_n_mas_uno(self, umbral=None):
+        """Sentencias normalizadas repetidas al menos `umbral` veces: [(sql, veces)]"""
+        umbral = umbral or UMBRAL_N_MAS_UNO
+        return [(sql, n) for sql, n in self.por_sentencia.most_common() if n >= umbral]
+
+    def excesos(self, sentencias=None, ms=None):
+        """Descripción de los límites superados (lista vacía si está dentro del presupuesto)"""
+        excesos = []
+        if sentencias and self.sentencias > sentencias:
+            excesos.append(f"{self.sentencias} sentencias (máximo {sentencias})")
+        if ms and self.tiempo_db * 1000 > ms:
+            excesos.append(f"{self.tiempo_db * 1000:.1f} ms en la base (máximo {ms} ms)")
+        return excesos
+
+    def server_timing(self):
+        """Valor del header Server-Timing"""
+        return (f'db;dur={self.tiempo_db * 1000:.2f};desc="{self.sentencias} sentencias, '
+                f'{self.conexiones} conexiones, {self.filas} filas", '
+                f'app;dur={self.tiempo_total * 1000:.2f}')
+
+    def resumen(self):
+        return (f"{self.sentencias} sentencias, {self.conexiones} conexiones, {self.filas} filas, "
+                f"{self.tiempo_db * 1000:.1f} ms en la base de {self.tiempo_total * 1000:.1f} ms")
+
+
+def contabilidad_actual():
+    """Contabilidad activa en este contexto, o None"""
+    return _contabilidad_actual.get()
+
+def iniciar():
+    """Inicia la contabilidad en el contexto actual y retorna (contabilidad, token)"""
+    contabilidad = Contabilidad()
+    return contabilidad, _contabilidad_actual.set(contabilidad)
+
+def finalizar(token):
+    _contabilidad_actual.reset(token)
+
+@contextmanager
+def contabilizar():
+    """
+    Contabilidad de un bloque (scripts, pruebas):
+
+        with contabilizar() as c:
+            reservas.obtener_reserva(1)
+        assert c.sentencias <= 2
+    """
+    contabilidad, token = iniciar()
+    try:
+        yield contabilidad
+    finally:
+        finalizar(token)
+
+
+def conexion_prestada():
+    """Lo llama el pool al prestar una conexión"""
+    contabilidad = _contabilidad_actual.get()
+    if contabilidad is not None:
+        contabilidad.conexiones += 1
+
+
+def _sentencia(sql, params, segundos, error):
+    contabilidad = _contabilidad_actual.get()
+    if contabilidad is not None:
+        contabilidad.sentencias += 1
+        contabilidad.tiempo_db += segundos
+        contabilidad.por_sentencia[normalizar(sql)] += 1
+    for observador in _observadores:
+        try:
+            observador(sql, params, segundos, error)
+        except Exception as e:
+            print(f"⚠️ Error en observador de SQL: {e}")
+
+
+def _completa(sql, params, segundos, filas, error):
+    for observador in _observadores_completas:
+        try:
+            observador(sql, params, segundos, filas, error)
+        except Exception as e:
+            print(f"⚠️ Error en observador de SQL: {e}")
+
+
+def _lectura(filas, segundos):
+    contabilidad = _contabilidad_actual.get()
+    if contabilidad is not None:
+        contabilidad.filas += filas
+        # Con cursores sin buffer las filas viajan al leerlas: también es tiempo de base
+        contabilidad.tiempo_db += segundos
+
+
+class CursorInstrumentado:
+    """Envuelve un cursor de mysql.connector midiendo ejecuciones y lecturas"""
+
+    def __init__(self, cursor):
+        self._cursor = cursor
+        # Sentencia en curso: [sql, params, segundos, filas, error] hasta leer todo el resultado
+        self._pendiente = None
+
+    def __getattr__(self, nombre):
+        return getattr(self._cursor, nombre)
+
+    def _ejecutar(self, metodo, operation, args, kwargs):
+        self._terminar()
+        inicio = time.perf_counter()
+        error = None
+        try:
+            return metodo(operation, *args, **kwargs)
+        except Exception as e:
+            error = e
+            raise
+        finally:
+            segundos = time.perf_counter() - inicio
+            params = args[0] if args else kwargs.get('params', kwargs.get('seq_params'))
+            _sentencia(operation, params, segundos, error)
+            if _observadores_completas:
+                self._pendiente = [operation, params, segundos, 0, error]
+                if error is not None:
+                    self._terminar()
+
+    def _leido(self, filas, segundos, agotado):
+        _lectura(filas, segundos)
+        if self._pendiente is not None:
+            self._pendiente[2] += segundos
+            self._pendiente[3] += filas
+            if agotado:
+                self._terminar()
+
+    def _terminar(self):
+        """Informa la sentencia pendiente a los observadores de sentencias completas"""
+        pendiente, self._pendiente = self._pendiente, None
+        if pendiente is None:
+            return
+        sql, params, segundos, filas, error = pendiente
+        if not filas and error is None:
+            # Sin lecturas (INSERT/UPDATE/DELETE): filas afectadas
+            try:
+                filas = max(self._cursor.rowcount or 0, 0)
+            except Exception:
+                filas = 0
+        _completa(sql, params, segundos, filas, error)
+
+    def execute(self, operation, *args, **kwargs):
+        return self._ejecutar(self._cursor.execute, operation, args, kwargs)
+
+    def executemany(self, operation, *args, **kwargs):
+        return self._ejecutar(self._cursor.executemany, operation, args, kwargs)
+
+    def fetchone(self):
+        inicio = time.perf_counter()
+        fila = self._cursor.fetchone()
+        self._leido(1 if fila is not None else 0, time.perf_counter() - inicio, fila is None)
+        return fila
+
+    def fetchmany(self, *args, **kwargs):
+        inicio = time.perf_counter()
+        filas = self._cursor.fetchmany(*args, **kwargs)
+        self._leido(len(filas), time.perf_counter() - inicio, not filas)
+        return filas
+
+    def fetchall(self):
+        inicio = time.perf_counter()
+        filas = self._cursor.fetchall()
+        self._leido(len(filas), time.perf_counter() - inicio, True)
+        return filas
+
+    def close(self):
+        self._terminar()
+        return self._cursor.close()
+
+    def __iter__(self):
+        return iter(self.fetchone, None)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def __del__(self):
+        # Cursores preparados: el envoltorio se descarta sin cerrar el cursor cacheado
+        try:
+            self._terminar()
+        except Exception:
+            pass
@@ -0,0 +1,245 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Pool de conexiones MySQL
+Reutiliza conexiones abiertas en lugar de hacer un handshake por query
+"""
+
+import threading
+import time
+import mysql.connector
+from mysql.connector import Error
+from db.instrumentacion import CursorInstrumentado, conexion_prestada
+
+
+class PoolAgotado(Error):
+    """No hay conexiones libres y se alcanzó el máximo (tamaño + desborde)"""
+
+
+class _Entrada:
+    """Conexión física administrada por el pool"""
+
+    def __init__(self, conn):
+        self.conn = conn
+        self.creada = time.monotonic()
+        self.ultimo_uso = self.creada
+        self.preparadas = {}  # sql -> cursor preparado (vive lo mismo que la conexión)
+
+
+class ConexionAgrupada:
+    """
+    Conexión prestada por el pool.
+    Se usa igual que una conexión de mysql.connector; close() la devuelve al pool.
+    """
+
+    def __init__(self, pool, entrada):
+        self._pool = pool
+        self._entrada = entrada
+
+    def __getattr__(self, nombre):
+        if self._entrada is None:
+            raise Error("La conexión ya fue devuelta al pool")
+        return getattr(self._entrada.conn, nombre)
+
+    def cursor(self, *args, **kwargs):
+        """Cursor instrumentado (tiempo, sentencias y filas por request)"""
+        if self._entrada is None:
+            raise Error("La conexión ya fue devuelta al pool")
+        return CursorInstrumentado(self._entrada.conn.cursor(*args, **kwargs))
+
+    def cursor_preparado(self, sql):
+        """
+        Cursor con la sentencia `sql` preparada en el servidor.
+        Se prepara una vez por conexión física y se reutiliza en los préstamos siguientes.
+        """
+        if self._entrada is None:
+            raise Error("La conexión ya fue devuelta al pool")
+        cursor = self._entrada.preparadas.get(sql)
+        if cursor is None:
+            cursor = self._entrada.conn.cursor(prepared=True)
+            self._entrada.preparadas[sql] = cursor
+        return CursorInstrumentado(cursor)
+
+    def close(self):
+        """Devuelve la conexión al pool (no cierra el socket)"""
+        if self._entrada is not None:
+            entrada, self._entrada = self._entrada, None
+            self._pool._devolver(entrada)
+
+    def descartar(self):
+        """Cierra la conexión física en lugar de devolverla al pool"""
+        if self._entrada is not None:
+            entrada, self._entrada = self._entrada, None
+            self._pool._devolver(entrada, descartar=True)
+
+
+class PoolConexiones:
+    """
+    Pool de conexiones con desborde, vida máxima y verificación al prestar.
+
+    tamano:           conexiones que se mantienen abiertas en reposo
+    desborde:         conexiones extra permitidas en picos (se cierran al devolverse)
+    vida_maxima:      segundos tras los cuales una conexión se recicla
+    timeout:          segundos máximos de espera por una conexión libre
+    ping_inactividad: segundos de inactividad a partir de los cuales se hace ping al prestar
+    """
+
+    def __init__(self, config, tamano=5, desborde=10, vida_maxima=1800,
+                 timeout=10, ping_inactividad=30):
+        self.config = dict(config)
+        # Descartar resultados no leídos al cerrar cursores o devolver la conexión
+        self.config.setdefault('consume_results', True)
+        self.tamano = tamano
+        self.desborde = desborde
+        self.vida_maxima = vida_maxima
+        self.timeout = timeout
+        self.ping_inactividad = ping_inactividad
+
+        self._libres = []
+        self._abiertas = 0
+        self._en_uso = 0
+        self._cond = threading.Condition(threading.Lock())
+        self._stats = {
+            'creadas': 0,
+            'reutilizadas': 0,
+            'recicladas': 0,
+            'descartadas': 0,
+            'pings_fallidos': 0,
+            'esperas': 0,
+            'agotado': 0,
+            'desborde_max': 0,
+        }
+
+    # ---------- préstamo / devolución ----------
+
+    def obtener(self):
+        """Presta una conexión; espera hasta `timeout` si el pool está lleno"""
+        limite = time.monotonic() + self.timeout
+        maximo = self.tamano + self.desborde
+
+        while True:
+            entrada = None
+            crear = False
+
+            with self._cond:
+                while not self._libres and self._abiertas >= maximo:
+                    restante = limite - time.monotonic()
+                    if restante <= 0:
+                        self._stats['agotado'] += 1
+                        raise PoolAgotado(
+                            f"Pool agotado: {self._abiertas} conexiones en uso (máximo {maximo})"
+                        )
+                    self._stats['esperas'] += 1
+                    self._cond.wait(restante)
+
+                if self._libres:
+                    entrada = self._libres.pop()
+                else:
+                    self._abiertas += 1
+                    crear = True
+                self._en_uso += 1
+                desbordadas = self._abiertas - self.tamano
+                if desbordadas > self._stats['desborde_max']:
+                    self._stats['desborde_max'] = desbordadas
+
+            if crear:
+                try:
+                    entrada = _Entrada(mysql.connector.connect(**self.config))
+                except Error:
+                    with self._cond:
+                        self._abiertas -= 1
+                        self._en_uso -= 1
+                        self._cond.notify()
+                    raise
+                with self._cond:
+                    self._stats['creadas'] += 1
+                conexion_prestada()
+                return ConexionAgrupada(self, entrada)
+
+            if self._es_valida(entrada):
+                with self._cond:
+                    self._stats['reutilizadas'] += 1
+                entrada.ultimo_uso = time.monotonic()
+                conexion_prestada()
+                return ConexionAgrupada(self, entrada)
+
+            # Conexión vencida o caída: cerrarla y volver a intentar
+            self._cerrar_entrada(entrada)
+            with self._cond:
+                self._abiertas -= 1
+                self._en_uso -= 1
+                self._cond.notify()
+
+    def _es_valida(self, entrada):
+        """Verifica vida máxima y, si estuvo inactiva, hace ping"""
+        ahora = time.monotonic()
+
+        if self.vida_maxima and ahora - entrada.creada > self.vida_maxima:
+            with self._cond:
+                self._stats['recicladas'] += 1
+            return False
+
+        if ahora - entrada.ultimo_uso > self.ping_inactividad:
+            try:
+                entrada.conn.ping(reconnect=False)
+            except Error:
+                with self._cond:
+                    self._stats['pings_fallidos'] += 1
+                return False
+
+        return True
+
+    def _devolver(self, entrada, descartar=False):
+        """Recibe una conexión devuelta; cierra las de desborde o en mal estado"""
+        if not descartar:
+            try:
+                # No dejar transacciones abiertas (evita snapshots viejos en REPEATABLE READ)
+                if entrada.conn.in_transaction:
+                    entrada.conn.rollback()
+            except Error:
+                descartar = True
+
+        entrada.ultimo_uso = time.monotonic()
+
+        with self._cond:
+            self._en_uso -= 1
+            if not descartar and self._abiertas <= self.tamano:
+                self._libres.append(entrada)
+                self._cond.notify()
+                return
+            self._abiertas -= 1
+            if descartar:
+                self._stats['descartadas'] += 1
+            self._cond.notify()
+
+        self._cerrar_entrada(entrada)
+
+    @staticmethod
+    def _cerrar_entrada(entrada):
+        try:
+            entrada.conn.close()
+        except Error:
+            pass
+
+    # ---------- administración ----------
+
+    def estadisticas(self):
+        """Retorna un snapshot de las estadísticas del pool"""
+        with self._cond:
+            stats = dict(self._stats)
+            stats.update({
+                'tamano': self.tamano,
+                'desborde': self.desborde,
+                'abiertas': self._abiertas,
+                'en_uso': self._en_uso,
+                'libres': len(self._libres),
+            })
+        return stats
+
+    def cerrar(self):
+        """Cierra todas las conexiones libres"""
+        with self._cond:
+            libres, self._libres = self._libres, []
+            self._abiertas -= len(libres)
+        for entrada in libres:
+            self._cerrar_entrada(entrada)
@@ -0,0 +1,50 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Reintento de transacciones ante deadlock o espera de bloqueo agotada
+
+Las escrituras que compiten por el mismo turno o la misma reserva se apoyan
+en las claves únicas y en sentencias condicionales; cuando InnoDB elige una
+víctima (1213) o se agota la espera (1205) el intento se repite.
+
+Solo se reintenta si la transacción no tenía escrituras de módulos
+anteriores: un deadlock revierte la transacción entera, así que dentro de
+una unidad de trabajo con escrituras diferidas el error se informa como
+siempre (y la unidad se revierte).
+"""
+
+import os
+import random
+import time
+from db.unidad_trabajo import unidad_actual
+
+ERRORES_BLOQUEO = (1213, 1205)
+REINTENTOS_BLOQUEO = int(os.getenv('DB_REINTENTOS_BLOQUEO', '3'))
+ESPERA_REINTENTO = float(os.getenv('DB_ESPERA_REINTENTO', '0.01'))
+
+
+def es_bloqueo(error):
+    """Indica si el error es un deadlock o una espera de bloqueo agotada"""
+    return getattr(error, 'errno', None) in ERRORES_BLOQUEO
+
+
+def reintentar(conn, error, intento):
+    """
+    Decide si repetir la transacción tras `error` en el intento `intento`
+    (desde 0). Si corresponde, la revierte y espera un tiempo aleatorio
+    creciente antes de retornar True.
+    """
+    if not es_bloqueo(error) or intento + 1 >= REINTENTOS_BLOQUEO:
+        return False
+
+    unidad = unidad_actual()
+    if unidad is not None and unidad.activa:
+        if unidad.escrituras or unidad.fallida:
+            return False
+        # conn.rollback() de la conexión compartida marcaría la unidad como fallida
+        unidad.reiniciar()
+    else:
+        conn.rollback()
+
+    time.sleep(ESPERA_REINTENTO * (2 ** intento) * random.uniform(0.5, 1.5))
+    return True
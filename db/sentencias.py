@@ -0,0 +1,86 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Registro de sentencias preparadas
+Consultas OLTP que se ejecutan constantemente cambiando solo los parámetros:
+se preparan una vez por conexión del pool (parse/plan una sola vez) y luego
+solo se envían los parámetros por el protocolo binario.
+"""
+
+from db.connection import ejecutar_query
+
+SENTENCIAS = {}
+
+
+def registrar(nombre, sql):
+    """Registra una sentencia preparada con placeholders posicionales %s"""
+    SENTENCIAS[nombre] = sql
+
+
+def ejecutar_sentencia(nombre, params=None, fetchall=False, fetchone=False, commit=False):
+    """Ejecuta una sentencia registrada por su nombre"""
+    return ejecutar_query(SENTENCIAS[nombre], params, fetchall=fetchall,
+                          fetchone=fetchone, commit=commit, preparada=True)
+
+
+# ============= SENTENCIAS DEL SISTEMA =============
+
+registrar('login_por_correo', """
+    SELECT * FROM login WHERE correo = %s
+""")
+
+# Inicio de sesión: credenciales, participante y perfil de capacidades en una sola lectura
+registrar('login_perfil', """
+    SELECT l.correo, l.contrasena, p.ci, p.nombre, p.apellido, p.version_perfil,
+           COALESCE(MAX(ppa.rol = 'docente'), 0) AS es_docente,
+           COALESCE(MAX(ppa.rol = 'docente' OR pa.tipo = 'posgrado'), 0) AS privilegiado
+    FROM login l
+    LEFT JOIN participante p ON p.email = l.correo
+    LEFT JOIN participante_programa_academico ppa ON ppa.ci_participante = p.ci
+    LEFT JOIN programa_academico pa ON pa.nombre_programa = ppa.nombre_programa
+    WHERE l.correo = %s
+    GROUP BY l.correo, l.contrasena, p.ci, p.nombre, p.apellido, p.version_perfil
+""")
+
+registrar('perfil_participante', """
+    SELECT p.version_perfil,
+           COALESCE(MAX(ppa.rol = 'docente'), 0) AS es_docente,
+           COALESCE(MAX(ppa.rol = 'docente' OR pa.tipo = 'posgrado'), 0) AS privilegiado
+    FROM participante p
+    LEFT JOIN participante_programa_academico ppa ON ppa.ci_participante = p.ci
+    LEFT JOIN programa_academico pa ON pa.nombre_programa = ppa.nombre_programa
+    WHERE p.ci = %s
+    GROUP BY p.ci, p.version_perfil
+""")
+
+# La fecha es un parámetro: misma respuesta que sanciones_activas.sancion_activa(ci, fecha)
+registrar('sancion_activa', """
+    SELECT * FROM sancion_participante
+    WHERE ci_participante = %s
+    AND %s BETWEEN fecha_inicio AND fecha_fin
+""")
+
+# Libro de cuotas (modules/cuotas.py): lecturas por clave primaria
+registrar('reservas_activas_dia', """
+    SELECT COALESCE(MAX(horas_activas), 0) as total
+    FROM cuota_participante_dia
+    WHERE ci_participante = %s AND fecha = %s
+""")
+
+registrar('reservas_activas_semana', """
+    SELECT COALESCE(MAX(reservas_activas), 0) as total
+    FROM cuota_participante_semana
+    WHERE ci_participante = %s AND semana = YEARWEEK(%s, 3)
+""")
+
+registrar('reservas_participante', """
+    SELECT r.id_reserva, r.nombre_sala, r.edificio, r.fecha, r.estado,
+           CONCAT(t.hora_inicio, ' - ', t.hora_fin) as horario,
+           rp.asistencia
+    FROM reserva r
+    JOIN turno t ON r.id_turno = t.id_turno
+    JOIN reserva_participante rp ON r.id_reserva = rp.id_reserva
+    WHERE rp.ci_participante = %s
+    ORDER BY r.fecha DESC, t.hora_inicio DESC
+    LIMIT %s
+""")
@@ -0,0 +1,159 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Unidad de trabajo: una conexión y una transacción por request (o por bloque CLI)
+
+Mientras hay una unidad activa, conectar() devuelve siempre la misma conexión:
+los commit() de los módulos se difieren hasta confirmar() y close() no la libera.
+"""
+
+from contextlib import contextmanager
+from contextvars import ContextVar
+from mysql.connector import Error
+
+_unidad_actual = ContextVar('unidad_trabajo', default=None)
+
+
+class ConexionCompartida:
+    """Vista de la conexión de la unidad que entregan conectar()/ejecutar_query()"""
+
+    def __init__(self, unidad, conn):
+        self._unidad = unidad
+        self._conn = conn
+
+    def __getattr__(self, nombre):
+        return getattr(self._conn, nombre)
+
+    def commit(self):
+        """Diferido: se confirma al cerrar la unidad"""
+        self._unidad.escrituras += 1
+
+    def rollback(self):
+        """Revierte la transacción y marca la unidad como fallida"""
+        self._unidad.fallida = True
+        self._conn.rollback()
+
+    def close(self):
+        """La conexión se libera al cerrar la unidad"""
+
+
+class UnidadTrabajo:
+    """Conexión y transacción compartidas, obtenidas de forma perezosa"""
+
+    def __init__(self):
+        self._conn = None
+        self._al_confirmar = []
+        self.escrituras = 0
+        self.fallida = False
+        self.confirmada = False
+
+    @property
+    def activa(self):
+        """Indica si la unidad ya tomó una conexión del pool"""
+        return self._conn is not None
+
+    def conexion(self):
+        """Retorna la conexión compartida (la toma del pool en el primer uso)"""
+        if self._conn is None:
+            from db.connection import obtener_pool
+            self._conn = obtener_pool().obtener()
+        return ConexionCompartida(self, self._conn)
+
+    def al_confirmar(self, funcion):
+        """Registra una función a ejecutar después del commit (se descarta si hay rollback)"""
+        self._al_confirmar.append(funcion)
+
+    def revertir(self):
+        """Revierte lo hecho hasta ahora; la unidad no confirmará nada al cerrar"""
+        self.fallida = True
+        if self._conn is not None:
+            self._conn.rollback()
+        self._al_confirmar.clear()
+
+    def reiniciar(self):
+        """
+        Revierte la transacción en curso sin marcar la unidad como fallida.
+        Solo para reintentos sin escrituras previas (db/reintentos.py).
+        """
+        if self._conn is not None:
+            self._conn.rollback()
+        self._al_confirmar.clear()
+
+    def confirmar(self):
+        """Confirma la transacción; si algún módulo hizo rollback, revierte todo"""
+        if self.confirmada:
+            return
+        self.confirmada = True
+        if self._conn is None:
+            return
+        if self.fallida:
+            self._conn.rollback()
+            self._al_confirmar.clear()
+            return
+        self._conn.commit()
+        pendientes, self._al_confirmar = self._al_confirmar, []
+        for funcion in pendientes:
+            funcion()
+
+    def cerrar(self, error=None):
+        """Libera la conexión; revierte si no se confirmó o hubo una excepción"""
+        if self._conn is None:
+            return
+        conn, self._conn = self._conn, None
+        try:
+            if error is not None or not self.confirmada:
+                conn.rollback()
+                self._al_confirmar.clear()
+        except Error:
+            conn.descartar()
+            return
+        conn.close()
+
+
+def unidad_actual():
+    """Retorna la unidad de trabajo activa en este contexto, o None"""
+    return _unidad_actual.get()
+
+def iniciar():
+    """Inicia una unidad de trabajo en el contexto actual y retorna (unidad, token)"""
+    unidad = UnidadTrabajo()
+    return unidad, _unidad_actual.set(unidad)
+
+def finalizar(unidad, token, error=None):
+    """Cierra la unidad y la desvincula del contexto"""
+    try:
+        unidad.cerrar(error)
+    finally:
+        _unidad_actual.reset(token)
+
+def al_confirmar(funcion):
+    """Ejecuta `funcion` tras el commit de la unidad activa, o de inmediato si no hay unidad"""
+    unidad = unidad_actual()
+    if unidad is None:
+        funcion()
+    else:
+        unidad.al_confirmar(funcion)
+
+@contextmanager
+def unidad_de_trabajo():
+    """
+    Uso desde CLI o scripts:
+
+        with unidad_de_trabajo():
+            reservas.crear_reserva(...)
+            reservas.agregar_participante_reserva(...)
+    """
+    existente = unidad_actual()
+    if existente is not None:
+        yield existente
+        return
+
+    unidad, token = iniciar()
+    try:
+        yield unidad
+        unidad.confirmar()
+    except BaseException as e:
+        finalizar(unidad, token, e)
+        raise
+    else:
+        finalizar(unidad, token)
@@ -0,0 +1,102 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Contadores de versión en la base (tabla version_cache)
+Permiten invalidar estructuras en memoria entre procesos/workers:
+cada escritura incrementa el contador dentro de su transacción y los
+lectores comparan la versión conocida con la de la base.
+"""
+
+import threading
+import time
+from db.connection import ejecutar_query, consultar_aparte
+
+
+def incrementar_version(cursor, nombre):
+    """Incrementa el contador `nombre` en la transacción del cursor y retorna la nueva versión"""
+    cursor.execute("""
+        INSERT INTO version_cache (nombre, version) VALUES (%s, LAST_INSERT_ID(1))
+        ON DUPLICATE KEY UPDATE version = LAST_INSERT_ID(version + 1)
+    """, (nombre,))
+    return cursor.lastrowid
+
+
+def marcar_cambio(nombre):
+    """Incrementa el contador `nombre` con ejecutar_query (para escrituras hechas con ejecutar_query)"""
+    return ejecutar_query("""
+        INSERT INTO version_cache (nombre, version) VALUES (%s, LAST_INSERT_ID(1))
+        ON DUPLICATE KEY UPDATE version = LAST_INSERT_ID(version + 1)
+    """, (nombre,), commit=True)
+
+
+def leer_versiones(nombres, aparte=False):
+    """
+    Retorna {nombre: version} para los contadores pedidos (0 si no existen).
+    Con aparte=True se leen en una conexión propia del pool (consultar_aparte),
+    sin las escrituras sin confirmar ni el snapshot del request.
+    """
+    nombres = list(nombres)
+    if not nombres:
+        return {}
+    marcas = ', '.join(['%s'] * len(nombres))
+    query = f"SELECT nombre, version FROM version_cache WHERE nombre IN ({marcas})"
+    if aparte:
+        filas = consultar_aparte(query, tuple(nombres))
+    else:
+        filas = ejecutar_query(query, tuple(nombres), fetchall=True)
+    if filas is None:
+        return None
+    versiones = dict.fromkeys(nombres, 0)
+    versiones.update({f['nombre']: f['version'] for f in filas})
+    return versiones
+
+
+class VigilanteVersion:
+    """
+    Sigue un contador de version_cache consultándolo como máximo una vez cada `intervalo` segundos.
+    """
+
+    def __init__(self, nombre, intervalo=1.0):
+        self.nombre = nombre
+        self.intervalo = intervalo
+        self._conocida = None
+        self._ultimo_chequeo = 0.0
+        self._lock = threading.Lock()
+
+    def cambio_externo(self):
+        """True si la versión en la base difiere de la conocida (o si nunca se leyó)"""
+        ahora = time.monotonic()
+        with self._lock:
+            if self._conocida is not None and ahora - self._ultimo_chequeo < self.intervalo:
+                return False
+            self._ultimo_chequeo = ahora
+
+        # Misma vía que las cargas de los índices: una versión sin confirmar
+        # (que después se revierte) nunca queda como conocida
+        versiones = leer_versiones([self.nombre], aparte=True)
+        if versiones is None:
+            return False
+        version = versiones[self.nombre]
+
+        with self._lock:
+            if version == self._conocida:
+                return False
+            self._conocida = version
+            return True
+
+    def registrar_propia(self, version):
+        """
+        Registra una versión producida por este proceso.
+        Retorna True si es la siguiente a la conocida (no hubo cambios de otros
+        procesos en el medio) y el estado en memoria puede actualizarse incrementalmente.
+        """
+        with self._lock:
+            if self._conocida is not None and version == self._conocida + 1:
+                self._conocida = version
+                return True
+            return False
+
+    def forzar(self):
+        """Obliga a consultar la base en el próximo chequeo"""
+        with self._lock:
+            self._ultimo_chequeo = 0.0
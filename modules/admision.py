@@ -0,0 +1,365 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Motor de admisión de reservas
+Evalúa todas las reglas de negocio en una sola consulta y solo inserta
+la reserva si es admisible (sin insertar y borrar después).
+"""
+
+from collections import namedtuple
+from datetime import timedelta
+from db.connection import conectar
+from db.unidad_trabajo import al_confirmar
+from db.versiones import incrementar_version
+from db.reintentos import reintentar
+from mysql.connector import Error
+from modules import disponibilidad, cuotas, sanciones_activas
+from modules.perfil import TIPOS_SALA_BASICOS, TIPOS_SALA_PRIVILEGIADOS
+
+LIMITE_RESERVAS_DIA = 2
+LIMITE_RESERVAS_SEMANA = 3
+
+# admitida: bool | regla: regla que rechazó (None si fue admitida)
+# mensaje: texto para el usuario | id_reserva: id creado (None si no se creó)
+# detalle: valores leídos de la base para evaluar las reglas
+Veredicto = namedtuple('Veredicto', ['admitida', 'regla', 'mensaje', 'id_reserva', 'detalle'])
+
+# Reservas en serie: reservas = [(fecha, id_reserva)] creadas,
+# conflictos = [(fecha, regla, mensaje)] de las fechas que no se admitieron
+VeredictoSerie = namedtuple('VeredictoSerie', ['admitida', 'regla', 'mensaje', 'reservas', 'conflictos'])
+
+MAX_OCURRENCIAS_SERIE = 60
+
+# Reglas que no dependen de la fecha: si fallan, fallan para toda la serie
+REGLAS_GLOBALES = ('sancion', 'tipo_sala', 'capacidad')
+
+# Una sola lectura con todo lo necesario para decidir
+# (la sanción se consulta antes en el índice de modules/sanciones_activas)
+SQL_EVALUAR = """
+    SELECT s.tipo_sala, s.capacidad,
+           p.version_perfil,
+           -- Con el perfil de la sesión vigente no se consultan programas (CASE no evalúa el EXISTS)
+           CASE WHEN p.version_perfil = %(version_perfil)s
+                THEN NULL
+                ELSE EXISTS(SELECT 1
+                            FROM participante_programa_academico ppa
+                            JOIN programa_academico pa ON ppa.nombre_programa = pa.nombre_programa
+                            WHERE ppa.ci_participante = %(ci)s
+                            AND (ppa.rol = 'docente' OR pa.tipo = 'posgrado'))
+           END AS privilegiado,
+           -- Libro de cuotas (modules/cuotas.py): lecturas por clave primaria
+           COALESCE((SELECT cd.horas_activas
+                     FROM cuota_participante_dia cd
+                     WHERE cd.ci_participante = %(ci)s AND cd.fecha = %(fecha)s), 0) AS reservas_dia,
+           COALESCE((SELECT cs.reservas_activas
+                     FROM cuota_participante_semana cs
+                     WHERE cs.ci_participante = %(ci)s
+                     AND cs.semana = YEARWEEK(%(fecha)s, 3)), 0) AS reservas_semana,
+           EXISTS(SELECT 1
+                  FROM reserva r
+                  WHERE r.nombre_sala = s.nombre_sala AND r.edificio = s.edificio
+                  AND r.fecha = %(fecha)s AND r.id_turno = %(id_turno)s) AS turno_ocupado
+    FROM sala s
+    LEFT JOIN participante p ON p.ci = %(ci)s
+    WHERE s.nombre_sala = %(nombre_sala)s AND s.edificio = %(edificio)s
+"""
+
+
+def _rechazo(regla, mensaje, detalle=None):
+    return Veredicto(False, regla, mensaje, None, detalle or {})
+
+
+def evaluar_reglas(d, num_participantes=1, perfil=None):
+    """
+    Aplica las reglas sobre los datos leídos, en el orden histórico:
+    sanción, compatibilidad de sala, horas por día, reservas por semana,
+    turno ocupado y capacidad. Retorna None si todas se cumplen.
+    Si d['privilegiado'] es None se usa el perfil de la sesión (vigente).
+    """
+    if d['sancion_hasta']:
+        return _rechazo('sancion', f"Tienes una sanción activa hasta {d['sancion_hasta']}", d)
+
+    if d['privilegiado'] is None and perfil is not None:
+        privilegiado = perfil['privilegiado']
+        tipos_sala = perfil['tipos_sala']
+    else:
+        privilegiado = bool(d['privilegiado'])
+        tipos_sala = TIPOS_SALA_PRIVILEGIADOS if privilegiado else TIPOS_SALA_BASICOS
+    if d['tipo_sala'] not in tipos_sala:
+        return _rechazo('tipo_sala', 'No puedes reservar este tipo de sala.', d)
+
+    if not privilegiado:
+        if d['reservas_dia'] >= LIMITE_RESERVAS_DIA:
+            return _rechazo('limite_dia',
+                            f'Ya tienes {LIMITE_RESERVAS_DIA} horas reservadas para este día (límite alcanzado)', d)
+        if d['reservas_semana'] >= LIMITE_RESERVAS_SEMANA:
+            return _rechazo('limite_semana',
+                            f'Ya tienes {LIMITE_RESERVAS_SEMANA} reservas activas esta semana (límite alcanzado)', d)
+
+    if d['turno_ocupado']:
+        return _rechazo('turno_ocupado', 'Este turno ya está reservado', d)
+
+    if num_participantes > d['capacidad']:
+        return _rechazo('capacidad', f"La capacidad de la sala ({d['capacidad']}) sería excedida.", d)
+
+    return None
+
+
+def admitir_reserva(nombre_sala, edificio, fecha, id_turno, ci_creador, perfil=None):
+    """
+    Evalúa y, si corresponde, crea la reserva con el creador como participante.
+    Evaluación en una sola lectura, dos INSERT y un commit.
+    `perfil` es el perfil de capacidades de la sesión: si su versión sigue
+    vigente no se consultan los programas del participante. Si estaba
+    desactualizado, detalle['perfil_desactualizado'] queda en True.
+    """
+    # Un sancionado se rechaza sin abrir conexión
+    sancion = sanciones_activas.sancion_activa(ci_creador)
+    if sancion:
+        return evaluar_reglas({'sancion_hasta': sancion['fecha_fin']})
+
+    conn = conectar()
+    if not conn:
+        return _rechazo('conexion', 'Error de conexión')
+
+    params = {
+        'ci': ci_creador,
+        'nombre_sala': nombre_sala,
+        'edificio': edificio,
+        'fecha': fecha,
+        'id_turno': id_turno,
+        # -1 nunca coincide: sin perfil se calcula el privilegio en la consulta
+        'version_perfil': perfil['version'] if perfil else -1,
+    }
+
+    cursor = None
+    try:
+        cursor = conn.cursor(dictionary=True)
+        intento = 0
+        while True:
+            try:
+                cursor.execute(SQL_EVALUAR, params)
+                datos = cursor.fetchone()
+
+                if not datos:
+                    return _rechazo('sala', 'Sala no encontrada')
+                datos['sancion_hasta'] = None
+                datos['perfil_desactualizado'] = perfil is not None and datos['privilegiado'] is not None
+
+                rechazo = evaluar_reglas(datos, perfil=perfil)
+                if rechazo:
+                    return rechazo
+
+                cursor.execute("""
+                    INSERT INTO reserva (nombre_sala, edificio, fecha, id_turno, estado)
+                    VALUES (%s, %s, %s, %s, 'activa')
+                """, (nombre_sala, edificio, fecha, id_turno))
+                id_reserva = cursor.lastrowid
+
+                cursor.execute("""
+                    INSERT INTO reserva_participante (ci_participante, id_reserva)
+                    VALUES (%s, %s)
+                """, (ci_creador, id_reserva))
+                cuotas.aplicar(cursor, id_reserva)
+
+                version = incrementar_version(cursor, 'reserva')
+                conn.commit()
+                break
+            except Error as e:
+                # Deadlock o espera agotada: se vuelve a evaluar desde cero
+                if not reintentar(conn, e, intento):
+                    raise
+                intento += 1
+
+        al_confirmar(lambda: disponibilidad.ocupar(nombre_sala, edificio, fecha, id_turno, version))
+        return Veredicto(True, None, 'Reserva creada exitosamente', id_reserva, datos)
+
+    except Error as e:
+        conn.rollback()
+        # Otra reserva ganó el turno entre la evaluación y el INSERT (uk_reserva)
+        if 'Duplicate entry' in str(e):
+            return _rechazo('turno_ocupado', 'Este turno ya está reservado')
+        return _rechazo('error', f"Error al crear reserva: {str(e)}")
+    finally:
+        if cursor:
+            cursor.close()
+        conn.close()
+
+
+# ============= RESERVAS EN SERIE =============
+
+SQL_SALA_PERFIL = """
+    SELECT s.tipo_sala, s.capacidad, p.version_perfil,
+           CASE WHEN p.version_perfil = %(version_perfil)s
+                THEN NULL
+                ELSE EXISTS(SELECT 1
+                            FROM participante_programa_academico ppa
+                            JOIN programa_academico pa ON ppa.nombre_programa = pa.nombre_programa
+                            WHERE ppa.ci_participante = %(ci)s
+                            AND (ppa.rol = 'docente' OR pa.tipo = 'posgrado'))
+           END AS privilegiado
+    FROM sala s
+    LEFT JOIN participante p ON p.ci = %(ci)s
+    WHERE s.nombre_sala = %(nombre_sala)s AND s.edificio = %(edificio)s
+"""
+
+# Turnos ya tomados (uk_reserva) y libro de cuotas de todas las fechas en una lectura
+SQL_OCUPACION_SERIE = """
+    SELECT 'turno' AS tipo, r.fecha, NULL AS semana, 1 AS valor
+    FROM reserva r
+    WHERE r.nombre_sala = %s AND r.edificio = %s AND r.fecha IN ({marcas}) AND r.id_turno = %s
+    UNION ALL
+    SELECT 'dia', cd.fecha, NULL, cd.horas_activas
+    FROM cuota_participante_dia cd
+    WHERE cd.ci_participante = %s AND cd.fecha IN ({marcas})
+    UNION ALL
+    SELECT 'semana', NULL, cs.semana, cs.reservas_activas
+    FROM cuota_participante_semana cs
+    WHERE cs.ci_participante = %s AND cs.semana BETWEEN YEARWEEK(%s, 3) AND YEARWEEK(%s, 3)
+"""
+
+SQL_PARTICIPANTE_SERIE = """
+    INSERT INTO reserva_participante (ci_participante, id_reserva)
+    SELECT %s, r.id_reserva
+    FROM reserva r
+    WHERE r.nombre_sala = %s AND r.edificio = %s AND r.fecha IN ({marcas}) AND r.id_turno = %s
+"""
+
+SQL_IDS_SERIE = """
+    SELECT r.fecha, r.id_reserva
+    FROM reserva r
+    WHERE r.nombre_sala = %s AND r.edificio = %s AND r.fecha IN ({marcas}) AND r.id_turno = %s
+    ORDER BY r.fecha
+"""
+
+
+def semana_iso(fecha):
+    """Equivalente a YEARWEEK(fecha, 3) de MySQL"""
+    anio, semana, _ = fecha.isocalendar()
+    return anio * 100 + semana
+
+
+def fechas_serie(fecha_desde, fecha_hasta, dias_semana):
+    """Fechas entre desde y hasta (inclusive) cuyo weekday() está en dias_semana (0 = lunes)"""
+    dias_semana = set(dias_semana)
+    fechas = []
+    fecha = fecha_desde
+    while fecha <= fecha_hasta:
+        if fecha.weekday() in dias_semana:
+            fechas.append(fecha)
+        fecha += timedelta(days=1)
+    return fechas
+
+
+def _rechazo_serie(regla, mensaje, conflictos=None):
+    return VeredictoSerie(False, regla, mensaje, [], conflictos or [])
+
+
+def admitir_serie(nombre_sala, edificio, fecha_desde, fecha_hasta, dias_semana, id_turno,
+                  ci_creador, perfil=None, parcial=False):
+    """
+    Crea una reserva por cada fecha de la serie (misma sala y turno) con el
+    creador como participante, en una sola transacción.
+    Dos lecturas (sala/perfil y ocupación + cuotas de todas las fechas) y las
+    escrituras en lote: executemany para las reservas, INSERT ... SELECT para
+    los participantes y dos sentencias para el libro de cuotas.
+    Cada fecha se evalúa con evaluar_reglas, acumulando las horas del día y
+    las reservas de la semana que la propia serie va sumando.
+    Si alguna fecha tiene conflicto no se crea nada, salvo con parcial=True,
+    que crea las admisibles. Los conflictos se informan por fecha.
+    """
+    fechas = fechas_serie(fecha_desde, fecha_hasta, dias_semana)
+    if not fechas:
+        return _rechazo_serie('fechas', 'La serie no tiene fechas en el período elegido')
+    if len(fechas) > MAX_OCURRENCIAS_SERIE:
+        return _rechazo_serie('fechas', f'Una serie puede tener como máximo {MAX_OCURRENCIAS_SERIE} fechas')
+
+    sancion = sanciones_activas.sancion_activa(ci_creador)
+    if sancion:
+        rechazo = evaluar_reglas({'sancion_hasta': sancion['fecha_fin']})
+        return _rechazo_serie(rechazo.regla, rechazo.mensaje)
+
+    conn = conectar()
+    if not conn:
+        return _rechazo_serie('conexion', 'Error de conexión')
+
+    marcas = ', '.join(['%s'] * len(fechas))
+    cursor = None
+    try:
+        cursor = conn.cursor(dictionary=True)
+        cursor.execute(SQL_SALA_PERFIL, {
+            'ci': ci_creador,
+            'nombre_sala': nombre_sala,
+            'edificio': edificio,
+            'version_perfil': perfil['version'] if perfil else -1,
+        })
+        sala = cursor.fetchone()
+        if not sala:
+            return _rechazo_serie('sala', 'Sala no encontrada')
+
+        cursor.execute(SQL_OCUPACION_SERIE.format(marcas=marcas),
+                       (nombre_sala, edificio, *fechas, id_turno,
+                        ci_creador, *fechas,
+                        ci_creador, fechas[0], fechas[-1]))
+        ocupadas, horas_dia, reservas_semana = set(), {}, {}
+        for fila in cursor.fetchall():
+            if fila['tipo'] == 'turno':
+                ocupadas.add(fila['fecha'])
+            elif fila['tipo'] == 'dia':
+                horas_dia[fila['fecha']] = fila['valor']
+            else:
+                reservas_semana[fila['semana']] = fila['valor']
+
+        admitidas, conflictos = [], []
+        for fecha in fechas:
+            semana = semana_iso(fecha)
+            d = dict(sala, sancion_hasta=None,
+                     reservas_dia=horas_dia.get(fecha, 0),
+                     reservas_semana=reservas_semana.get(semana, 0),
+                     turno_ocupado=fecha in ocupadas)
+            rechazo = evaluar_reglas(d, perfil=perfil)
+            if rechazo and rechazo.regla in REGLAS_GLOBALES:
+                return _rechazo_serie(rechazo.regla, rechazo.mensaje)
+            if rechazo:
+                conflictos.append((fecha, rechazo.regla, rechazo.mensaje))
+                continue
+            admitidas.append(fecha)
+            horas_dia[fecha] = d['reservas_dia'] + 1
+            reservas_semana[semana] = d['reservas_semana'] + 1
+
+        if conflictos and not parcial:
+            return _rechazo_serie('conflictos', f'{len(conflictos)} de {len(fechas)} fechas tienen conflictos',
+                                  conflictos)
+        if not admitidas:
+            return _rechazo_serie('conflictos', 'Ninguna fecha de la serie está disponible', conflictos)
+
+        cursor.executemany("""
+            INSERT INTO reserva (nombre_sala, edificio, fecha, id_turno, estado)
+            VALUES (%s, %s, %s, %s, 'activa')
+        """, [(nombre_sala, edificio, fecha, id_turno) for fecha in admitidas])
+
+        marcas = ', '.join(['%s'] * len(admitidas))
+        cursor.execute(SQL_PARTICIPANTE_SERIE.format(marcas=marcas),
+                       (ci_creador, nombre_sala, edificio, *admitidas, id_turno))
+        cursor.execute(SQL_IDS_SERIE.format(marcas=marcas), (nombre_sala, edificio, *admitidas, id_turno))
+        reservas = [(f['fecha'], f['id_reserva']) for f in cursor.fetchall()]
+        cuotas.aplicar_varias(cursor, [id_reserva for _, id_reserva in reservas])
+
+        version = incrementar_version(cursor, 'reserva')
+        conn.commit()
+        al_confirmar(lambda: disponibilidad.ocupar_varias(nombre_sala, edificio, admitidas, id_turno, version))
+        mensaje = f'{len(reservas)} reservas creadas'
+        if conflictos:
+            mensaje += f' ({len(conflictos)} fechas con conflictos)'
+        return VeredictoSerie(True, None, mensaje, reservas, conflictos)
+
+    except Error as e:
+        conn.rollback()
+        # Otra reserva tomó alguna de las fechas entre la lectura y el INSERT (uk_reserva)
+        if 'Duplicate entry' in str(e):
+            return _rechazo_serie('turno_ocupado', 'Alguna de las fechas acaba de ser reservada, intente nuevamente')
+        return _rechazo_serie('error', f"Error al crear la serie: {str(e)}")
+    finally:
+        if cursor:
+            cursor.close()
+        conn.close()
@@ -0,0 +1,134 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Archivado de reservas de períodos cerrados
+
+Mueve las reservas ya cerradas (estado distinto de 'activa') con fecha
+anterior a `hasta` de reserva / reserva_participante a reserva_historico /
+reserva_participante_historico. La parte caliente queda con el período en
+curso y los reportes que la recorren entera leen menos filas; los que
+necesitan el histórico lo piden con historico=True (vistas *_todas).
+
+Se procesa de a lotes de ARCHIVO_LOTE reservas, cada uno en su propia
+transacción: copia al archivo y borra de la parte caliente en el mismo
+commit, así que un corte a mitad de camino no pierde ni duplica filas y se
+puede volver a correr.
+
+Las reservas activas nunca se archivan (no afecta el libro de cuotas ni el
+índice de disponibilidad): conviene correr antes el cierre nocturno.
+"""
+
+import os
+from datetime import date
+from mysql.connector import Error
+from db.connection import obtener_pool
+from db.versiones import incrementar_version
+
+LOTE = int(os.getenv('ARCHIVO_LOTE', '1000'))
+
+SQL_LOTE = """
+    SELECT id_reserva FROM reserva
+    WHERE fecha < %s AND estado <> 'activa'
+    ORDER BY fecha, id_reserva
+    LIMIT %s
+    FOR UPDATE
+"""
+
+SQL_PENDIENTES = """
+    SELECT COUNT(*), MIN(fecha), MAX(fecha) FROM reserva
+    WHERE fecha < %s AND estado <> 'activa'
+"""
+
+
+def pendientes(hasta):
+    """Reservas que movería archivar_reservas(hasta): (cantidad, fecha mínima, fecha máxima) o None si hubo error"""
+    try:
+        conn = obtener_pool().obtener()
+    except Error as e:
+        print(f"❌ Error al conectar a MySQL: {e}")
+        return None
+
+    try:
+        cursor = conn.cursor()
+        cursor.execute(SQL_PENDIENTES, (hasta,))
+        conteo = cursor.fetchone()
+        cursor.close()
+        return conteo
+    except Error as e:
+        print(f"❌ Error al contar reservas a archivar: {e}")
+        return None
+    finally:
+        conn.close()
+
+
+def _archivar_lote(cursor, hasta, lote):
+    """
+    Mueve un lote en la transacción del cursor.
+    Retorna (reservas, participantes) movidos o None si no quedaban reservas.
+    """
+    cursor.execute(SQL_LOTE, (hasta, lote))
+    ids = [id_reserva for (id_reserva,) in cursor.fetchall()]
+    if not ids:
+        return None
+
+    marcas = ', '.join(['%s'] * len(ids))
+    cursor.execute(f"""
+        INSERT INTO reserva_historico (id_reserva, nombre_sala, edificio, fecha, id_turno, estado)
+        SELECT id_reserva, nombre_sala, edificio, fecha, id_turno, estado
+        FROM reserva WHERE id_reserva IN ({marcas})
+    """, ids)
+    cursor.execute(f"""
+        INSERT INTO reserva_participante_historico (ci_participante, id_reserva, fecha_solicitud_reserva, asistencia)
+        SELECT ci_participante, id_reserva, fecha_solicitud_reserva, asistencia
+        FROM reserva_participante WHERE id_reserva IN ({marcas})
+    """, ids)
+    participantes = cursor.rowcount
+
+    cursor.execute(f"DELETE FROM reserva_participante WHERE id_reserva IN ({marcas})", ids)
+    cursor.execute(f"DELETE FROM reserva WHERE id_reserva IN ({marcas})", ids)
+
+    # Cambian tanto la parte caliente como las vistas *_todas: invalida los reportes en caché
+    incrementar_version(cursor, 'reserva')
+    incrementar_version(cursor, 'reserva_detalle')
+    return len(ids), participantes
+
+
+def archivar_reservas(hasta, lote=LOTE):
+    """
+    Archiva las reservas cerradas con fecha anterior a `hasta` (fin del
+    período académico cerrado; no puede ser posterior a hoy).
+    Retorna (exito, mensaje, resultado) con resultado =
+    {'reservas', 'participantes', 'lotes'}. Si un lote falla, los anteriores
+    quedan confirmados y se puede volver a correr.
+    """
+    resultado = {'reservas': 0, 'participantes': 0, 'lotes': 0}
+    if hasta > date.today():
+        return False, "Solo se pueden archivar períodos ya terminados", resultado
+
+    try:
+        conn = obtener_pool().obtener()
+    except Error as e:
+        return False, f"Error de conexión: {str(e)}", resultado
+
+    cursor = None
+    try:
+        cursor = conn.cursor()
+        while True:
+            movido = _archivar_lote(cursor, hasta, lote)
+            conn.commit()
+            if movido is None:
+                break
+            reservas, participantes = movido
+            resultado['reservas'] += reservas
+            resultado['participantes'] += participantes
+            resultado['lotes'] += 1
+    except Error as e:
+        conn.rollback()
+        return False, f"Error al archivar (lote {resultado['lotes'] + 1}): {str(e)}", resultado
+    finally:
+        if cursor:
+            cursor.close()
+        conn.close()
+
+    return True, (f"Archivo hasta {hasta}: {resultado['reservas']} reservas y "
+                  f"{resultado['participantes']} participaciones movidas al histórico"), resultado
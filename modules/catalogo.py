@@ -0,0 +1,38 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Caché de tablas de catálogo (turno, sala, edificio, programa_academico)
+Estos datos cambian muy rara vez; se leen de MySQL una vez por TTL.
+"""
+
+import os
+from db.cache import CacheTTL
+from db.connection import ejecutar_query
+from db.unidad_trabajo import al_confirmar
+
+CATALOGO_TTL = int(os.getenv('CATALOGO_TTL', '300'))
+
+_cache = CacheTTL('catalogo', CATALOGO_TTL)
+
+
+def obtener(tabla, cargador):
+    """Lectura a través de la caché: `cargador()` solo se ejecuta si la entrada no está vigente"""
+    return _cache.obtener(tabla, cargador)
+
+
+def invalidar(*tablas):
+    """Invalida las tablas indicadas después del commit de la transacción en curso"""
+    al_confirmar(lambda: _cache.invalidar(*tablas))
+
+
+def obtener_programas():
+    """Obtiene todos los programas académicos"""
+    return obtener('programa_academico', lambda: ejecutar_query(
+        "SELECT * FROM programa_academico ORDER BY nombre_programa",
+        fetchall=True
+    ))
+
+
+def estadisticas():
+    """Aciertos/fallos de la caché de catálogo"""
+    return _cache.estadisticas()
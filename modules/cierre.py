@@ -0,0 +1,177 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Cierre nocturno de reservas
+
+Las reservas activas de días anteriores pasan a 'sin asistencia' solo si
+la inasistencia quedó registrada: tienen participantes y todos están
+marcados ausentes (reserva_participante.asistencia = FALSE). Si alguien
+asistió, o la asistencia no se tomó (NULL, el valor por defecto) para al
+menos un participante, pasan a 'finalizada' sin sanciones: una asistencia
+no registrada no es una inasistencia.
+
+Los participantes de las reservas sin asistencia reciben una sanción de
+DIAS_SANCION_INASISTENCIA días desde la fecha del cierre, salvo que ya
+tengan una sanción vigente o futura.
+
+Se procesa de a lotes de CIERRE_LOTE reservas, cada uno en su propia
+transacción (los bloqueos duran lo que dura un lote). Por lote:
+  - una lectura con FOR UPDATE de las reservas y si todos quedaron ausentes
+  - el libro de cuotas se descuenta con dos sentencias (dejan de estar activas)
+  - un UPDATE por estado nuevo
+  - un INSERT ... SELECT con las sanciones de todo el lote
+
+Es idempotente: solo toma reservas que siguen 'activa', así que volver a
+correrlo (o correrlo después de un corte a mitad de camino) no cambia nada
+de lo ya cerrado ni duplica sanciones.
+"""
+
+import os
+from datetime import date, timedelta
+from mysql.connector import Error
+from db.connection import obtener_pool
+from db.versiones import incrementar_version
+from modules import cuotas, sanciones_activas
+from modules.sanciones import DIAS_SANCION_INASISTENCIA
+
+LOTE = int(os.getenv('CIERRE_LOTE', '500'))
+
+# Ausente = con participantes y ninguno con asistencia TRUE o sin registrar (NULL)
+SQL_LOTE = """
+    SELECT r.id_reserva,
+           EXISTS(SELECT 1 FROM reserva_participante rp
+                  WHERE rp.id_reserva = r.id_reserva)
+           AND NOT EXISTS(SELECT 1 FROM reserva_participante rp
+                          WHERE rp.id_reserva = r.id_reserva
+                          AND (rp.asistencia IS NULL OR rp.asistencia = TRUE)) AS ausente
+    FROM reserva r
+    WHERE r.estado = 'activa' AND r.fecha < %s AND r.id_reserva > %s
+    ORDER BY r.id_reserva
+    LIMIT %s
+    FOR UPDATE
+"""
+
+SQL_PENDIENTES = """
+    SELECT EXISTS(SELECT 1 FROM reserva_participante rp
+                  WHERE rp.id_reserva = r.id_reserva)
+           AND NOT EXISTS(SELECT 1 FROM reserva_participante rp
+                          WHERE rp.id_reserva = r.id_reserva
+                          AND (rp.asistencia IS NULL OR rp.asistencia = TRUE)) AS ausente,
+           COUNT(*) AS total
+    FROM reserva r
+    WHERE r.estado = 'activa' AND r.fecha < %s
+    GROUP BY ausente
+"""
+
+SQL_SANCIONAR = """
+    INSERT INTO sancion_participante (ci_participante, fecha_inicio, fecha_fin)
+    SELECT DISTINCT rp.ci_participante, %s, %s
+    FROM reserva_participante rp
+    WHERE rp.id_reserva IN ({marcas}) AND rp.asistencia = FALSE
+    AND NOT EXISTS (SELECT 1 FROM sancion_participante s
+                    WHERE s.ci_participante = rp.ci_participante AND s.fecha_fin >= %s)
+"""
+
+
+def pendientes(hasta=None):
+    """Reservas que cerraría el próximo cierre: {'finalizada': n, 'sin asistencia': n} (None si hubo error)"""
+    hasta = hasta or date.today()
+    try:
+        conn = obtener_pool().obtener()
+    except Error as e:
+        print(f"❌ Error al conectar a MySQL: {e}")
+        return None
+
+    try:
+        cursor = conn.cursor()
+        cursor.execute(SQL_PENDIENTES, (hasta,))
+        conteo = {'finalizada': 0, 'sin asistencia': 0}
+        for ausente, total in cursor.fetchall():
+            conteo['sin asistencia' if ausente else 'finalizada'] += total
+        cursor.close()
+        return conteo
+    except Error as e:
+        print(f"❌ Error al contar reservas pendientes de cierre: {e}")
+        return None
+    finally:
+        conn.close()
+
+
+def _cerrar_lote(cursor, hasta, desde_id, lote):
+    """
+    Cierra un lote en la transacción del cursor.
+    Retorna (último id_reserva procesado, finalizadas, sin asistencia, sanciones)
+    o None si no quedaban reservas.
+    """
+    cursor.execute(SQL_LOTE, (hasta, desde_id, lote))
+    filas = cursor.fetchall()
+    if not filas:
+        return None
+
+    ids = [id_reserva for id_reserva, _ in filas]
+    finalizadas = [id_reserva for id_reserva, ausente in filas if not ausente]
+    sin_asistencia = [id_reserva for id_reserva, ausente in filas if ausente]
+
+    # Antes del UPDATE: el libro solo cuenta reservas activas
+    cuotas.quitar_varias(cursor, ids)
+    for estado, grupo in (('finalizada', finalizadas), ('sin asistencia', sin_asistencia)):
+        if grupo:
+            marcas = ', '.join(['%s'] * len(grupo))
+            cursor.execute(f"UPDATE reserva SET estado = %s WHERE id_reserva IN ({marcas})", (estado, *grupo))
+
+    sancionados = 0
+    if sin_asistencia:
+        fin = hasta + timedelta(days=DIAS_SANCION_INASISTENCIA)
+        cursor.execute(SQL_SANCIONAR.format(marcas=', '.join(['%s'] * len(sin_asistencia))),
+                       (hasta, fin, *sin_asistencia, hasta))
+        sancionados = cursor.rowcount
+        if sancionados:
+            incrementar_version(cursor, 'sancion')
+
+    incrementar_version(cursor, 'reserva_detalle')
+    return ids[-1], len(finalizadas), len(sin_asistencia), sancionados
+
+
+def cerrar_reservas(hasta=None, lote=LOTE):
+    """
+    Cierra las reservas activas con fecha anterior a `hasta` (hoy por defecto).
+    Retorna (exito, mensaje, resultado) con resultado =
+    {'finalizadas', 'sin_asistencia', 'sanciones', 'lotes'}. Si un lote
+    falla, los anteriores quedan confirmados y se puede volver a correr.
+    """
+    hasta = hasta or date.today()
+    resultado = {'finalizadas': 0, 'sin_asistencia': 0, 'sanciones': 0, 'lotes': 0}
+
+    try:
+        conn = obtener_pool().obtener()
+    except Error as e:
+        return False, f"Error de conexión: {str(e)}", resultado
+
+    cursor = None
+    ultimo_id = 0
+    try:
+        cursor = conn.cursor()
+        while True:
+            cerrado = _cerrar_lote(cursor, hasta, ultimo_id, lote)
+            conn.commit()
+            if cerrado is None:
+                break
+            ultimo_id, finalizadas, sin_asistencia, sancionados = cerrado
+            resultado['finalizadas'] += finalizadas
+            resultado['sin_asistencia'] += sin_asistencia
+            resultado['sanciones'] += sancionados
+            resultado['lotes'] += 1
+    except Error as e:
+        conn.rollback()
+        return False, f"Error en el cierre (lote {resultado['lotes'] + 1}): {str(e)}", resultado
+    finally:
+        if cursor:
+            cursor.close()
+        conn.close()
+        if resultado['sanciones']:
+            # Este proceso no pasó por sanciones.crear_sancion: recargar el índice
+            sanciones_activas.invalidar()
+
+    return True, (f"Cierre hasta {hasta}: {resultado['finalizadas']} finalizadas, "
+                  f"{resultado['sin_asistencia']} sin asistencia, "
+                  f"{resultado['sanciones']} sanciones nuevas"), resultado
@@ -0,0 +1,237 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Libro de cuotas por participante
+Contadores de reservas activas por (ci, fecha) y por (ci, semana ISO) que
+las escrituras de reservas mantienen dentro de su propia transacción. Los
+controles de límites pasan a ser lecturas por clave primaria en lugar de
+contar el historial del participante.
+
+Para mantenerlo, cada escritura llama a quitar() antes de modificar una
+reserva o sus participantes y a aplicar() después. Ambas cuentan solo si la
+reserva está activa, así que el mismo par sirve para cualquier cambio
+(estado, fecha, participantes).
+"""
+
+from db.connection import conectar
+from mysql.connector import Error
+
+# Cada turno dura una hora: horas activas del día = reservas activas del día.
+# Con varias reservas de la misma clave, cada fila del SELECT suma por separado.
+# Solo para sumar (el %s es siempre 1): restar usa SQL_DESCONTAR_*.
+SQL_AJUSTAR_DIA = """
+    INSERT INTO cuota_participante_dia (ci_participante, fecha, horas_activas)
+    SELECT rp.ci_participante, r.fecha, %s
+    FROM reserva r
+    JOIN reserva_participante rp ON rp.id_reserva = r.id_reserva
+    WHERE r.id_reserva IN ({marcas}) AND r.estado = 'activa' {filtro}
+    ON DUPLICATE KEY UPDATE horas_activas = horas_activas + %s
+"""
+
+SQL_AJUSTAR_SEMANA = """
+    INSERT INTO cuota_participante_semana (ci_participante, semana, reservas_activas)
+    SELECT rp.ci_participante, YEARWEEK(r.fecha, 3), %s
+    FROM reserva r
+    JOIN reserva_participante rp ON rp.id_reserva = r.id_reserva
+    WHERE r.id_reserva IN ({marcas}) AND r.estado = 'activa' {filtro}
+    ON DUPLICATE KEY UPDATE reservas_activas = reservas_activas + %s
+"""
+
+# Al restar solo se tocan filas existentes: una fila faltante es un libro
+# desincronizado y no debe convertirse en un contador negativo. Si el libro
+# quedó por debajo de lo que se resta, el CHECK (>= 0) de la tabla hace fallar
+# la escritura (reparar con scripts/cuotas.py --reconstruir).
+SQL_DESCONTAR_DIA = """
+    UPDATE cuota_participante_dia c
+    JOIN (SELECT rp.ci_participante, r.fecha, COUNT(*) AS total
+          FROM reserva r
+          JOIN reserva_participante rp ON rp.id_reserva = r.id_reserva
+          WHERE r.id_reserva IN ({marcas}) AND r.estado = 'activa' {filtro}
+          GROUP BY rp.ci_participante, r.fecha) q
+      ON c.ci_participante = q.ci_participante AND c.fecha = q.fecha
+    SET c.horas_activas = c.horas_activas - q.total
+"""
+
+SQL_DESCONTAR_SEMANA = """
+    UPDATE cuota_participante_semana c
+    JOIN (SELECT rp.ci_participante, YEARWEEK(r.fecha, 3) AS semana, COUNT(*) AS total
+          FROM reserva r
+          JOIN reserva_participante rp ON rp.id_reserva = r.id_reserva
+          WHERE r.id_reserva IN ({marcas}) AND r.estado = 'activa' {filtro}
+          GROUP BY rp.ci_participante, YEARWEEK(r.fecha, 3)) q
+      ON c.ci_participante = q.ci_participante AND c.semana = q.semana
+    SET c.reservas_activas = c.reservas_activas - q.total
+"""
+
+# Valores esperados a partir de las tablas de reservas
+SQL_ESPERADO_DIA = """
+    SELECT rp.ci_participante, r.fecha, COUNT(*) AS total
+    FROM reserva_participante rp
+    JOIN reserva r ON r.id_reserva = rp.id_reserva
+    WHERE r.estado = 'activa' {filtro}
+    GROUP BY rp.ci_participante, r.fecha
+"""
+
+SQL_ESPERADO_SEMANA = """
+    SELECT rp.ci_participante, YEARWEEK(r.fecha, 3) AS semana, COUNT(*) AS total
+    FROM reserva_participante rp
+    JOIN reserva r ON r.id_reserva = rp.id_reserva
+    WHERE r.estado = 'activa' {filtro}
+    GROUP BY rp.ci_participante, YEARWEEK(r.fecha, 3)
+"""
+
+# FULL OUTER JOIN emulado: faltantes o distintos desde las reservas, sobrantes desde el libro
+SQL_DIFERENCIAS_DIA = """
+    SELECT e.ci_participante, e.fecha, COALESCE(c.horas_activas, 0), e.total
+    FROM (SELECT rp.ci_participante, r.fecha, COUNT(*) AS total
+          FROM reserva_participante rp
+          JOIN reserva r ON r.id_reserva = rp.id_reserva
+          WHERE r.estado = 'activa' {filtro}
+          GROUP BY rp.ci_participante, r.fecha) e
+    LEFT JOIN cuota_participante_dia c ON c.ci_participante = e.ci_participante AND c.fecha = e.fecha
+    WHERE c.horas_activas IS NULL OR c.horas_activas <> e.total
+    UNION ALL
+    SELECT c.ci_participante, c.fecha, c.horas_activas, 0
+    FROM cuota_participante_dia c
+    WHERE c.horas_activas <> 0 {filtro_libro}
+    AND NOT EXISTS (SELECT 1
+                    FROM reserva_participante rp
+                    JOIN reserva r ON r.id_reserva = rp.id_reserva
+                    WHERE rp.ci_participante = c.ci_participante
+                    AND r.fecha = c.fecha AND r.estado = 'activa' {filtro})
+"""
+
+SQL_DIFERENCIAS_SEMANA = """
+    SELECT e.ci_participante, e.semana, COALESCE(c.reservas_activas, 0), e.total
+    FROM (SELECT rp.ci_participante, YEARWEEK(r.fecha, 3) AS semana, COUNT(*) AS total
+          FROM reserva_participante rp
+          JOIN reserva r ON r.id_reserva = rp.id_reserva
+          WHERE r.estado = 'activa' {filtro}
+          GROUP BY rp.ci_participante, YEARWEEK(r.fecha, 3)) e
+    LEFT JOIN cuota_participante_semana c ON c.ci_participante = e.ci_participante AND c.semana = e.semana
+    WHERE c.reservas_activas IS NULL OR c.reservas_activas <> e.total
+    UNION ALL
+    SELECT c.ci_participante, c.semana, c.reservas_activas, 0
+    FROM cuota_participante_semana c
+    WHERE c.reservas_activas <> 0 {filtro_libro}
+    AND NOT EXISTS (SELECT 1
+                    FROM reserva_participante rp
+                    JOIN reserva r ON r.id_reserva = rp.id_reserva
+                    WHERE rp.ci_participante = c.ci_participante
+                    AND YEARWEEK(r.fecha, 3) = c.semana AND r.estado = 'activa' {filtro})
+"""
+
+
+def _sumar(cursor, ids_reserva, ci_participante=None):
+    marcas = ', '.join(['%s'] * len(ids_reserva))
+    filtro = "AND rp.ci_participante = %s" if ci_participante else ""
+    extra = (ci_participante,) if ci_participante else ()
+    for sql in (SQL_AJUSTAR_DIA, SQL_AJUSTAR_SEMANA):
+        cursor.execute(sql.format(marcas=marcas, filtro=filtro),
+                       (1,) + tuple(ids_reserva) + extra + (1,))
+
+
+def _restar(cursor, ids_reserva, ci_participante=None):
+    marcas = ', '.join(['%s'] * len(ids_reserva))
+    filtro = "AND rp.ci_participante = %s" if ci_participante else ""
+    extra = (ci_participante,) if ci_participante else ()
+    for sql in (SQL_DESCONTAR_DIA, SQL_DESCONTAR_SEMANA):
+        cursor.execute(sql.format(marcas=marcas, filtro=filtro), tuple(ids_reserva) + extra)
+
+
+def aplicar(cursor, id_reserva, ci_participante=None):
+    """Suma la reserva (o solo ese participante) al libro si está activa"""
+    _sumar(cursor, [id_reserva], ci_participante)
+
+
+def aplicar_varias(cursor, ids_reserva):
+    """Suma varias reservas al libro con dos sentencias en total"""
+    if ids_reserva:
+        _sumar(cursor, ids_reserva)
+
+
+def quitar(cursor, id_reserva, ci_participante=None):
+    """Resta la reserva (o solo ese participante) del libro si está activa"""
+    _restar(cursor, [id_reserva], ci_participante)
+
+
+def quitar_varias(cursor, ids_reserva):
+    """Resta varias reservas del libro con dos sentencias en total"""
+    if ids_reserva:
+        _restar(cursor, ids_reserva)
+
+
+def reconstruir(cursor, ci_participante=None):
+    """Recalcula el libro (completo o de un participante) desde las reservas, en la transacción del cursor"""
+    filtro = "WHERE ci_participante = %s" if ci_participante else ""
+    filtro_rp = "AND rp.ci_participante = %s" if ci_participante else ""
+    params = (ci_participante,) if ci_participante else ()
+
+    cursor.execute(f"DELETE FROM cuota_participante_dia {filtro}", params)
+    cursor.execute(f"DELETE FROM cuota_participante_semana {filtro}", params)
+    cursor.execute(f"""
+        INSERT INTO cuota_participante_dia (ci_participante, fecha, horas_activas)
+        {SQL_ESPERADO_DIA.format(filtro=filtro_rp)}
+    """, params)
+    dias = cursor.rowcount
+    cursor.execute(f"""
+        INSERT INTO cuota_participante_semana (ci_participante, semana, reservas_activas)
+        {SQL_ESPERADO_SEMANA.format(filtro=filtro_rp)}
+    """, params)
+    return dias, cursor.rowcount
+
+
+def verificar(cursor, ci_participante=None):
+    """
+    Compara el libro con las reservas.
+    Retorna [(tabla, ci, fecha_o_semana, en_libro, esperado)] con las diferencias.
+    """
+    filtros = {
+        'filtro': "AND rp.ci_participante = %s" if ci_participante else "",
+        'filtro_libro': "AND c.ci_participante = %s" if ci_participante else "",
+    }
+    params = (ci_participante,) * 3 if ci_participante else ()
+    diferencias = []
+
+    for tabla, sql in (('cuota_participante_dia', SQL_DIFERENCIAS_DIA),
+                       ('cuota_participante_semana', SQL_DIFERENCIAS_SEMANA)):
+        cursor.execute(sql.format(**filtros), params)
+        diferencias.extend((tabla,) + tuple(fila) for fila in cursor.fetchall())
+
+    return diferencias
+
+
+def reconstruir_libro(ci_participante=None):
+    """Reconstruye el libro en una transacción propia"""
+    conn = conectar()
+    if not conn:
+        return False, "Error de conexión"
+
+    try:
+        cursor = conn.cursor()
+        dias, semanas = reconstruir(cursor, ci_participante)
+        conn.commit()
+        return True, f"Libro de cuotas reconstruido: {dias} días y {semanas} semanas"
+    except Error as e:
+        conn.rollback()
+        return False, f"Error al reconstruir el libro de cuotas: {str(e)}"
+    finally:
+        cursor.close()
+        conn.close()
+
+
+def verificar_libro(ci_participante=None):
+    """Retorna la lista de diferencias (None si hubo error)"""
+    conn = conectar()
+    if not conn:
+        return None
+
+    try:
+        cursor = conn.cursor()
+        return verificar(cursor, ci_participante)
+    except Error as e:
+        print(f"❌ Error al verificar el libro de cuotas: {e}")
+        return None
+    finally:
+        cursor.close()
+        conn.close()
@@ -0,0 +1,223 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Índice de disponibilidad en memoria (sala × fecha × turno)
+
+Por cada sala y fecha se guarda una máscara de bits con los turnos ocupados
+(bit = id_turno). Un turno está ocupado si existe una fila en reserva para
+esa sala/fecha/turno, en cualquier estado, igual que lo exige uk_reserva.
+
+Las escrituras de modules/reservas actualizan el índice de forma incremental
+después del commit; los cambios hechos por otros procesos se detectan con
+los contadores 'reserva' y 'sala' de version_cache.
+
+Solo se guardan en memoria los días de la ventana [hoy, hoy + HORIZONTE_DIAS]
+(la siembra los carga todos): fuera de ella la consulta va a la base y no se
+guarda, así la memoria no crece con las fechas que pidan los usuarios.
+
+Las cargas usan una conexión propia del pool (no la de la unidad de trabajo
+del request, que puede tener escrituras sin confirmar) y se hacen fuera de
+_lock: el resultado se intercambia al final. Si mientras se cargaba se
+aplicó un cambio incremental, la carga se descarta y se repite.
+"""
+
+import os
+import threading
+from collections import defaultdict
+from datetime import date, timedelta
+from db.connection import consultar_aparte
+from db.versiones import VigilanteVersion
+
+INTERVALO_VERSION = float(os.getenv('DISPONIBILIDAD_INTERVALO_VERSION', '1.0'))
+HORIZONTE_DIAS = int(os.getenv('DISPONIBILIDAD_HORIZONTE_DIAS', '180'))
+INTENTOS_CARGA = 3
+
+_lock = threading.RLock()
+_dias = {}        # fecha -> {(nombre_sala, edificio): mascara}, solo fechas de la ventana
+_salas = None     # [(nombre_sala, edificio)]
+_turnos = None    # [id_turno] ordenados por hora de inicio
+_hasta_sembrado = None  # inicio de la ventana sembrada (None: sin sembrar)
+_generacion = 0   # cambia con cada actualización incremental o invalidación
+_version_reserva = VigilanteVersion('reserva', INTERVALO_VERSION)
+_version_sala = VigilanteVersion('sala', INTERVALO_VERSION)
+
+
+# ============= CARGA =============
+
+def _cargar_catalogo():
+    global _salas, _turnos
+    salas = consultar_aparte("SELECT nombre_sala, edificio FROM sala ORDER BY edificio, nombre_sala")
+    turnos = consultar_aparte("SELECT id_turno FROM turno ORDER BY hora_inicio")
+    if salas is None or turnos is None:
+        return
+    with _lock:
+        _salas = [(s['nombre_sala'], s['edificio']) for s in salas]
+        _turnos = [t['id_turno'] for t in turnos]
+
+
+def _en_ventana(fecha):
+    """Indica si la fecha está en la ventana sembrada (llamar con _lock)"""
+    return _hasta_sembrado is not None and \
+        _hasta_sembrado <= fecha <= _hasta_sembrado + timedelta(days=HORIZONTE_DIAS)
+
+
+def _mascaras(filas):
+    dia = defaultdict(int)
+    for f in filas:
+        dia[(f['nombre_sala'], f['edificio'])] |= 1 << f['id_turno']
+    return dia
+
+
+def _sembrar():
+    """Carga en una sola query las reservas de la ventana y las intercambia bajo _lock"""
+    global _dias, _hasta_sembrado
+    hoy = date.today()
+    for _ in range(INTENTOS_CARGA):
+        with _lock:
+            generacion = _generacion
+        filas = consultar_aparte("""
+            SELECT nombre_sala, edificio, fecha, id_turno
+            FROM reserva
+            WHERE fecha BETWEEN %s AND %s
+        """, (hoy, hoy + timedelta(days=HORIZONTE_DIAS)))
+        if filas is None:
+            break
+
+        dias = defaultdict(list)
+        for f in filas:
+            dias[f['fecha']].append(f)
+        nuevos = {fecha: _mascaras(filas_dia) for fecha, filas_dia in dias.items()}
+
+        with _lock:
+            if _generacion == generacion:
+                _dias, _hasta_sembrado = nuevos, hoy
+                return
+    # Sin siembra vigente se consulta la base; se reintenta en el próximo uso
+    with _lock:
+        _dias, _hasta_sembrado = {}, None
+
+
+def _dia(fecha):
+    """Copia de las máscaras del día: de memoria dentro de la ventana, de la base fuera de ella"""
+    with _lock:
+        if _en_ventana(fecha):
+            return dict(_dias.get(fecha, {}))
+    filas = consultar_aparte(
+        "SELECT nombre_sala, edificio, id_turno FROM reserva WHERE fecha = %s", (fecha,)
+    ) or []
+    return _mascaras(filas)
+
+
+def _sincronizar():
+    """Recarga lo que otros procesos hayan cambiado; al cambiar el día se vuelve a sembrar"""
+    if _version_sala.cambio_externo() or _salas is None:
+        _cargar_catalogo()
+    if _version_reserva.cambio_externo() or _hasta_sembrado != date.today():
+        _sembrar()
+
+
+def _catalogo():
+    with _lock:
+        return _salas or [], _turnos or []
+
+
+# ============= CONSULTAS =============
+
+def turnos_libres(nombre_sala, edificio, fecha):
+    """Retorna los id_turno libres de una sala en una fecha"""
+    _sincronizar()
+    mascara = _dia(fecha).get((nombre_sala, edificio), 0)
+    _, turnos = _catalogo()
+    return [t for t in turnos if not mascara & (1 << t)]
+
+
+def salas_libres(fecha, id_turno):
+    """Retorna las salas (nombre_sala, edificio) libres en una fecha y turno"""
+    bit = 1 << id_turno
+    _sincronizar()
+    dia = _dia(fecha)
+    salas, _ = _catalogo()
+    return [s for s in salas if not dia.get(s, 0) & bit]
+
+
+def cantidad_turnos_libres(fecha):
+    """Retorna {(nombre_sala, edificio): cantidad de turnos libres} para una fecha"""
+    _sincronizar()
+    dia = _dia(fecha)
+    salas, turnos = _catalogo()
+    todos = 0
+    for t in turnos:
+        todos |= 1 << t
+    return {s: bin(todos & ~dia.get(s, 0)).count('1') for s in salas}
+
+
+# ============= ACTUALIZACIÓN INCREMENTAL =============
+
+def _aplicar(vigilante, version, cambio):
+    global _generacion
+    with _lock:
+        _generacion += 1
+        if vigilante.registrar_propia(version):
+            cambio()
+        else:
+            # Hubo cambios de otros procesos en el medio: recargar en el próximo uso
+            invalidar()
+
+
+def _marcar(nombre_sala, edificio, fecha, id_turno, ocupado):
+    """Actualiza la máscara si la fecha está en la ventana (llamar con _lock)"""
+    if isinstance(fecha, str):
+        fecha = date.fromisoformat(fecha)
+    if not _en_ventana(fecha):
+        return
+    dia = _dias.setdefault(fecha, defaultdict(int))
+    if ocupado:
+        dia[(nombre_sala, edificio)] |= 1 << id_turno
+    else:
+        dia[(nombre_sala, edificio)] &= ~(1 << id_turno)
+
+
+def ocupar(nombre_sala, edificio, fecha, id_turno, version):
+    """Registra una reserva nueva (llamar después del commit)"""
+    _aplicar(_version_reserva, version,
+             lambda: _marcar(nombre_sala, edificio, fecha, id_turno, True))
+
+
+def ocupar_varias(nombre_sala, edificio, fechas, id_turno, version):
+    """Registra las reservas de una serie (misma sala y turno) creadas con una sola versión"""
+    def cambio():
+        for fecha in fechas:
+            _marcar(nombre_sala, edificio, fecha, id_turno, True)
+    _aplicar(_version_reserva, version, cambio)
+
+
+def liberar(nombre_sala, edificio, fecha, id_turno, version):
+    """Registra la eliminación de una reserva (llamar después del commit)"""
+    _aplicar(_version_reserva, version,
+             lambda: _marcar(nombre_sala, edificio, fecha, id_turno, False))
+
+
+def mover(anterior, nuevo, version):
+    """Registra el cambio de sala/fecha/turno de una reserva: tuplas (sala, edificio, fecha, turno)"""
+    def cambio():
+        _marcar(*anterior, False)
+        _marcar(*nuevo, True)
+    _aplicar(_version_reserva, version, cambio)
+
+
+def salas_modificadas(version):
+    """Registra un alta/baja/modificación de sala (llamar después del commit)"""
+    global _salas
+    with _lock:
+        _version_sala.registrar_propia(version)
+        _salas = None
+
+
+def invalidar():
+    """Descarta todo el índice; se vuelve a sembrar en el próximo uso"""
+    global _dias, _hasta_sembrado, _generacion
+    with _lock:
+        _generacion += 1
+        _dias = {}
+        _hasta_sembrado = None
+        _version_reserva.forzar()
@@ -0,0 +1,204 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Exportación de datos en streaming (CSV / NDJSON, opcionalmente gzip)
+
+Las filas se leen del servidor de a lotes con un cursor sin buffer y se
+escriben a medida que llegan: la memoria usada no depende de la cantidad
+de filas exportadas.
+
+La exportación usa una conexión propia del pool (no la de la unidad de
+trabajo del request): la respuesta se sigue generando después de que el
+request terminó y su unidad de trabajo ya liberó la conexión.
+"""
+
+import csv
+import io
+import json
+import os
+import zlib
+from datetime import date, datetime, timedelta
+from decimal import Decimal
+from mysql.connector import Error
+from db.connection import obtener_pool
+
+TAMANO_LOTE = int(os.getenv('EXPORTACION_TAMANO_LOTE', '1000'))
+# Segundos que el servidor espera a un cliente lento antes de cortar el envío
+NET_WRITE_TIMEOUT = int(os.getenv('EXPORTACION_NET_WRITE_TIMEOUT', '600'))
+
+FORMATOS = {
+    'csv': 'text/csv; charset=utf-8',
+    'ndjson': 'application/x-ndjson; charset=utf-8',
+}
+
+# Listados completos; se ordenan por clave primaria para que el servidor
+# empiece a enviar filas sin ordenar todo el resultado antes.
+LISTADOS = {
+    'reservas': """
+        SELECT r.id_reserva, r.nombre_sala, r.edificio, r.fecha,
+               t.hora_inicio, t.hora_fin, r.id_turno, r.estado,
+               (SELECT COUNT(*) FROM reserva_participante rp
+                WHERE rp.id_reserva = r.id_reserva) as num_participantes
+        FROM reserva r
+        JOIN turno t ON r.id_turno = t.id_turno
+        ORDER BY r.id_reserva
+    """,
+    'participantes': """
+        SELECT p.ci, p.nombre, p.apellido, p.email,
+               (SELECT GROUP_CONCAT(CONCAT(ppa.rol, ' en ', ppa.nombre_programa) SEPARATOR ', ')
+                FROM participante_programa_academico ppa
+                WHERE ppa.ci_participante = p.ci) as programas
+        FROM participante p
+        ORDER BY p.ci
+    """,
+    'sanciones': """
+        SELECT s.id_sancion, s.ci_participante, p.nombre, p.apellido, p.email,
+               s.fecha_inicio, s.fecha_fin,
+               CASE
+                   WHEN CURDATE() BETWEEN s.fecha_inicio AND s.fecha_fin THEN 'ACTIVA'
+                   WHEN CURDATE() > s.fecha_fin THEN 'FINALIZADA'
+                   ELSE 'FUTURA'
+               END as estado,
+               DATEDIFF(s.fecha_fin, s.fecha_inicio) as duracion_dias
+        FROM sancion_participante s
+        JOIN participante p ON s.ci_participante = p.ci
+        ORDER BY s.id_sancion
+    """,
+}
+
+
+def _valor(v):
+    """Convierte un valor de MySQL a uno serializable"""
+    if isinstance(v, (date, datetime)):
+        return v.isoformat()
+    if isinstance(v, (timedelta, Decimal)):
+        return str(v)
+    if isinstance(v, (bytes, bytearray)):
+        return v.decode('utf-8', errors='replace')
+    return v
+
+
+def _csv(columnas, lotes):
+    buffer = io.StringIO()
+    escritor = csv.writer(buffer)
+    escritor.writerow(columnas)
+    for filas in lotes:
+        for fila in filas:
+            escritor.writerow([_valor(v) for v in fila])
+        yield buffer.getvalue().encode('utf-8')
+        buffer.seek(0)
+        buffer.truncate()
+    if buffer.tell():
+        yield buffer.getvalue().encode('utf-8')
+
+
+def _ndjson(columnas, lotes):
+    for filas in lotes:
+        yield ''.join(
+            json.dumps({c: _valor(v) for c, v in zip(columnas, fila)}, ensure_ascii=False) + '\n'
+            for fila in filas
+        ).encode('utf-8')
+
+
+def _gzip(partes):
+    compresor = zlib.compressobj(6, zlib.DEFLATED, 31)  # wbits=31: formato gzip
+    for parte in partes:
+        comprimido = compresor.compress(parte)
+        if comprimido:
+            yield comprimido
+    yield compresor.flush()
+
+
+class Exportacion:
+    """
+    Cuerpo de una respuesta en streaming: itera los bytes del resultado.
+    close() libera la conexión se haya leído todo, parte o nada (la ruta lo
+    registra con Response.call_on_close; un generador que nunca arrancó no
+    ejecuta su finally al ser recolectado).
+    """
+
+    def __init__(self, conn, cursor, formato, comprimir):
+        self._conn = conn
+        self._cursor = cursor
+        self._completa = False
+        columnas = list(cursor.column_names)
+        partes = _csv(columnas, self._lotes()) if formato == 'csv' else _ndjson(columnas, self._lotes())
+        self._partes = _gzip(partes) if comprimir else partes
+
+    def __iter__(self):
+        return self._partes
+
+    def _lotes(self):
+        try:
+            while True:
+                filas = self._cursor.fetchmany(TAMANO_LOTE)
+                if not filas:
+                    break
+                yield filas
+            self._completa = True
+        except Error as e:
+            # La respuesta ya empezó: solo queda cortarla
+            print(f"❌ Error en exportación: {e}")
+            raise
+        finally:
+            # También al cortar el cliente la descarga (GeneratorExit)
+            self.close()
+
+    def close(self):
+        """Devuelve la conexión al pool con net_write_timeout restaurado (o la descarta)"""
+        conn, self._conn = self._conn, None
+        if conn is None:
+            return
+        if not self._completa:
+            # Quedan filas sin leer en el cursor sin buffer: no se reutiliza
+            conn.descartar()
+            return
+        try:
+            self._cursor.close()
+            cursor = conn.cursor()
+            cursor.execute("SET SESSION net_write_timeout = @@GLOBAL.net_write_timeout")
+            cursor.close()
+        except Error:
+            conn.descartar()
+            return
+        conn.close()
+
+
+def exportar(query, params=None, formato='csv', comprimir=False):
+    """
+    Ejecuta la consulta y retorna una Exportacion (iterable de bytes con
+    close()). La consulta se ejecuta antes de retornar, así los errores se
+    informan antes de empezar la respuesta. Retorna None si hubo error.
+    """
+    if formato not in FORMATOS:
+        raise ValueError(f"Formato no soportado: {formato}")
+
+    try:
+        conn = obtener_pool().obtener()
+    except Error as e:
+        print(f"❌ Error al conectar a MySQL: {e}")
+        return None
+
+    try:
+        cursor = conn.cursor(buffered=False)
+        # Solo para esta conexión: Exportacion.close() lo restaura antes de devolverla al pool
+        cursor.execute("SET SESSION net_write_timeout = %s", (NET_WRITE_TIMEOUT,))
+        cursor.execute(query, params or ())
+    except Error as e:
+        print(f"❌ Error en exportación: {e}")
+        conn.descartar()
+        return None
+
+    return Exportacion(conn, cursor, formato, comprimir)
+
+
+def exportar_listado(nombre, formato='csv', comprimir=False):
+    """Exporta uno de los listados completos de LISTADOS"""
+    return exportar(LISTADOS[nombre], formato=formato, comprimir=comprimir)
+
+
+def tipo_contenido(formato, comprimir=False):
+    """Content-Type y extensión de archivo para la respuesta"""
+    if comprimir:
+        return 'application/gzip', f'{formato}.gz'
+    return FORMATOS[formato], formato
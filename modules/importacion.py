@@ -0,0 +1,222 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Importación masiva de participantes desde CSV
+
+Columnas (con encabezado): ci, nombre, apellido, email, password, programa, rol
+
+El archivo se lee de a lotes de IMPORTACION_LOTE filas: las filas en memoria
+son las del lote en curso. Lo único que crece con el tamaño del archivo son
+los conjuntos de CI y emails ya leídos (para informar duplicados dentro del
+archivo con su línea) y el reporte de errores, acotado a
+IMPORTACION_MAX_ERRORES. Por lote:
+  - validación de cada fila y de duplicados dentro del archivo
+  - una sola consulta para los CI y emails que ya existen en la base
+  - hash de las contraseñas en paralelo (seguridad.hashear_passwords)
+  - un INSERT de muchas filas por tabla (login, participante,
+    participante_programa_academico) y un commit
+
+Si el INSERT de un lote falla (por ejemplo, alguien registró el mismo email
+en el medio) el lote se revierte y se reintenta fila por fila, para que el
+error quede en la fila que lo causó.
+
+Cada lote se confirma por separado en una conexión propia del pool (no la
+de la unidad de trabajo del request): un error en un lote no revierte los
+anteriores.
+"""
+
+import csv
+import os
+import re
+from concurrent.futures import ThreadPoolExecutor
+from mysql.connector import Error
+from db.connection import obtener_pool
+from db.versiones import incrementar_version
+from modules import catalogo
+from modules.seguridad import hashear_passwords, BCRYPT_HILOS
+
+LOTE = int(os.getenv('IMPORTACION_LOTE', '500'))
+MAX_ERRORES_REPORTE = int(os.getenv('IMPORTACION_MAX_ERRORES', '1000'))
+
+COLUMNAS = ['ci', 'nombre', 'apellido', 'email', 'password', 'programa', 'rol']
+ROLES = ('alumno', 'docente')
+RE_EMAIL = re.compile(r'^[^@\s]+@[^@\s]+\.[^@\s]+$')
+
+SQL_EXISTENTES = """
+    SELECT 'ci' AS campo, ci AS valor FROM participante WHERE ci IN ({marcas})
+    UNION ALL
+    SELECT 'email', email FROM participante WHERE email IN ({marcas})
+    UNION ALL
+    SELECT 'email', correo FROM login WHERE correo IN ({marcas})
+"""
+
+
+class Reporte:
+    """Resultado de una importación: totales y errores por línea del archivo"""
+
+    def __init__(self):
+        self.filas = 0
+        self.creados = 0
+        self.errores = []       # [(linea, ci, mensaje)], hasta MAX_ERRORES_REPORTE
+        self.total_errores = 0
+
+    def error(self, linea, ci, mensaje):
+        self.total_errores += 1
+        if len(self.errores) < MAX_ERRORES_REPORTE:
+            self.errores.append((linea, ci, mensaje))
+
+    def como_dict(self):
+        return {
+            'filas': self.filas,
+            'creados': self.creados,
+            'total_errores': self.total_errores,
+            'errores': [{'linea': l, 'ci': ci, 'mensaje': m} for l, ci, m in self.errores],
+        }
+
+
+def _validar(fila, programas):
+    """Retorna el mensaje de error de la fila o None"""
+    faltantes = [c for c in COLUMNAS if not fila.get(c)]
+    if faltantes:
+        return f"Faltan datos: {', '.join(faltantes)}"
+    if not RE_EMAIL.match(fila['email']):
+        return "Email inválido"
+    if fila['rol'] not in ROLES:
+        return f"Rol inválido (debe ser {' o '.join(ROLES)})"
+    if fila['programa'] not in programas:
+        return "El programa académico no existe"
+    if len(fila['ci']) > 20 or len(fila['nombre']) > 50 or len(fila['apellido']) > 50 or len(fila['email']) > 100:
+        return "Algún campo supera el largo permitido"
+    return None
+
+
+def _existentes(cursor, filas):
+    """Una consulta para los CI y emails del lote que ya están registrados"""
+    cis = [f['ci'] for f in filas]
+    emails = [f['email'] for f in filas]
+    cursor.execute(SQL_EXISTENTES.format(marcas=', '.join(['%s'] * len(filas))), cis + emails + emails)
+    ci_usados, email_usados = set(), set()
+    for campo, valor in cursor.fetchall():
+        (ci_usados if campo == 'ci' else email_usados).add(valor)
+    return ci_usados, email_usados
+
+
+def _insertar(cursor, filas):
+    """INSERT de muchas filas en las tres tablas (filas con 'hash' ya calculado)"""
+    n = len(filas)
+    cursor.execute(
+        "INSERT INTO login (correo, contrasena) VALUES " + ', '.join(['(%s, %s)'] * n),
+        [v for f in filas for v in (f['email'], f['hash'])]
+    )
+    cursor.execute(
+        "INSERT INTO participante (ci, nombre, apellido, email) VALUES " + ', '.join(['(%s, %s, %s, %s)'] * n),
+        [v for f in filas for v in (f['ci'], f['nombre'], f['apellido'], f['email'])]
+    )
+    cursor.execute(
+        "INSERT INTO participante_programa_academico (ci_participante, nombre_programa, rol) VALUES "
+        + ', '.join(['(%s, %s, %s)'] * n),
+        [v for f in filas for v in (f['ci'], f['programa'], f['rol'])]
+    )
+
+
+def _procesar_lote(conn, lote, reporte, ejecutor):
+    """lote: [(linea, fila)] ya validadas contra el archivo"""
+    cursor = conn.cursor()
+    try:
+        ci_usados, email_usados = _existentes(cursor, [f for _, f in lote])
+        nuevos = []
+        for linea, fila in lote:
+            if fila['ci'] in ci_usados:
+                reporte.error(linea, fila['ci'], "El CI ya está registrado")
+            elif fila['email'] in email_usados:
+                reporte.error(linea, fila['ci'], "El email ya está registrado")
+            else:
+                nuevos.append((linea, fila))
+        if not nuevos:
+            return
+
+        hashes = hashear_passwords([f['password'] for _, f in nuevos], ejecutor)
+        for (_, fila), hash_pass in zip(nuevos, hashes):
+            fila['hash'] = hash_pass
+
+        try:
+            _insertar(cursor, [f for _, f in nuevos])
+            incrementar_version(cursor, 'participante')
+            conn.commit()
+            reporte.creados += len(nuevos)
+            return
+        except Error:
+            conn.rollback()
+
+        # Fila por fila, para ubicar el error
+        for linea, fila in nuevos:
+            try:
+                _insertar(cursor, [fila])
+                incrementar_version(cursor, 'participante')
+                conn.commit()
+                reporte.creados += 1
+            except Error as e:
+                conn.rollback()
+                if 'Duplicate entry' in str(e):
+                    reporte.error(linea, fila['ci'], "El email o CI ya están registrados")
+                else:
+                    reporte.error(linea, fila['ci'], f"Error al crear participante: {str(e)}")
+    finally:
+        cursor.close()
+
+
+def importar_participantes(archivo, lote=LOTE, hilos=None):
+    """
+    Importa participantes desde un archivo de texto CSV (abierto con newline='').
+    Retorna (exito, mensaje, Reporte).
+    """
+    reporte = Reporte()
+    lector = csv.DictReader(archivo)
+    if not lector.fieldnames or set(COLUMNAS) - {c.strip() for c in lector.fieldnames}:
+        return False, f"El CSV debe tener las columnas: {', '.join(COLUMNAS)}", reporte
+
+    programas = {p['nombre_programa'] for p in catalogo.obtener_programas() or []}
+
+    try:
+        conn = obtener_pool().obtener()
+    except Error as e:
+        return False, f"Error de conexión: {str(e)}", reporte
+
+    # Crecen con el archivo (un CI y un email por fila válida): ver el docstring del módulo
+    ci_archivo, email_archivo = set(), set()
+    pendientes = []
+    try:
+        with ThreadPoolExecutor(max_workers=hilos or BCRYPT_HILOS, thread_name_prefix='bcrypt-lote') as ejecutor:
+            for fila in lector:
+                # línea del archivo, contando el encabezado
+                linea = lector.line_num
+                reporte.filas += 1
+                fila = {(k or '').strip(): (v or '').strip() for k, v in fila.items() if k}
+                error = _validar(fila, programas)
+                if not error and fila['ci'] in ci_archivo:
+                    error = "CI repetido en el archivo"
+                if not error and fila['email'] in email_archivo:
+                    error = "Email repetido en el archivo"
+                if error:
+                    reporte.error(linea, fila.get('ci', ''), error)
+                    continue
+                ci_archivo.add(fila['ci'])
+                email_archivo.add(fila['email'])
+
+                pendientes.append((linea, fila))
+                if len(pendientes) >= lote:
+                    _procesar_lote(conn, pendientes, reporte, ejecutor)
+                    pendientes = []
+            if pendientes:
+                _procesar_lote(conn, pendientes, reporte, ejecutor)
+    except (Error, csv.Error, UnicodeDecodeError) as e:
+        if isinstance(e, Error):
+            conn.descartar()
+        return False, f"Importación interrumpida en la fila {reporte.filas}: {str(e)}", reporte
+    finally:
+        conn.close()
+
+    mensaje = f"{reporte.creados} participantes creados de {reporte.filas} filas"
+    if reporte.total_errores:
+        mensaje += f" ({reporte.total_errores} con errores)"
+    return True, mensaje, reporte
@@ -0,0 +1,235 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Métricas en memoria de proceso con exposición en formato de texto de Prometheus
+
+Contadores e histogramas con etiquetas; registrar una observación es un
+bisect y una suma bajo un lock. Los valores de pool y cachés se leen
+recién al exponer. Con varios workers cada proceso tiene sus propias
+métricas: se deben scrapear los workers, no el balanceador.
+"""
+
+import bisect
+import re
+import threading
+from db import instrumentacion
+from db.cache import estadisticas_caches
+from db.connection import estadisticas_pool
+
+# Buckets en segundos
+BUCKETS_HTTP = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+BUCKETS_DB = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 5)
+BUCKETS_BCRYPT = (0.01, 0.025, 0.05, 0.1, 0.2, 0.3, 0.5, 1, 2)
+
+_METRICAS = []
+_COLECTORES = []
+_instaladas = False
+
+
+def _etiquetas(nombres, valores):
+    if not nombres:
+        return ''
+    pares = []
+    for nombre, valor in zip(nombres, valores):
+        valor = str(valor).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+        pares.append(f'{nombre}="{valor}"')
+    return '{' + ','.join(pares) + '}'
+
+
+def _numero(valor):
+    if valor == float('inf'):
+        return '+Inf'
+    if isinstance(valor, float) and valor.is_integer():
+        return str(int(valor))
+    return repr(valor) if isinstance(valor, float) else str(valor)
+
+
+class Contador:
+    """Valor que solo crece"""
+
+    tipo = 'counter'
+
+    def __init__(self, nombre, ayuda, etiquetas=()):
+        self.nombre = nombre
+        self.ayuda = ayuda
+        self.etiquetas = tuple(etiquetas)
+        self._valores = {}
+        self._lock = threading.Lock()
+        _METRICAS.append(self)
+
+    def incrementar(self, *valores, cantidad=1):
+        with self._lock:
+            self._valores[valores] = self._valores.get(valores, 0) + cantidad
+
+    def exponer(self):
+        with self._lock:
+            valores = list(self._valores.items())
+        return [f"{self.nombre}{_etiquetas(self.etiquetas, clave)} {_numero(v)}" for clave, v in valores]
+
+
+class Histograma:
+    """Distribución de observaciones en buckets acumulativos"""
+
+    tipo = 'histogram'
+
+    def __init__(self, nombre, ayuda, etiquetas=(), buckets=BUCKETS_HTTP):
+        self.nombre = nombre
+        self.ayuda = ayuda
+        self.etiquetas = tuple(etiquetas)
+        self.buckets = tuple(sorted(buckets))
+        self._series = {}  # valores de etiquetas -> [conteos por bucket, suma, total]
+        self._lock = threading.Lock()
+        _METRICAS.append(self)
+
+    def observar(self, valor, *valores):
+        indice = bisect.bisect_left(self.buckets, valor)
+        with self._lock:
+            serie = self._series.get(valores)
+            if serie is None:
+                serie = self._series[valores] = [[0] * (len(self.buckets) + 1), 0.0, 0]
+            serie[0][indice] += 1
+            serie[1] += valor
+            serie[2] += 1
+
+    def exponer(self):
+        with self._lock:
+            series = [(clave, list(s[0]), s[1], s[2]) for clave, s in self._series.items()]
+        lineas = []
+        nombres = self.etiquetas + ('le',)
+        for clave, conteos, suma, total in series:
+            acumulado = 0
+            for limite, conteo in zip(self.buckets + (float('inf'),), conteos):
+                acumulado += conteo
+                lineas.append(f"{self.nombre}_bucket{_etiquetas(nombres, clave + (_numero(limite),))} {acumulado}")
+            lineas.append(f"{self.nombre}_sum{_etiquetas(self.etiquetas, clave)} {_numero(suma)}")
+            lineas.append(f"{self.nombre}_count{_etiquetas(self.etiquetas, clave)} {total}")
+        return lineas
+
+
+def registrar_colector(funcion):
+    """funcion() retorna [(nombre, tipo, ayuda, [(etiquetas dict, valor)])]; se llama al exponer"""
+    _COLECTORES.append(funcion)
+    return funcion
+
+
+def exponer():
+    """Texto en formato de exposición de Prometheus (versión 0.0.4)"""
+    lineas = []
+    for metrica in _METRICAS:
+        lineas.append(f"# HELP {metrica.nombre} {metrica.ayuda}")
+        lineas.append(f"# TYPE {metrica.nombre} {metrica.tipo}")
+        lineas.extend(metrica.exponer())
+    for colector in _COLECTORES:
+        try:
+            familias = colector()
+        except Exception as e:
+            print(f"⚠️ Error en colector de métricas: {e}")
+            continue
+        for nombre, tipo, ayuda, muestras in familias:
+            lineas.append(f"# HELP {nombre} {ayuda}")
+            lineas.append(f"# TYPE {nombre} {tipo}")
+            for etiquetas, valor in muestras:
+                lineas.append(f"{nombre}{_etiquetas(tuple(etiquetas), tuple(etiquetas.values()))} {_numero(valor)}")
+    return '\n'.join(lineas) + '\n'
+
+
+# ============= MÉTRICAS DEL SISTEMA =============
+
+http_solicitudes = Contador(
+    'http_solicitudes_total', 'Solicitudes HTTP atendidas', ('endpoint', 'metodo', 'estado'))
+http_latencia = Histograma(
+    'http_solicitud_segundos', 'Latencia de las solicitudes HTTP', ('endpoint', 'metodo'), BUCKETS_HTTP)
+http_excepciones = Contador(
+    'http_excepciones_total', 'Excepciones no controladas por endpoint', ('endpoint',))
+
+db_latencia = Histograma(
+    'db_sentencia_segundos', 'Latencia de las sentencias SQL por etiqueta', ('sentencia',), BUCKETS_DB)
+db_errores = Contador(
+    'db_sentencia_errores_total', 'Sentencias SQL que terminaron en error', ('sentencia',))
+
+bcrypt_latencia = Histograma(
+    'bcrypt_segundos', 'Tiempo de hash y verificación de contraseñas', ('operacion',), BUCKETS_BCRYPT)
+
+reportes_errores = Contador(
+    'reportes_errores_total', 'Errores al ejecutar reportes', ('tipo',))
+
+
+# ============= ETIQUETAS DE SENTENCIAS =============
+
+_RE_VERBO = re.compile(r'^\s*(\w+)', re.IGNORECASE)
+_RE_TABLA = re.compile(r'\b(?:FROM|INTO|UPDATE|JOIN)\s+`?(\w+)`?', re.IGNORECASE)
+_etiquetas_sql = {}
+_nombres_registrados = {}
+MAX_ETIQUETAS = 1000
+
+
+def nombrar_sentencias(sentencias):
+    """Usa los nombres de un registro {nombre: sql} como etiqueta de esas sentencias"""
+    _nombres_registrados.update({sql: nombre for nombre, sql in sentencias.items()})
+
+
+def etiqueta_sentencia(sql):
+    """Etiqueta de baja cardinalidad: nombre registrado o 'VERBO tabla'"""
+    etiqueta = _etiquetas_sql.get(sql)
+    if etiqueta is not None:
+        return etiqueta
+    if isinstance(sql, (bytes, bytearray)):
+        texto = sql.decode('utf-8', errors='replace')
+    else:
+        texto = sql
+    etiqueta = _nombres_registrados.get(texto)
+    if etiqueta is None:
+        verbo = _RE_VERBO.match(texto)
+        tabla = _RE_TABLA.search(texto)
+        etiqueta = f"{verbo.group(1).upper() if verbo else '?'} {tabla.group(1) if tabla else '-'}"
+    if len(_etiquetas_sql) < MAX_ETIQUETAS:
+        _etiquetas_sql[sql] = etiqueta
+    return etiqueta
+
+
+def observar_sentencia(sql, params, segundos, error):
+    """Observador de db/instrumentacion"""
+    etiqueta = etiqueta_sentencia(sql)
+    db_latencia.observar(segundos, etiqueta)
+    if error is not None:
+        db_errores.incrementar(etiqueta)
+
+
+# ============= COLECTORES (se leen al exponer) =============
+
+def _colector_pool():
+    stats = estadisticas_pool()
+    gauges = ('tamano', 'desborde', 'abiertas', 'en_uso', 'libres')
+    familias = [(f'db_pool_{clave}', 'gauge', f'Pool de conexiones: {clave}', [({}, stats[clave])])
+                for clave in gauges if clave in stats]
+    familias.extend((f'db_pool_{clave}_total', 'counter', f'Pool de conexiones: {clave}', [({}, valor)])
+                    for clave, valor in stats.items() if clave not in gauges and clave != 'desborde_max')
+    if 'desborde_max' in stats:
+        familias.append(('db_pool_desborde_max', 'gauge', 'Pool de conexiones: máximo desborde observado',
+                         [({}, stats['desborde_max'])]))
+    return familias
+
+
+def _colector_caches():
+    stats = estadisticas_caches()
+    familias = []
+    for clave, tipo in (('aciertos', 'counter'), ('fallos', 'counter'), ('entradas', 'gauge'),
+                        ('tasa_aciertos', 'gauge')):
+        nombre = f'cache_{clave}_total' if tipo == 'counter' else f'cache_{clave}'
+        familias.append((nombre, tipo, f'Cachés: {clave}',
+                         [({'cache': cache}, valores[clave]) for cache, valores in stats.items()
+                          if clave in valores]))
+    return familias
+
+
+def instalar():
+    """Engancha las métricas de SQL, pool y cachés (una vez por proceso)"""
+    global _instaladas
+    if _instaladas:
+        return
+    _instaladas = True
+    from db.sentencias import SENTENCIAS
+    nombrar_sentencias(SENTENCIAS)
+    instrumentacion.registrar_observador(observar_sentencia)
+    registrar_colector(_colector_pool)
+    registrar_colector(_colector_caches)
@@ -0,0 +1,65 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Paginación por cursor (keyset)
+En lugar de OFFSET, cada página continúa a partir de la clave de orden de
+la última fila de la anterior: la página N cuesta lo mismo que la primera.
+El cursor viaja al cliente como un token opaco.
+"""
+
+import base64
+import json
+from datetime import date, timedelta
+
+
+def codificar_cursor(valores):
+    """Token opaco con los valores de la clave de orden de una fila"""
+    serializados = []
+    for v in valores:
+        if isinstance(v, date):
+            serializados.append({'d': v.isoformat()})
+        elif isinstance(v, timedelta):
+            serializados.append({'t': int(v.total_seconds())})
+        else:
+            serializados.append(v)
+    texto = json.dumps(serializados, separators=(',', ':'))
+    return base64.urlsafe_b64encode(texto.encode('utf-8')).decode('ascii').rstrip('=')
+
+
+def decodificar_cursor(token, cantidad):
+    """Valores de la clave a partir del token; None si falta o es inválido"""
+    if not token:
+        return None
+    try:
+        relleno = '=' * (-len(token) % 4)
+        serializados = json.loads(base64.urlsafe_b64decode(token + relleno))
+    except (ValueError, TypeError):
+        return None
+    if not isinstance(serializados, list) or len(serializados) != cantidad:
+        return None
+
+    valores = []
+    for v in serializados:
+        if isinstance(v, dict) and 'd' in v:
+            valores.append(date.fromisoformat(v['d']))
+        elif isinstance(v, dict) and 't' in v:
+            valores.append(timedelta(seconds=v['t']))
+        elif isinstance(v, (str, int)):
+            valores.append(v)
+        else:
+            return None
+    return valores
+
+
+def armar_pagina(filas, limite, clave):
+    """
+    Recibe hasta limite+1 filas (la extra indica que hay más) y retorna
+    (filas de la página, token de la siguiente o None).
+    clave(fila) retorna los valores de la clave de orden.
+    """
+    if filas is None:
+        return [], None
+    if len(filas) <= limite:
+        return filas, None
+    filas = filas[:limite]
+    return filas, codificar_cursor(clave(filas[-1]))
@@ -6,8 +6,12 @@ ABM completo (Alta, Baja, Modificación)
 """
 
 from db.connection import ejecutar_query, conectar
+from db.unidad_trabajo import al_confirmar
+from db.versiones import incrementar_version
 from mysql.connector import Error
-import bcrypt
+from modules import sanciones_activas
+from modules.paginacion import decodificar_cursor, armar_pagina
+from modules.seguridad import hashear_password, SistemaOcupado
 
 
 def obtener_participantes():
@@ -21,6 +25,30 @@ def obtener_participantes():
     """, fetchall=True)
 
 
+def pagina_participantes(cursor=None, limite=50):
+    """
+    Página de participantes ordenados por (apellido, nombre, ci).
+    Retorna (participantes, cursor de la siguiente página o None).
+    """
+    desde = decodificar_cursor(cursor, 3)
+    condicion = "WHERE (p.apellido, p.nombre, p.ci) > (%s, %s, %s)" if desde else ""
+
+    # Los programas se agregan solo para las filas de la página (subconsulta
+    # correlacionada) en lugar de agrupar toda la tabla
+    filas = ejecutar_query(f"""
+        SELECT p.ci, p.nombre, p.apellido, p.email,
+               (SELECT GROUP_CONCAT(CONCAT(ppa.rol, ' en ', ppa.nombre_programa) SEPARATOR ', ')
+                FROM participante_programa_academico ppa
+                WHERE ppa.ci_participante = p.ci) as programas
+        FROM participante p
+        {condicion}
+        ORDER BY p.apellido, p.nombre, p.ci
+        LIMIT %s
+    """, tuple(desde or ()) + (limite + 1,), fetchall=True)
+
+    return armar_pagina(filas, limite, lambda p: (p['apellido'], p['nombre'], p['ci']))
+
+
 def obtener_participante(ci):
     """Obtiene un participante específico"""
     participante = ejecutar_query(
@@ -43,7 +71,10 @@ def obtener_participante(ci):
 
 def crear_participante(ci, nombre, apellido, email, password, programa, rol):
     """Crea un nuevo participante"""
-    hash_pass = bcrypt.hashpw(password.encode('utf-8'), bcrypt.gensalt()).decode('utf-8')
+    try:
+        hash_pass = hashear_password(password)
+    except SistemaOcupado as e:
+        return False, str(e)
     
     conn = conectar()
     if not conn:
@@ -70,6 +101,7 @@ def crear_participante(ci, nombre, apellido, email, password, programa, rol):
             VALUES (%s, %s, %s)
         """, (ci, programa, rol))
         
+        incrementar_version(cursor, 'participante')
         conn.commit()
         return True, "Participante creado exitosamente"
         
@@ -115,6 +147,7 @@ def actualizar_participante(ci, nombre, apellido, email):
             WHERE ci = %s
         """, (nombre, apellido, email, ci))
 
+        incrementar_version(cursor, 'participante')
         conn.commit()
         return True, "Participante actualizado exitosamente"
         
@@ -129,8 +162,8 @@ def actualizar_participante(ci, nombre, apellido, email):
 
 
 def actualizar_password(email, nueva_password):
-    """Actualiza la contraseña de un participante"""
-    hash_pass = bcrypt.hashpw(nueva_password.encode('utf-8'), bcrypt.gensalt()).decode('utf-8')
+    """Actualiza la contraseña de un participante (puede lanzar SistemaOcupado)"""
+    hash_pass = hashear_password(nueva_password)
     
     resultado = ejecutar_query(
         "UPDATE login SET contrasena = %s WHERE correo = %s",
@@ -170,6 +203,7 @@ def eliminar_participante(ci):
         # Eliminar en orden (por foreign keys)
         # 1. Sanciones
         cursor.execute("DELETE FROM sancion_participante WHERE ci_participante = %s", (ci,))
+        tenia_sanciones = cursor.rowcount > 0
         
         # 2. Reservas participante
         cursor.execute("DELETE FROM reserva_participante WHERE ci_participante = %s", (ci,))
@@ -184,7 +218,12 @@ def eliminar_participante(ci):
         if email:
             cursor.execute("DELETE FROM login WHERE correo = %s", (email,))
         
+        incrementar_version(cursor, 'participante')
+        if tenia_sanciones:
+            incrementar_version(cursor, 'sancion')
         conn.commit()
+        if tenia_sanciones:
+            al_confirmar(sanciones_activas.invalidar)
         return True, "Participante eliminado exitosamente"
         
     except Error as e:
@@ -208,6 +247,8 @@ def agregar_programa_participante(ci, nombre_programa, rol):
             VALUES (%s, %s, %s)
         """, (ci, nombre_programa, rol))
         
+        incrementar_version_perfil(cursor, ci)
+        incrementar_version(cursor, 'participante')
         conn.commit()
         return True, "Programa agregado exitosamente"
         
@@ -223,9 +264,36 @@ def agregar_programa_participante(ci, nombre_programa, rol):
 
 def eliminar_programa_participante(ci, nombre_programa):
     """Elimina un programa académico de un participante"""
-    resultado = ejecutar_query("""
-        DELETE FROM participante_programa_academico
-        WHERE ci_participante = %s AND nombre_programa = %s
-    """, (ci, nombre_programa), commit=True)
+    conn = conectar()
+    if not conn:
+        return None
     
-    return resultado
\ No newline at end of file
+    try:
+        cursor = conn.cursor()
+        cursor.execute("""
+            DELETE FROM participante_programa_academico
+            WHERE ci_participante = %s AND nombre_programa = %s
+        """, (ci, nombre_programa))
+        eliminadas = cursor.rowcount
+        
+        if eliminadas:
+            incrementar_version_perfil(cursor, ci)
+            incrementar_version(cursor, 'participante')
+        conn.commit()
+        return eliminadas
+        
+    except Error as e:
+        print(f"❌ Error al eliminar programa: {e}")
+        conn.rollback()
+        return None
+    finally:
+        cursor.close()
+        conn.close()
+
+
+def incrementar_version_perfil(cursor, ci):
+    """Invalida el perfil de capacidades guardado en las sesiones del participante"""
+    cursor.execute(
+        "UPDATE participante SET version_perfil = version_perfil + 1 WHERE ci = %s",
+        (ci,)
+    )
@@ -0,0 +1,39 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Perfil de capacidades del usuario (se guarda en la sesión al iniciar sesión)
+
+    {'admin': bool, 'privilegiado': bool, 'tipos_sala': [...], 'version': int}
+
+'version' es participante.version_perfil al momento de calcularlo; los cambios
+de programas del participante la incrementan y la admisión detecta así un
+perfil desactualizado sin volver a consultar roles ni programas.
+"""
+
+from db.sentencias import ejecutar_sentencia
+
+TIPOS_SALA_BASICOS = ['libre']
+TIPOS_SALA_PRIVILEGIADOS = ['libre', 'posgrado', 'docente']
+
+
+def construir_perfil(fila):
+    """Perfil a partir de una fila con es_docente, privilegiado y version_perfil"""
+    privilegiado = bool(fila['privilegiado'])
+    return {
+        'admin': bool(fila['es_docente']),
+        'privilegiado': privilegiado,
+        'tipos_sala': TIPOS_SALA_PRIVILEGIADOS if privilegiado else TIPOS_SALA_BASICOS,
+        'version': fila['version_perfil'],
+    }
+
+
+def cargar_perfil(ci):
+    """Recalcula el perfil de un participante (None si no existe)"""
+    fila = ejecutar_sentencia('perfil_participante', (ci,), fetchone=True)
+    if not fila or fila['version_perfil'] is None:
+        return None
+    return construir_perfil(fila)
+
+
+def puede_usar_sala(perfil, tipo_sala):
+    return tipo_sala in perfil['tipos_sala']
@@ -4,7 +4,86 @@
 Módulo de reportes y consultas SQL
 """
 
+import os
+import re
+from datetime import date
+from db.cache import CacheLRU
 from db.connection import ejecutar_query
+from db.versiones import leer_versiones
+
+# ============= CACHÉ DE RESULTADOS DE REPORTES =============
+
+# Contadores de version_cache que cambian cuando se escribe cada tabla
+CONTADORES_TABLA = {
+    'reserva': ('reserva', 'reserva_detalle'),
+    'reserva_participante': ('reserva', 'reserva_detalle'),
+    # Vistas hot + archivo: el archivo solo cambia al archivar, que incrementa estos contadores
+    'reserva_todas': ('reserva', 'reserva_detalle'),
+    'reserva_participante_todas': ('reserva', 'reserva_detalle'),
+    'sancion_participante': ('sancion',),
+    'participante': ('participante',),
+    'participante_programa_academico': ('participante',),
+    'sala': ('sala',),
+    'edificio': ('sala',),
+}
+
+_cache_reportes = CacheLRU(
+    'reportes',
+    max_entradas=int(os.getenv('REPORTES_CACHE_MAX', '64')),
+    ventana=float(os.getenv('REPORTES_CACHE_VENTANA', '30'))
+)
+
+def contadores_consulta(query):
+    """Contadores de versión de las tablas que lee una consulta (FROM/JOIN)"""
+    tablas = re.findall(r'\b(?:FROM|JOIN)\s+`?(\w+)`?', query, re.IGNORECASE)
+    contadores = set()
+    for tabla in tablas:
+        contadores.update(CONTADORES_TABLA.get(tabla.lower(), ()))
+    return sorted(contadores)
+
+RE_TABLAS_RESERVA = re.compile(r'\b(FROM|JOIN)(\s+)(reserva|reserva_participante)\b', re.IGNORECASE)
+
+def con_historico(query):
+    """
+    Versión de la consulta que también lee el archivo histórico: reserva y
+    reserva_participante pasan a las vistas reserva_todas y
+    reserva_participante_todas (UNION ALL con las tablas *_historico).
+    """
+    return RE_TABLAS_RESERVA.sub(lambda m: f"{m.group(1)}{m.group(2)}{m.group(3).lower()}_todas", query)
+
+def ejecutar_reporte(identificador, query, params=(), historico=False):
+    """
+    Ejecuta un reporte a través de la caché.
+    La clave es (identificador, params, historico); la marca de agua son las
+    versiones de las tablas que lee la consulta.
+    Por defecto lee solo la parte caliente (reservas sin archivar); con
+    historico=True incluye el archivo.
+    """
+    if historico:
+        query = con_historico(query)
+    contadores = contadores_consulta(query)
+
+    depende_fecha = 'CURDATE()' in query.upper()
+
+    def marca_actual():
+        versiones = leer_versiones(contadores)
+        if versiones is None:
+            return None
+        marca = tuple(sorted(versiones.items()))
+        # Consultas relativas a la fecha actual cambian al cambiar el día
+        return marca + (date.today(),) if depende_fecha else marca
+
+    return _cache_reportes.obtener(
+        (identificador, tuple(params), historico),
+        lambda: ejecutar_query(query, params or None, fetchall=True),
+        marca_actual
+    )
+
+def estadisticas_cache_reportes():
+    """Aciertos/fallos/desalojos de la caché de reportes"""
+    return _cache_reportes.estadisticas()
+
+# ============= REPORTES CLI =============
 
 def reporte_salas_mas_reservadas():
     """Reporte 1: Salas más reservadas"""
@@ -6,24 +6,103 @@ ABM completo (Alta, Baja, Modificación)
 """
 
 from db.connection import ejecutar_query, conectar
+from db.sentencias import ejecutar_sentencia
+from db.unidad_trabajo import al_confirmar
+from db.versiones import incrementar_version, marcar_cambio
+from db.reintentos import reintentar
 from mysql.connector import Error
 from datetime import datetime
+from modules import disponibilidad, catalogo, cuotas
+from modules.paginacion import decodificar_cursor, armar_pagina
+
+
+# Alta de reserva apoyada en uk_reserva (nombre_sala, edificio, fecha, id_turno):
+# un turno tomado se detecta por el error de clave duplicada, sin SELECT previo
+SQL_INSERTAR_RESERVA = """
+    INSERT INTO reserva (nombre_sala, edificio, fecha, id_turno, estado)
+    VALUES (%s, %s, %s, %s, 'activa')
+"""
+
+# Inserta solo si queda lugar en la sala. Las lecturas de un INSERT ... SELECT
+# toman bloqueos compartidos: dos altas simultáneas en la última plaza terminan
+# en deadlock y el reintento vuelve a contar (nunca se supera la capacidad).
+SQL_AGREGAR_PARTICIPANTE = """
+    INSERT INTO reserva_participante (ci_participante, id_reserva)
+    SELECT %s, r.id_reserva
+    FROM reserva r
+    JOIN sala s ON r.nombre_sala = s.nombre_sala AND r.edificio = s.edificio
+    WHERE r.id_reserva = %s
+    AND (SELECT COUNT(*) FROM reserva_participante rp
+         WHERE rp.id_reserva = r.id_reserva) < s.capacidad
+"""
+
+# Por qué no se insertó: sin fila = la reserva no existe; ya_esta o sala llena
+SQL_MOTIVO_SIN_LUGAR = """
+    SELECT EXISTS(SELECT 1 FROM reserva_participante rp
+                  WHERE rp.id_reserva = %s AND rp.ci_participante = %s) AS ya_esta
+    FROM reserva r
+    WHERE r.id_reserva = %s
+"""
 
 
 def obtener_reservas(limite=100):
-    """Obtiene todas las reservas con información detallada"""
-    return ejecutar_query("""
+    """Obtiene las últimas reservas con información detallada"""
+    return pagina_reservas(limite=limite)[0]
+
+
+def pagina_reservas(cursor=None, limite=50):
+    """
+    Página de reservas ordenadas por (fecha, hora_inicio, id_reserva) descendente.
+    Retorna (reservas, cursor de la siguiente página o None).
+    """
+    desde = decodificar_cursor(cursor, 3)
+
+    # hora_inicio está en turno, así que el orden completo no sale de un índice.
+    # Se acota el rango de fechas con idx_reserva_fecha: el día del cursor más
+    # los días de las próximas limite+1 reservas. El ordenamiento trabaja solo
+    # sobre esa ventana, sin importar en qué página estemos.
+    if desde:
+        ventana = ejecutar_query("""
+            SELECT MIN(fecha) as fecha FROM (
+                SELECT fecha FROM reserva WHERE fecha < %s
+                ORDER BY fecha DESC LIMIT %s
+            ) v
+        """, (desde[0], limite + 1), fetchone=True)
+    else:
+        ventana = ejecutar_query("""
+            SELECT MIN(fecha) as fecha FROM (
+                SELECT fecha FROM reserva ORDER BY fecha DESC LIMIT %s
+            ) v
+        """, (limite + 1,), fetchone=True)
+    if ventana is None:
+        return [], None
+    fecha_min = ventana['fecha']
+    if fecha_min is None:
+        if not desde:
+            return [], None
+        # No hay días anteriores: solo queda lo que resta del día del cursor
+        fecha_min = desde[0]
+
+    condicion = ""
+    params = [fecha_min]
+    if desde:
+        condicion = "AND r.fecha <= %s AND (r.fecha, t.hora_inicio, r.id_reserva) < (%s, %s, %s)"
+        params += [desde[0]] + desde
+
+    filas = ejecutar_query(f"""
         SELECT r.id_reserva, r.nombre_sala, r.edificio, r.fecha,
                CONCAT(t.hora_inicio, ' - ', t.hora_fin) as horario,
                t.hora_inicio, t.hora_fin, r.id_turno, r.estado,
-               COUNT(rp.ci_participante) as num_participantes
+               (SELECT COUNT(*) FROM reserva_participante rp
+                WHERE rp.id_reserva = r.id_reserva) as num_participantes
         FROM reserva r
         JOIN turno t ON r.id_turno = t.id_turno
-        LEFT JOIN reserva_participante rp ON r.id_reserva = rp.id_reserva
-        GROUP BY r.id_reserva
-        ORDER BY r.fecha DESC, t.hora_inicio DESC
+        WHERE r.fecha >= %s {condicion}
+        ORDER BY r.fecha DESC, t.hora_inicio DESC, r.id_reserva DESC
         LIMIT %s
-    """, (limite,), fetchall=True)
+    """, tuple(params) + (limite + 1,), fetchall=True)
+
+    return armar_pagina(filas, limite, lambda r: (r['fecha'], r['hora_inicio'], r['id_reserva']))
 
 
 def obtener_reserva(id_reserva):
@@ -54,101 +133,112 @@ def obtener_reserva(id_reserva):
 
 def obtener_reservas_participante(ci_participante, limite=20):
     """Obtiene las reservas de un participante específico"""
-    return ejecutar_query("""
-        SELECT r.id_reserva, r.nombre_sala, r.edificio, r.fecha, r.estado,
-               CONCAT(t.hora_inicio, ' - ', t.hora_fin) as horario,
-               rp.asistencia
-        FROM reserva r
-        JOIN turno t ON r.id_turno = t.id_turno
-        JOIN reserva_participante rp ON r.id_reserva = rp.id_reserva
-        WHERE rp.ci_participante = %s
-        ORDER BY r.fecha DESC, t.hora_inicio DESC
-        LIMIT %s
-    """, (ci_participante, limite), fetchall=True)
+    return ejecutar_sentencia('reservas_participante', (ci_participante, limite), fetchall=True)
 
 
 def crear_reserva(nombre_sala, edificio, fecha, id_turno, ci_creador):
-    """Crea una nueva reserva"""
+    """
+    Crea una nueva reserva.
+    No consulta antes si el turno está libre: uk_reserva rechaza el INSERT
+    si otra reserva ya lo tomó (también si la ganó en paralelo).
+    """
     conn = conectar()
     if not conn:
         return False, "Error de conexión", None
     
+    cursor = None
     try:
         cursor = conn.cursor()
+        intento = 0
+        while True:
+            try:
+                cursor.execute(SQL_INSERTAR_RESERVA, (nombre_sala, edificio, fecha, id_turno))
+                id_reserva = cursor.lastrowid
+                
+                # Agregar al creador como participante
+                cursor.execute("""
+                    INSERT INTO reserva_participante (ci_participante, id_reserva)
+                    VALUES (%s, %s)
+                """, (ci_creador, id_reserva))
+                cuotas.aplicar(cursor, id_reserva)
+                
+                version = incrementar_version(cursor, 'reserva')
+                conn.commit()
+                break
+            except Error as e:
+                if not reintentar(conn, e, intento):
+                    raise
+                intento += 1
         
-        # Verificar que no exista una reserva en ese turno
-        cursor.execute("""
-            SELECT id_reserva FROM reserva
-            WHERE nombre_sala = %s AND edificio = %s
-            AND fecha = %s AND id_turno = %s
-        """, (nombre_sala, edificio, fecha, id_turno))
-        
-        if cursor.fetchone():
-            return False, "Este turno ya está reservado", None
-        
-        # Insertar reserva
-        cursor.execute("""
-            INSERT INTO reserva (nombre_sala, edificio, fecha, id_turno, estado)
-            VALUES (%s, %s, %s, %s, 'activa')
-        """, (nombre_sala, edificio, fecha, id_turno))
-        
-        id_reserva = cursor.lastrowid
-        
-        # Agregar al creador como participante
-        cursor.execute("""
-            INSERT INTO reserva_participante (ci_participante, id_reserva)
-            VALUES (%s, %s)
-        """, (ci_creador, id_reserva))
-        
-        conn.commit()
+        al_confirmar(lambda: disponibilidad.ocupar(nombre_sala, edificio, fecha, id_turno, version))
         return True, "Reserva creada exitosamente", id_reserva
         
     except Error as e:
         conn.rollback()
+        if 'Duplicate entry' in str(e):
+            return False, "Este turno ya está reservado", None
         return False, f"Error al crear reserva: {str(e)}", None
     finally:
-        cursor.close()
+        if cursor:
+            cursor.close()
         conn.close()
 
 
 def actualizar_reserva(id_reserva, nombre_sala, edificio, fecha, id_turno):
-    """Actualiza una reserva existente"""
+    """
+    Actualiza una reserva existente.
+    Si el turno nuevo ya está tomado, uk_reserva rechaza el UPDATE.
+    """
     conn = conectar()
     if not conn:
         return False, "Error de conexión"
     
+    cursor = None
     try:
         cursor = conn.cursor()
+        intento = 0
+        while True:
+            try:
+                # Ubicación actual (para el índice de disponibilidad), bloqueada hasta el commit
+                cursor.execute("""
+                    SELECT nombre_sala, edificio, fecha, id_turno
+                    FROM reserva WHERE id_reserva = %s
+                    FOR UPDATE
+                """, (id_reserva,))
+                anterior = cursor.fetchone()
+                
+                if not anterior:
+                    return False, "No se encontró la reserva"
+                
+                # La fecha puede cambiar de día o semana en el libro de cuotas
+                cuotas.quitar(cursor, id_reserva)
+                cursor.execute("""
+                    UPDATE reserva
+                    SET nombre_sala = %s, edificio = %s, fecha = %s, id_turno = %s
+                    WHERE id_reserva = %s
+                """, (nombre_sala, edificio, fecha, id_turno, id_reserva))
+                cuotas.aplicar(cursor, id_reserva)
+                
+                version = incrementar_version(cursor, 'reserva')
+                conn.commit()
+                break
+            except Error as e:
+                if not reintentar(conn, e, intento):
+                    raise
+                intento += 1
         
-        # Verificar que la nueva combinación no exista (excepto la actual)
-        cursor.execute("""
-            SELECT id_reserva FROM reserva
-            WHERE nombre_sala = %s AND edificio = %s
-            AND fecha = %s AND id_turno = %s
-            AND id_reserva != %s
-        """, (nombre_sala, edificio, fecha, id_turno, id_reserva))
-        
-        if cursor.fetchone():
-            return False, "Ya existe una reserva en ese turno"
-        
-        # Actualizar reserva
-        cursor.execute("""
-            UPDATE reserva
-            SET nombre_sala = %s, edificio = %s, fecha = %s, id_turno = %s
-            WHERE id_reserva = %s
-        """, (nombre_sala, edificio, fecha, id_turno, id_reserva))
-        
-        conn.commit()
-        
-        if cursor.rowcount > 0:
-            return True, "Reserva actualizada exitosamente"
-        return False, "No se encontró la reserva"
+        al_confirmar(lambda: disponibilidad.mover(
+            tuple(anterior), (nombre_sala, edificio, fecha, id_turno), version))
+        return True, "Reserva actualizada exitosamente"
         
     except Error as e:
         conn.rollback()
+        if 'Duplicate entry' in str(e):
+            return False, "Ya existe una reserva en ese turno"
         return False, f"Error al actualizar: {str(e)}"
     finally:
-        cursor.close()
+        if cursor:
+            cursor.close()
         conn.close()
 
 
@@ -159,15 +249,34 @@ def cambiar_estado_reserva(id_reserva, nuevo_estado):
     if nuevo_estado not in estados_validos:
         return False, "Estado no válido"
     
-    resultado = ejecutar_query(
-        "UPDATE reserva SET estado = %s WHERE id_reserva = %s",
-        (nuevo_estado, id_reserva),
-        commit=True
-    )
+    # El cambio de estado no libera el turno: uk_reserva incluye reservas en
+    # cualquier estado, por lo que el índice de disponibilidad no cambia.
+    conn = conectar()
+    if not conn:
+        return False, "Error de conexión"
     
-    if resultado:
+    try:
+        cursor = conn.cursor()
+        cuotas.quitar(cursor, id_reserva)
+        cursor.execute(
+            "UPDATE reserva SET estado = %s WHERE id_reserva = %s",
+            (nuevo_estado, id_reserva)
+        )
+        if cursor.rowcount == 0:
+            conn.rollback()
+            return False, "No se pudo cambiar el estado"
+        cuotas.aplicar(cursor, id_reserva)
+        
+        incrementar_version(cursor, 'reserva_detalle')
+        conn.commit()
         return True, f"Estado cambiado a '{nuevo_estado}'"
-    return False, "No se pudo cambiar el estado"
+        
+    except Error as e:
+        conn.rollback()
+        return False, f"Error al cambiar estado: {str(e)}"
+    finally:
+        cursor.close()
+        conn.close()
 
 
 def cancelar_reserva(id_reserva):
@@ -185,7 +294,10 @@ def eliminar_reserva(id_reserva):
         cursor = conn.cursor()
         
         # Verificar estado
-        cursor.execute("SELECT estado FROM reserva WHERE id_reserva = %s", (id_reserva,))
+        cursor.execute("""
+            SELECT estado, nombre_sala, edificio, fecha, id_turno
+            FROM reserva WHERE id_reserva = %s
+        """, (id_reserva,))
         result = cursor.fetchone()
         
         if not result:
@@ -194,13 +306,15 @@ def eliminar_reserva(id_reserva):
         if result[0] not in ['cancelada', 'sin asistencia']:
             return False, "Solo se pueden eliminar reservas canceladas o sin asistencia"
         
-        # Eliminar participantes primero
+        # Eliminar participantes primero (una reserva no activa no figura en el libro de cuotas)
         cursor.execute("DELETE FROM reserva_participante WHERE id_reserva = %s", (id_reserva,))
         
         # Eliminar reserva
         cursor.execute("DELETE FROM reserva WHERE id_reserva = %s", (id_reserva,))
         
+        version = incrementar_version(cursor, 'reserva')
         conn.commit()
+        al_confirmar(lambda: disponibilidad.liberar(*result[1:], version))
         return True, "Reserva eliminada exitosamente"
         
     except Error as e:
@@ -212,35 +326,40 @@ def eliminar_reserva(id_reserva):
 
 
 def agregar_participante_reserva(id_reserva, ci_participante):
-    """Agrega un participante a una reserva"""
+    """
+    Agrega un participante a una reserva.
+    La capacidad se verifica en el mismo INSERT (no hay ventana entre contar e
+    insertar); solo si no se insertó nada se lee el motivo.
+    """
     conn = conectar()
     if not conn:
         return False, "Error de conexión"
     
+    cursor = None
     try:
         cursor = conn.cursor()
+        intento = 0
+        while True:
+            try:
+                cursor.execute(SQL_AGREGAR_PARTICIPANTE, (ci_participante, id_reserva))
+                if cursor.rowcount == 0:
+                    cursor.execute(SQL_MOTIVO_SIN_LUGAR, (id_reserva, ci_participante, id_reserva))
+                    motivo = cursor.fetchone()
+                    if not motivo:
+                        return False, "No se encontró la reserva"
+                    if motivo[0]:
+                        return False, "El participante ya está en esta reserva"
+                    return False, "La sala ha alcanzado su capacidad máxima"
+                cuotas.aplicar(cursor, id_reserva, ci_participante)
+                
+                incrementar_version(cursor, 'reserva_detalle')
+                conn.commit()
+                break
+            except Error as e:
+                if not reintentar(conn, e, intento):
+                    raise
+                intento += 1
         
-        # Verificar capacidad
-        cursor.execute("""
-            SELECT s.capacidad, COUNT(rp.ci_participante) as actual
-            FROM reserva r
-            JOIN sala s ON r.nombre_sala = s.nombre_sala AND r.edificio = s.edificio
-            LEFT JOIN reserva_participante rp ON r.id_reserva = rp.id_reserva
-            WHERE r.id_reserva = %s
-            GROUP BY s.capacidad
-        """, (id_reserva,))
-        
-        result = cursor.fetchone()
-        if result and result[1] >= result[0]:
-            return False, "La sala ha alcanzado su capacidad máxima"
-        
-        # Agregar participante
-        cursor.execute("""
-            INSERT INTO reserva_participante (ci_participante, id_reserva)
-            VALUES (%s, %s)
-        """, (ci_participante, id_reserva))
-        
-        conn.commit()
         return True, "Participante agregado exitosamente"
         
     except Error as e:
@@ -249,7 +368,8 @@ def agregar_participante_reserva(id_reserva, ci_participante):
             return False, "El participante ya está en esta reserva"
         return False, f"Error al agregar: {str(e)}"
     finally:
-        cursor.close()
+        if cursor:
+            cursor.close()
         conn.close()
 
 
@@ -274,16 +394,19 @@ def eliminar_participante_reserva(id_reserva, ci_participante):
             return False, "No se puede eliminar el único participante de la reserva"
         
         # Eliminar participante
+        cuotas.quitar(cursor, id_reserva, ci_participante)
         cursor.execute("""
             DELETE FROM reserva_participante
             WHERE id_reserva = %s AND ci_participante = %s
         """, (id_reserva, ci_participante))
         
-        conn.commit()
+        if cursor.rowcount == 0:
+            conn.rollback()
+            return False, "No se encontró el participante en esta reserva"
         
-        if cursor.rowcount > 0:
-            return True, "Participante eliminado de la reserva"
-        return False, "No se encontró el participante en esta reserva"
+        incrementar_version(cursor, 'reserva_detalle')
+        conn.commit()
+        return True, "Participante eliminado de la reserva"
         
     except Error as e:
         conn.rollback()
@@ -302,16 +425,128 @@ def marcar_asistencia(id_reserva, ci_participante, asistio):
     """, (asistio, id_reserva, ci_participante), commit=True)
     
     if resultado:
+        marcar_cambio('reserva_detalle')
         return True, "Asistencia registrada"
     return False, "No se pudo registrar la asistencia"
 
 
+MAX_ASISTENCIAS_LOTE = 2000
+
+SQL_PLANILLA_TURNO = """
+    SELECT r.id_reserva, r.nombre_sala, r.edificio, r.estado,
+           rp.ci_participante, p.nombre, p.apellido, rp.asistencia
+    FROM reserva r
+    JOIN reserva_participante rp ON rp.id_reserva = r.id_reserva
+    JOIN participante p ON p.ci = rp.ci_participante
+    WHERE r.fecha = %s AND r.id_turno = %s
+    ORDER BY r.edificio, r.nombre_sala, p.apellido, p.nombre
+"""
+
+SQL_PLANILLA_RESERVAS = """
+    SELECT r.id_reserva, r.nombre_sala, r.edificio, r.estado,
+           rp.ci_participante, p.nombre, p.apellido, rp.asistencia
+    FROM reserva r
+    JOIN reserva_participante rp ON rp.id_reserva = r.id_reserva
+    JOIN participante p ON p.ci = rp.ci_participante
+    WHERE r.id_reserva IN ({marcas})
+    ORDER BY r.edificio, r.nombre_sala, p.apellido, p.nombre
+"""
+
+
+def _agrupar_planilla(filas):
+    """Agrupa las filas (reserva × participante) en [{reserva..., 'participantes': [...]}]"""
+    planilla = {}
+    for f in filas:
+        reserva = planilla.setdefault(f['id_reserva'], {
+            'id_reserva': f['id_reserva'], 'nombre_sala': f['nombre_sala'],
+            'edificio': f['edificio'], 'estado': f['estado'], 'participantes': [],
+        })
+        asistencia = f['asistencia']
+        reserva['participantes'].append({
+            'ci_participante': f['ci_participante'], 'nombre': f['nombre'], 'apellido': f['apellido'],
+            'asistencia': None if asistencia is None else bool(asistencia),
+        })
+    return list(planilla.values())
+
+
+def obtener_planilla_turno(fecha, id_turno):
+    """Planilla de asistencia de todas las reservas de un turno (una sola query)"""
+    filas = ejecutar_query(SQL_PLANILLA_TURNO, (fecha, id_turno), fetchall=True)
+    return None if filas is None else _agrupar_planilla(filas)
+
+
+def obtener_planilla_reservas(ids_reserva):
+    """Planilla de asistencia de las reservas indicadas (una sola query)"""
+    ids_reserva = list(ids_reserva)
+    if not ids_reserva:
+        return []
+    marcas = ', '.join(['%s'] * len(ids_reserva))
+    filas = ejecutar_query(SQL_PLANILLA_RESERVAS.format(marcas=marcas), tuple(ids_reserva), fetchall=True)
+    return None if filas is None else _agrupar_planilla(filas)
+
+
+def marcar_asistencia_masiva(asistencias):
+    """
+    Marca la asistencia de muchos participantes, de una o varias reservas,
+    con un solo UPDATE (CASE por par reserva/participante) en una transacción.
+    asistencias: [(id_reserva, ci_participante, asistio)] con asistio True/False
+    (o None para borrar la marca).
+    Retorna (exito, mensaje, pares (id_reserva, ci) que no existen).
+    """
+    asistencias = list(asistencias)
+    if not asistencias:
+        return False, "No se indicaron asistencias", []
+    if len(asistencias) > MAX_ASISTENCIAS_LOTE:
+        return False, f"Se pueden marcar como máximo {MAX_ASISTENCIAS_LOTE} asistencias por vez", []
+
+    conn = conectar()
+    if not conn:
+        return False, "Error de conexión", []
+    
+    try:
+        cursor = conn.cursor()
+        
+        pares = [(ci, id_reserva) for id_reserva, ci, _ in asistencias]
+        casos = ' '.join(['WHEN ci_participante = %s AND id_reserva = %s THEN %s'] * len(asistencias))
+        marcas_pares = ', '.join(['(%s, %s)'] * len(pares))
+        params = [v for id_reserva, ci, asistio in asistencias for v in (ci, id_reserva, asistio)]
+        params += [v for par in pares for v in par]
+        
+        # (ci_participante, id_reserva) es la clave primaria: el IN se resuelve por PK
+        cursor.execute(f"""
+            UPDATE reserva_participante
+            SET asistencia = CASE {casos} ELSE asistencia END
+            WHERE (ci_participante, id_reserva) IN ({marcas_pares})
+        """, tuple(params))
+        
+        cursor.execute(f"""
+            SELECT ci_participante, id_reserva FROM reserva_participante
+            WHERE (ci_participante, id_reserva) IN ({marcas_pares})
+        """, tuple(v for par in pares for v in par))
+        existentes = set(cursor.fetchall())
+        no_encontrados = [(id_reserva, ci) for ci, id_reserva in pares if (ci, id_reserva) not in existentes]
+        
+        incrementar_version(cursor, 'reserva_detalle')
+        conn.commit()
+        mensaje = f"Asistencia registrada para {len(asistencias) - len(no_encontrados)} participantes"
+        if no_encontrados:
+            mensaje += f" ({len(no_encontrados)} no pertenecen a la reserva indicada)"
+        return True, mensaje, no_encontrados
+        
+    except Error as e:
+        conn.rollback()
+        return False, f"Error al registrar la asistencia: {str(e)}", []
+    finally:
+        cursor.close()
+        conn.close()
+
+
 def obtener_turnos():
-    """Obtiene todos los turnos disponibles"""
-    return ejecutar_query(
+    """Obtiene todos los turnos disponibles (caché de catálogo)"""
+    return catalogo.obtener('turno', lambda: ejecutar_query(
         "SELECT * FROM turno ORDER BY hora_inicio",
         fetchall=True
-    )
+    ))
 
 
 # ============= FUNCIONES CLI (mantener compatibilidad) =============
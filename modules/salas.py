@@ -6,17 +6,20 @@ ABM completo (Alta, Baja, Modificación)
 """
 
 from db.connection import ejecutar_query, conectar
+from db.unidad_trabajo import al_confirmar
+from db.versiones import incrementar_version
 from mysql.connector import Error
+from modules import disponibilidad, catalogo
 
 
 def obtener_salas():
-    """Obtiene todas las salas con información del edificio"""
-    return ejecutar_query("""
+    """Obtiene todas las salas con información del edificio (caché de catálogo)"""
+    return catalogo.obtener('sala', lambda: ejecutar_query("""
         SELECT s.nombre_sala, s.edificio, s.capacidad, s.tipo_sala, e.direccion
         FROM sala s
         JOIN edificio e ON s.edificio = e.nombre_edificio
         ORDER BY s.edificio, s.nombre_sala
-    """, fetchall=True)
+    """, fetchall=True))
 
 
 def obtener_sala(nombre_sala, edificio):
@@ -30,11 +33,11 @@ def obtener_sala(nombre_sala, edificio):
 
 
 def obtener_edificios():
-    """Obtiene todos los edificios"""
-    return ejecutar_query(
+    """Obtiene todos los edificios (caché de catálogo)"""
+    return catalogo.obtener('edificio', lambda: ejecutar_query(
         "SELECT nombre_edificio, direccion FROM edificio ORDER BY nombre_edificio",
         fetchall=True
-    )
+    ))
 
 
 def crear_sala(nombre_sala, edificio, capacidad, tipo_sala):
@@ -57,7 +60,10 @@ def crear_sala(nombre_sala, edificio, capacidad, tipo_sala):
             VALUES (%s, %s, %s, %s)
         """, (nombre_sala, edificio, capacidad, tipo_sala))
         
+        version = incrementar_version(cursor, 'sala')
         conn.commit()
+        al_confirmar(lambda: disponibilidad.salas_modificadas(version))
+        catalogo.invalidar('sala')
         return True, "Sala creada exitosamente"
         
     except Error as e:
@@ -93,11 +99,14 @@ def actualizar_sala(nombre_sala_original, edificio_original, nombre_sala_nuevo,
         """, (nombre_sala_nuevo, edificio_nuevo, capacidad, tipo_sala,
             nombre_sala_original, edificio_original))
 
-        conn.commit()
+        if cursor.rowcount == 0:
+            return False, "No se encontró la sala"
         
-        if cursor.rowcount > 0:
-            return True, "Sala actualizada exitosamente"
-        return False, "No se encontró la sala"
+        version = incrementar_version(cursor, 'sala')
+        conn.commit()
+        al_confirmar(lambda: disponibilidad.salas_modificadas(version))
+        catalogo.invalidar('sala')
+        return True, "Sala actualizada exitosamente"
         
     except Error as e:
         conn.rollback()
@@ -148,11 +157,14 @@ def eliminar_sala(nombre_sala, edificio):
             WHERE nombre_sala = %s AND edificio = %s
         """, (nombre_sala, edificio))
         
-        conn.commit()
+        if cursor.rowcount == 0:
+            return False, "No se encontró la sala"
         
-        if cursor.rowcount > 0:
-            return True, "Sala eliminada exitosamente"
-        return False, "No se encontró la sala"
+        version = incrementar_version(cursor, 'sala')
+        conn.commit()
+        al_confirmar(lambda: disponibilidad.salas_modificadas(version))
+        catalogo.invalidar('sala')
+        return True, "Sala eliminada exitosamente"
         
     except Error as e:
         conn.rollback()
@@ -176,6 +188,7 @@ def crear_edificio(nombre_edificio, direccion):
         """, (nombre_edificio, direccion))
         
         conn.commit()
+        catalogo.invalidar('edificio')
         return True, "Edificio creado exitosamente"
         
     except Error as e:
@@ -6,8 +6,15 @@ ABM completo (Alta, Baja, Modificación)
 """
 
 from db.connection import ejecutar_query, conectar
+from db.unidad_trabajo import al_confirmar
+from db.versiones import incrementar_version
 from mysql.connector import Error
 from datetime import datetime, timedelta
+from modules import sanciones_activas
+from modules.paginacion import decodificar_cursor, armar_pagina
+
+# Inasistencia total a una reserva: 2 meses de sanción
+DIAS_SANCION_INASISTENCIA = 60
 
 
 def obtener_sanciones():
@@ -27,6 +34,33 @@ def obtener_sanciones():
     """, fetchall=True)
 
 
+def pagina_sanciones(cursor=None, limite=50):
+    """
+    Página de sanciones ordenadas por (fecha_inicio, id_sancion) descendente.
+    Retorna (sanciones, cursor de la siguiente página o None).
+    """
+    desde = decodificar_cursor(cursor, 2)
+    condicion = "WHERE (s.fecha_inicio, s.id_sancion) < (%s, %s)" if desde else ""
+
+    filas = ejecutar_query(f"""
+        SELECT s.id_sancion, s.ci_participante, p.nombre, p.apellido, p.email,
+               s.fecha_inicio, s.fecha_fin,
+               CASE
+                   WHEN CURDATE() BETWEEN s.fecha_inicio AND s.fecha_fin THEN 'ACTIVA'
+                   WHEN CURDATE() > s.fecha_fin THEN 'FINALIZADA'
+                   ELSE 'FUTURA'
+               END as estado,
+               DATEDIFF(s.fecha_fin, s.fecha_inicio) as duracion_dias
+        FROM sancion_participante s
+        JOIN participante p ON s.ci_participante = p.ci
+        {condicion}
+        ORDER BY s.fecha_inicio DESC, s.id_sancion DESC
+        LIMIT %s
+    """, tuple(desde or ()) + (limite + 1,), fetchall=True)
+
+    return armar_pagina(filas, limite, lambda s: (s['fecha_inicio'], s['id_sancion']))
+
+
 def obtener_sancion(id_sancion):
     """Obtiene una sanción específica"""
     return ejecutar_query("""
@@ -59,13 +93,8 @@ def obtener_sanciones_participante(ci_participante):
 
 
 def tiene_sancion_activa(ci_participante):
-    """Verifica si un participante tiene una sanción activa"""
-    sancion = ejecutar_query("""
-        SELECT id_sancion, fecha_fin
-        FROM sancion_participante
-        WHERE ci_participante = %s
-        AND CURDATE() BETWEEN fecha_inicio AND fecha_fin
-    """, (ci_participante,), fetchone=True)
+    """Verifica si un participante tiene una sanción activa (índice en memoria)"""
+    sancion = sanciones_activas.sancion_activa(ci_participante)
     
     return sancion is not None, sancion
 
@@ -112,7 +141,10 @@ def crear_sancion(ci_participante, fecha_inicio, fecha_fin, motivo=None):
         
         id_sancion = cursor.lastrowid
         
+        version = incrementar_version(cursor, 'sancion')
         conn.commit()
+        al_confirmar(lambda: sanciones_activas.sancion_guardada(
+            id_sancion, ci_participante, fecha_inicio, fecha_fin, version))
         return True, "Sanción creada exitosamente", id_sancion
         
     except Error as e:
@@ -172,11 +204,14 @@ def actualizar_sancion(id_sancion, fecha_inicio, fecha_fin):
             WHERE id_sancion = %s
         """, (fecha_inicio, fecha_fin, id_sancion))
         
-        conn.commit()
+        if cursor.rowcount == 0:
+            return False, "No se encontró la sanción"
         
-        if cursor.rowcount > 0:
-            return True, "Sanción actualizada exitosamente"
-        return False, "No se encontró la sanción"
+        version = incrementar_version(cursor, 'sancion')
+        conn.commit()
+        al_confirmar(lambda: sanciones_activas.sancion_guardada(
+            id_sancion, ci_participante, fecha_inicio, fecha_fin, version))
+        return True, "Sanción actualizada exitosamente"
         
     except Error as e:
         conn.rollback()
@@ -198,11 +233,13 @@ def eliminar_sancion(id_sancion):
         # Eliminar sanción
         cursor.execute("DELETE FROM sancion_participante WHERE id_sancion = %s", (id_sancion,))
         
-        conn.commit()
+        if cursor.rowcount == 0:
+            return False, "No se encontró la sanción"
         
-        if cursor.rowcount > 0:
-            return True, "Sanción eliminada exitosamente"
-        return False, "No se encontró la sanción"
+        version = incrementar_version(cursor, 'sancion')
+        conn.commit()
+        al_confirmar(lambda: sanciones_activas.sancion_eliminada(id_sancion, version))
+        return True, "Sanción eliminada exitosamente"
         
     except Error as e:
         conn.rollback()
@@ -215,19 +252,44 @@ def eliminar_sancion(id_sancion):
 def finalizar_sancion(id_sancion):
     """Finaliza una sanción estableciendo fecha_fin a hoy"""
     fecha_hoy = datetime.now().date()
+    conn = conectar()
+    if not conn:
+        return False, "Error de conexión"
     
-    resultado = ejecutar_query("""
-        UPDATE sancion_participante
-        SET fecha_fin = %s
-        WHERE id_sancion = %s AND fecha_fin > %s
-    """, (fecha_hoy, id_sancion, fecha_hoy), commit=True)
-    
-    if resultado:
+    try:
+        cursor = conn.cursor()
+        
+        cursor.execute(
+            "SELECT ci_participante, fecha_inicio FROM sancion_participante WHERE id_sancion = %s",
+            (id_sancion,)
+        )
+        result = cursor.fetchone()
+        
+        cursor.execute("""
+            UPDATE sancion_participante
+            SET fecha_fin = %s
+            WHERE id_sancion = %s AND fecha_fin > %s
+        """, (fecha_hoy, id_sancion, fecha_hoy))
+        
+        if not result or cursor.rowcount == 0:
+            return False, "No se pudo finalizar la sanción"
+        
+        ci_participante, fecha_inicio = result
+        version = incrementar_version(cursor, 'sancion')
+        conn.commit()
+        al_confirmar(lambda: sanciones_activas.sancion_guardada(
+            id_sancion, ci_participante, fecha_inicio, fecha_hoy, version))
         return True, "Sanción finalizada exitosamente"
-    return False, "No se pudo finalizar la sanción"
+        
+    except Error as e:
+        conn.rollback()
+        return False, f"Error al finalizar: {str(e)}"
+    finally:
+        cursor.close()
+        conn.close()
 
 
-def crear_sancion_automatica(ci_participante, dias=7):
+def crear_sancion_automatica(ci_participante, dias=DIAS_SANCION_INASISTENCIA):
     """Crea una sanción automática (por ejemplo, por inasistencia)"""
     fecha_inicio = datetime.now().date()
     fecha_fin = fecha_inicio + timedelta(days=dias)
@@ -0,0 +1,170 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Índice en memoria de sanciones vigentes y futuras (ci -> intervalos)
+
+Se carga en bloque con las sanciones cuya fecha_fin no pasó todavía. Las
+vencidas se descartan solas al cambiar el día. Consultar un participante
+sin sanciones (la gran mayoría) es una búsqueda en un diccionario, sin ir a
+la base.
+
+Las escrituras de modules/sanciones actualizan el índice después del commit.
+Los cambios de otros procesos se detectan con el contador 'sancion' de
+version_cache.
+
+Como en modules/disponibilidad, la versión y las filas se leen en una
+conexión propia del pool (consultar_aparte) y fuera de _lock; el lock solo
+se toma para intercambiar el resultado, y si mientras se cargaba se aplicó
+un cambio incremental la carga se descarta. Tras una carga fallida se espera
+SANCIONES_REINTENTO_CARGA segundos antes de volver a intentar (mientras
+tanto se consulta la base por participante).
+"""
+
+import os
+import threading
+import time
+from datetime import date
+from db.connection import consultar_aparte
+from db.sentencias import ejecutar_sentencia
+from db.versiones import VigilanteVersion
+
+INTERVALO_VERSION = float(os.getenv('SANCIONES_INTERVALO_VERSION', '1.0'))
+REINTENTO_CARGA = float(os.getenv('SANCIONES_REINTENTO_CARGA', '5.0'))
+INTENTOS_CARGA = 3
+
+_lock = threading.RLock()
+_por_ci = {}      # ci -> {id_sancion: (fecha_inicio, fecha_fin)}
+_cargado = None   # día de la última carga o depuración (None: sin cargar)
+_generacion = 0   # cambia con cada actualización incremental o invalidación
+_proxima_carga = 0.0  # time.monotonic() desde el que se puede reintentar una carga fallida
+_version = VigilanteVersion('sancion', INTERVALO_VERSION)
+
+
+def _fecha(valor):
+    return date.fromisoformat(valor) if isinstance(valor, str) else valor
+
+
+# ============= CARGA =============
+
+def cargar():
+    """
+    Carga en una sola query todas las sanciones que terminan hoy o después.
+    Retorna True si el índice quedó cargado.
+    """
+    global _por_ci, _cargado, _proxima_carga
+    for _ in range(INTENTOS_CARGA):
+        with _lock:
+            generacion = _generacion
+        # Leer la versión antes que los datos: un cambio concurrente fuerza otra carga
+        _version.cambio_externo()
+        hoy = date.today()
+        filas = consultar_aparte("""
+            SELECT id_sancion, ci_participante, fecha_inicio, fecha_fin
+            FROM sancion_participante
+            WHERE fecha_fin >= %s
+        """, (hoy,))
+        if filas is None:
+            with _lock:
+                _proxima_carga = time.monotonic() + REINTENTO_CARGA
+            return False
+
+        por_ci = {}
+        for f in filas:
+            por_ci.setdefault(f['ci_participante'], {})[f['id_sancion']] = (f['fecha_inicio'], f['fecha_fin'])
+        with _lock:
+            if _generacion == generacion:
+                _por_ci = por_ci
+                _cargado = hoy
+                return True
+    # Escrituras concurrentes en cada intento: queda para el próximo uso
+    return False
+
+
+def _sincronizar():
+    """Recarga si otro proceso cambió sanciones y descarta las vencidas al cambiar el día"""
+    global _cargado
+    cambio = _version.cambio_externo()
+    with _lock:
+        recargar = (cambio or _cargado is None) and time.monotonic() >= _proxima_carga
+        if not recargar and _cargado is not None and _cargado < date.today():
+            hoy = date.today()
+            for ci in list(_por_ci):
+                vigentes = {i: (ini, fin) for i, (ini, fin) in _por_ci[ci].items() if fin >= hoy}
+                if vigentes:
+                    _por_ci[ci] = vigentes
+                else:
+                    del _por_ci[ci]
+            _cargado = hoy
+    if recargar:
+        cargar()
+
+
+# ============= CONSULTAS =============
+
+def sancion_activa(ci_participante, fecha=None):
+    """
+    Sanción vigente del participante en `fecha` (hoy por defecto):
+    {'id_sancion', 'ci_participante', 'fecha_inicio', 'fecha_fin'} o None
+    """
+    fecha = _fecha(fecha) or date.today()
+    _sincronizar()
+    with _lock:
+        cargado = _cargado is not None
+        intervalos = dict(_por_ci.get(ci_participante) or {})
+    if not cargado:
+        # Sin índice (la carga falló): se consulta la base
+        return ejecutar_sentencia('sancion_activa', (ci_participante, fecha), fetchone=True)
+    for id_sancion, (inicio, fin) in intervalos.items():
+        if inicio <= fecha <= fin:
+            return {'id_sancion': id_sancion, 'ci_participante': ci_participante,
+                    'fecha_inicio': inicio, 'fecha_fin': fin}
+    return None
+
+
+def cantidad_sancionados():
+    with _lock:
+        return len(_por_ci)
+
+
+# ============= ACTUALIZACIÓN INCREMENTAL =============
+
+def _aplicar(version, cambio):
+    global _generacion
+    with _lock:
+        _generacion += 1
+        if _version.registrar_propia(version):
+            cambio()
+        else:
+            # Hubo cambios de otros procesos en el medio: recargar en el próximo uso
+            invalidar()
+
+
+def sancion_guardada(id_sancion, ci_participante, fecha_inicio, fecha_fin, version):
+    """Registra el alta o modificación de una sanción (llamar después del commit)"""
+    fecha_inicio, fecha_fin = _fecha(fecha_inicio), _fecha(fecha_fin)
+
+    def cambio():
+        for intervalos in _por_ci.values():
+            intervalos.pop(id_sancion, None)
+        if fecha_fin >= date.today():
+            _por_ci.setdefault(ci_participante, {})[id_sancion] = (fecha_inicio, fecha_fin)
+    _aplicar(version, cambio)
+
+
+def sancion_eliminada(id_sancion, version):
+    """Registra la baja de una sanción (llamar después del commit)"""
+    def cambio():
+        for ci in [ci for ci, intervalos in _por_ci.items() if id_sancion in intervalos]:
+            del _por_ci[ci][id_sancion]
+            if not _por_ci[ci]:
+                del _por_ci[ci]
+    _aplicar(version, cambio)
+
+
+def invalidar():
+    """Descarta el índice; se vuelve a cargar en el próximo uso"""
+    global _cargado, _generacion
+    with _lock:
+        _generacion += 1
+        _cargado = None
+        _version.forzar()
@@ -0,0 +1,137 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Hash y verificación de contraseñas (bcrypt)
+
+El trabajo de bcrypt corre en un pool de hilos acotado (bcrypt libera el GIL
+mientras calcula): como mucho BCRYPT_HILOS hashes a la vez y BCRYPT_COLA_MAX
+pedidos en curso por proceso. Con la cola llena se rechaza de inmediato con
+SistemaOcupado en lugar de acumular workers esperando.
+"""
+
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FuturoVencido
+import bcrypt
+from modules import metricas
+
+# Configuración
+BCRYPT_ROUNDS = int(os.getenv('BCRYPT_ROUNDS', '12'))
+BCRYPT_HILOS = int(os.getenv('BCRYPT_HILOS', str(os.cpu_count() or 2)))
+BCRYPT_COLA_MAX = int(os.getenv('BCRYPT_COLA_MAX', str(BCRYPT_HILOS * 4)))
+BCRYPT_TIMEOUT = float(os.getenv('BCRYPT_TIMEOUT', '10'))
+# Costo para importaciones masivas: el hash se lleva a BCRYPT_ROUNDS en el primer inicio de sesión
+BCRYPT_ROUNDS_IMPORTACION = int(os.getenv('BCRYPT_ROUNDS_IMPORTACION', str(min(BCRYPT_ROUNDS, 10))))
+
+
+class SistemaOcupado(Exception):
+    """La cola de hashing está llena: el pedido se rechaza para no frenar al resto"""
+
+
+_ejecutor = None
+_ejecutor_pid = None
+_cupos = threading.BoundedSemaphore(BCRYPT_COLA_MAX)
+_en_curso = 0
+_lock = threading.Lock()
+
+bcrypt_espera = metricas.Histograma(
+    'bcrypt_espera_segundos', 'Espera en la cola de hashing antes de empezar', ('operacion',),
+    metricas.BUCKETS_BCRYPT)
+bcrypt_rechazos = metricas.Contador(
+    'bcrypt_rechazos_total', 'Pedidos de hashing rechazados por cola llena', ('operacion',))
+
+
+@metricas.registrar_colector
+def _colector():
+    return [('bcrypt_en_curso', 'gauge', 'Pedidos de hashing en cola o calculándose', [({}, _en_curso)]),
+            ('bcrypt_cola_max', 'gauge', 'Máximo de pedidos de hashing en curso', [({}, BCRYPT_COLA_MAX)])]
+
+
+def _obtener_ejecutor():
+    """Ejecutor del proceso (se recrea tras un fork)"""
+    global _ejecutor, _ejecutor_pid
+    if _ejecutor is None or _ejecutor_pid != os.getpid():
+        with _lock:
+            if _ejecutor is None or _ejecutor_pid != os.getpid():
+                _ejecutor = ThreadPoolExecutor(max_workers=BCRYPT_HILOS, thread_name_prefix='bcrypt')
+                _ejecutor_pid = os.getpid()
+    return _ejecutor
+
+
+def _ejecutar(operacion, funcion, *args):
+    """Corre funcion(*args) en el ejecutor y espera el resultado"""
+    global _en_curso
+    if not _cupos.acquire(blocking=False):
+        bcrypt_rechazos.incrementar(operacion)
+        raise SistemaOcupado("Demasiados inicios de sesión simultáneos, intente nuevamente en unos segundos")
+
+    encolado = time.perf_counter()
+
+    def tarea():
+        inicio = time.perf_counter()
+        bcrypt_espera.observar(inicio - encolado, operacion)
+        try:
+            return funcion(*args)
+        finally:
+            metricas.bcrypt_latencia.observar(time.perf_counter() - inicio, operacion)
+
+    with _lock:
+        _en_curso += 1
+    liberar = True
+    try:
+        futuro = _obtener_ejecutor().submit(tarea)
+        liberar = False
+        futuro.add_done_callback(_liberar_cupo)
+        return futuro.result(timeout=BCRYPT_TIMEOUT)
+    except FuturoVencido:
+        bcrypt_rechazos.incrementar(operacion)
+        raise SistemaOcupado("El servidor está ocupado, intente nuevamente en unos segundos")
+    finally:
+        if liberar:
+            _liberar_cupo(None)
+
+
+def _liberar_cupo(_futuro):
+    """El cupo se libera cuando el hash termina, aunque quien lo pidió haya dejado de esperar"""
+    global _en_curso
+    with _lock:
+        _en_curso -= 1
+    _cupos.release()
+
+
+def hashear_password(password):
+    """Retorna el hash bcrypt de la contraseña con el costo configurado"""
+    sal = bcrypt.gensalt(rounds=BCRYPT_ROUNDS)
+    return _ejecutar('hash', bcrypt.hashpw, password.encode('utf-8'), sal).decode('utf-8')
+
+
+def verificar_password(password, hash_guardado):
+    """Verifica una contraseña contra su hash bcrypt"""
+    if not password or not hash_guardado:
+        return False
+    return _ejecutar('verificar', bcrypt.checkpw, password.encode('utf-8'), hash_guardado.encode('utf-8'))
+
+
+def hashear_passwords(passwords, ejecutor, rounds=None):
+    """
+    Hashea una lista de contraseñas en paralelo con `ejecutor` (un pool propio
+    de quien importa: no ocupa la cola de los inicios de sesión)
+    """
+    rounds = rounds or BCRYPT_ROUNDS_IMPORTACION
+
+    def hashear(password):
+        inicio = time.perf_counter()
+        hash_pass = bcrypt.hashpw(password.encode('utf-8'), bcrypt.gensalt(rounds=rounds)).decode('utf-8')
+        metricas.bcrypt_latencia.observar(time.perf_counter() - inicio, 'hash_lote')
+        return hash_pass
+
+    return list(ejecutor.map(hashear, passwords))
+
+
+def necesita_rehash(hash_guardado):
+    """True si el hash se generó con un costo distinto de BCRYPT_ROUNDS ('$2b$12$...')"""
+    try:
+        return int(hash_guardado.split('$')[2]) != BCRYPT_ROUNDS
+    except (AttributeError, IndexError, ValueError):
+        return True
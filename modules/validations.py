@@ -4,17 +4,13 @@
 Módulo de validaciones de reglas de negocio
 """
 
-from datetime import timedelta
 from db.connection import ejecutar_query
+from db.sentencias import ejecutar_sentencia
+from modules import sanciones_activas
 
 def validar_sancion(ci_participante):
     """Verifica si un participante tiene sanción activa"""
-    query = """
-        SELECT * FROM sancion_participante
-        WHERE ci_participante = %s
-        AND CURDATE() BETWEEN fecha_inicio AND fecha_fin
-    """
-    sancion = ejecutar_query(query, (ci_participante,), fetchone=True)
+    sancion = sanciones_activas.sancion_activa(ci_participante)
     
     if sancion:
         print(f"❌ El participante tiene sanción activa hasta {sancion['fecha_fin']}")
@@ -23,15 +19,7 @@ def validar_sancion(ci_participante):
 
 def validar_limite_horas_dia(ci_participante, fecha, id_turno):
     """Verifica límite de 2 horas por día"""
-    query = """
-        SELECT COUNT(*) as total
-        FROM reserva_participante rp
-        JOIN reserva r ON rp.id_reserva = r.id_reserva
-        WHERE rp.ci_participante = %s
-        AND r.fecha = %s
-        AND r.estado = 'activa'
-    """
-    resultado = ejecutar_query(query, (ci_participante, fecha), fetchone=True)
+    resultado = ejecutar_sentencia('reservas_activas_dia', (ci_participante, fecha), fetchone=True)
     
     if resultado and resultado['total'] >= 2:
         print("❌ El participante ya tiene 2 horas reservadas para este día (límite alcanzado)")
@@ -39,19 +27,8 @@ def validar_limite_horas_dia(ci_participante, fecha, id_turno):
     return True
 
 def validar_limite_reservas_semana(ci_participante, fecha):
-    """Verifica límite de 3 reservas activas por semana"""
-    fecha_inicio_semana = fecha - timedelta(days=fecha.weekday())
-    fecha_fin_semana = fecha_inicio_semana + timedelta(days=6)
-    
-    query = """
-        SELECT COUNT(DISTINCT r.id_reserva) as total
-        FROM reserva_participante rp
-        JOIN reserva r ON rp.id_reserva = r.id_reserva
-        WHERE rp.ci_participante = %s
-        AND r.fecha BETWEEN %s AND %s
-        AND r.estado = 'activa'
-    """
-    resultado = ejecutar_query(query, (ci_participante, fecha_inicio_semana, fecha_fin_semana), fetchone=True)
+    """Verifica límite de 3 reservas activas por semana (semana ISO de lunes a domingo)"""
+    resultado = ejecutar_sentencia('reservas_activas_semana', (ci_participante, fecha), fetchone=True)
     
     if resultado and resultado['total'] >= 3:
         print("❌ El participante ya tiene 3 reservas activas esta semana (límite alcanzado)")
@@ -86,18 +63,19 @@ def validar_capacidad_sala(nombre_sala, edificio, id_reserva, num_participantes)
     return True
 
 def es_usuario_privilegiado(ci_participante):
-    """Verifica si es docente o estudiante de posgrado"""
+    """Verifica si es docente o estudiante de posgrado en alguno de sus programas"""
     query = """
-        SELECT ppa.rol, pa.tipo
-        FROM participante_programa_academico ppa
-        JOIN programa_academico pa ON ppa.nombre_programa = pa.nombre_programa
-        WHERE ppa.ci_participante = %s
+        SELECT EXISTS(
+            SELECT 1
+            FROM participante_programa_academico ppa
+            JOIN programa_academico pa ON ppa.nombre_programa = pa.nombre_programa
+            WHERE ppa.ci_participante = %s
+            AND (ppa.rol = 'docente' OR pa.tipo = 'posgrado')
+        ) AS privilegiado
     """
     resultado = ejecutar_query(query, (ci_participante,), fetchone=True)
     
-    if resultado:
-        return resultado['rol'] == 'docente' or resultado['tipo'] == 'posgrado'
-    return False
+    return bool(resultado and resultado['privilegiado'])
 
 def sala_compatible_usuario(nombre_sala, edificio, ci_participante):
     """Verifica si el usuario puede usar el tipo de sala"""
@@ -0,0 +1,57 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Archivado de reservas: mueve los períodos académicos cerrados al histórico
+
+Las reservas ya cerradas (no 'activa') con fecha anterior a --hasta pasan de
+reserva / reserva_participante a reserva_historico /
+reserva_participante_historico. Los reportes siguen leyéndolas si se pide el
+histórico (?historico=1). Se puede correr más de una vez.
+
+Uso:
+    python scripts/archivar_reservas.py --hasta AAAA-MM-DD [--lote 1000] [--simular]
+
+Programación sugerida: al terminar cada semestre, con --hasta igual a la fecha
+de inicio del semestre nuevo, después del cierre nocturno.
+"""
+
+import argparse
+import os
+import sys
+import time
+from datetime import date
+
+RAIZ = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, RAIZ)
+
+from modules import archivado
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--hasta', type=date.fromisoformat, required=True,
+                        help='archivar reservas con fecha anterior a esta (fin del período cerrado)')
+    parser.add_argument('--lote', type=int, default=archivado.LOTE, help='reservas por transacción')
+    parser.add_argument('--simular', action='store_true', help='solo contar lo que se archivaría')
+    args = parser.parse_args()
+
+    if args.simular:
+        conteo = archivado.pendientes(args.hasta)
+        if conteo is None:
+            return 1
+        cantidad, desde, hasta = conteo
+        if cantidad:
+            print(f"📋 Para archivar: {cantidad} reservas, del {desde} al {hasta}")
+        else:
+            print("📋 No hay reservas para archivar")
+        return 0
+
+    inicio = time.perf_counter()
+    exito, mensaje, resultado = archivado.archivar_reservas(args.hasta, args.lote)
+    print(f"{'✅' if exito else '❌'} {mensaje} ({resultado['lotes']} lotes, "
+          f"{time.perf_counter() - inicio:.1f}s)")
+    return 0 if exito else 1
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,55 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Cierre nocturno: finaliza las reservas de días anteriores y sanciona inasistencias
+
+Las reservas activas con fecha anterior a --hasta (hoy por defecto) pasan a
+'sin asistencia' si todos sus participantes quedaron marcados ausentes (y
+estos reciben la sanción automática) o a 'finalizada' en cualquier otro caso,
+incluida la asistencia no registrada.
+Se puede correr más de una vez: lo ya cerrado no se vuelve a tocar.
+
+Uso:
+    python scripts/cierre_nocturno.py [--hasta AAAA-MM-DD] [--lote 500] [--simular]
+
+Programación sugerida (cron, después del último turno):
+    15 0 * * *  cd /app && python scripts/cierre_nocturno.py >> logs/cierre.log 2>&1
+"""
+
+import argparse
+import os
+import sys
+import time
+from datetime import date
+
+RAIZ = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, RAIZ)
+
+from modules import cierre
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--hasta', type=date.fromisoformat, default=None,
+                        help='cerrar reservas con fecha anterior a esta (por defecto hoy)')
+    parser.add_argument('--lote', type=int, default=cierre.LOTE, help='reservas por transacción')
+    parser.add_argument('--simular', action='store_true', help='solo contar lo que se cerraría')
+    args = parser.parse_args()
+
+    if args.simular:
+        conteo = cierre.pendientes(args.hasta)
+        if conteo is None:
+            return 1
+        print(f"📋 Pendientes de cierre: {conteo['finalizada']} a finalizar, "
+              f"{conteo['sin asistencia']} sin asistencia")
+        return 0
+
+    inicio = time.perf_counter()
+    exito, mensaje, resultado = cierre.cerrar_reservas(args.hasta, args.lote)
+    print(f"{'✅' if exito else '❌'} {mensaje} ({resultado['lotes']} lotes, "
+          f"{time.perf_counter() - inicio:.1f}s)")
+    return 0 if exito else 1
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,54 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Verificación y reconstrucción del libro de cuotas por participante
+
+Compara cuota_participante_dia / cuota_participante_semana con las reservas
+activas y, con --reconstruir, los recalcula desde cero en una transacción.
+
+Uso:
+    python scripts/cuotas.py [--ci CI] [--reconstruir] [-v]
+"""
+
+import argparse
+import os
+import sys
+
+RAIZ = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, RAIZ)
+
+from modules import cuotas
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--ci', help='solo el libro de este participante')
+    parser.add_argument('--reconstruir', action='store_true',
+                        help='recalcular el libro desde las reservas (si no, solo verificar)')
+    parser.add_argument('-v', '--verbose', action='store_true', help='listar todas las diferencias')
+    args = parser.parse_args()
+
+    if args.reconstruir:
+        exito, mensaje = cuotas.reconstruir_libro(args.ci)
+        print(f"{'✅' if exito else '❌'} {mensaje}")
+        if not exito:
+            return 1
+
+    diferencias = cuotas.verificar_libro(args.ci)
+    if diferencias is None:
+        return 1
+    if not diferencias:
+        print("✅ El libro de cuotas coincide con las reservas activas")
+        return 0
+
+    print(f"❌ {len(diferencias)} diferencias en el libro de cuotas")
+    for tabla, ci, periodo, en_libro, esperado in diferencias[:None if args.verbose else 20]:
+        print(f"   {tabla:<28} {ci:<12} {str(periodo):<12} libro={en_libro} esperado={esperado}")
+    if not args.verbose and len(diferencias) > 20:
+        print("   ... (-v para ver todas)")
+    print("   Reparar con: python scripts/cuotas.py --reconstruir")
+    return 1
+
+
+if __name__ == '__main__':
+    sys.exit(main())
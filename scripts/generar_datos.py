@@ -0,0 +1,437 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Generador de datos sintéticos para pruebas de rendimiento
+
+Genera facultades, programas, participantes (con login), edificios, salas,
+reservas con sus participantes y sanciones a escala configurable. Las
+reservas siguen la demanda de un año lectivo: picos en parciales y
+exámenes, poca actividad en verano y fines de semana, más demanda en los
+turnos de la tarde.
+
+Todo sale de random.Random(semilla): con los mismos argumentos (incluidas
+--hoy y --hasta) se generan exactamente los mismos datos.
+
+Las filas se cargan con INSERT de muchas filas por sentencia o, con
+--metodo load, con LOAD DATA LOCAL INFILE (requiere local_infile=ON en el
+servidor). Las reservas se generan día por día y se escriben por lotes:
+la memoria no crece con la cantidad de reservas.
+
+Los límites por participante (2 por día, 3 por semana) no se fuerzan: la
+población se dimensiona para que la carga por persona sea realista.
+
+Uso:
+    python scripts/generar_datos.py --participantes 10000 --reservas 2000000 --anios 5
+    python scripts/generar_datos.py --limpiar --semilla 7 --hasta 2025-12-31
+"""
+
+import argparse
+import csv
+import math
+import os
+import random
+import sys
+import tempfile
+import time
+from datetime import date, datetime, timedelta
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import mysql.connector
+from mysql.connector import Error
+from db.connection import DB_CONFIG
+from modules import cuotas
+
+# Hash bcrypt de 'password123' (el mismo que usa sql/insert_data.sql):
+# hashear cada contraseña haría que generar 10k usuarios tarde minutos
+HASH_PASSWORD = '$2b$12$LQv3c1yqBWVHxkd0LHAkCOYz6TtxMQJqhN8/LewY5GyYILSa8jW8u'
+
+BASE_CI = 90000000
+DOMINIO_CORREO = 'gen.uni.edu'
+
+NOMBRES = [
+    'Juan', 'María', 'Carlos', 'Ana', 'Luis', 'Sofía', 'Pedro', 'Laura', 'Diego', 'Lucía',
+    'Martín', 'Valentina', 'Federico', 'Camila', 'Santiago', 'Florencia', 'Nicolás', 'Agustina',
+    'Matías', 'Micaela', 'Gonzalo', 'Carolina', 'Andrés', 'Natalia', 'Pablo', 'Victoria',
+    'Joaquín', 'Paula', 'Rodrigo', 'Jimena', 'Facundo', 'Romina', 'Ignacio', 'Belén',
+]
+APELLIDOS = [
+    'Pérez', 'Gómez', 'Rodríguez', 'Martínez', 'Fernández', 'López', 'Sánchez', 'García',
+    'González', 'Silva', 'Pereira', 'Díaz', 'Sosa', 'Núñez', 'Cabrera', 'Castro', 'Suárez',
+    'Ramírez', 'Acosta', 'Méndez', 'Olivera', 'Benítez', 'Romero', 'Álvarez', 'Ferreira',
+    'Techera', 'Moreira', 'Viera', 'Correa', 'Cardozo', 'Da Silva', 'De León',
+]
+AREAS = [
+    ('Arquitectura', ['Arquitectura', 'Diseño Industrial', 'Urbanismo']),
+    ('Ciencias Económicas', ['Contador Público', 'Economía', 'Administración']),
+    ('Química', ['Química', 'Ingeniería Química', 'Bioquímica']),
+    ('Humanidades', ['Historia', 'Letras', 'Filosofía']),
+    ('Agronomía', ['Agronomía', 'Ingeniería Forestal']),
+    ('Ciencias', ['Matemática', 'Física', 'Biología']),
+    ('Comunicación', ['Comunicación', 'Periodismo']),
+    ('Odontología', ['Odontología', 'Asistente Odontológico']),
+    ('Enfermería', ['Enfermería', 'Obstetricia']),
+    ('Artes', ['Artes Plásticas', 'Música']),
+]
+DEPARTAMENTOS = ['Montevideo', 'Canelones', 'Maldonado', 'Salto', 'Paysandú']
+
+# Demanda relativa por mes (año lectivo: parciales en mayo-junio y
+# octubre-noviembre, exámenes en julio y diciembre, receso en verano)
+FACTOR_MES = {1: 0.10, 2: 0.20, 3: 0.70, 4: 0.85, 5: 1.00, 6: 1.20,
+              7: 1.10, 8: 0.75, 9: 0.85, 10: 1.00, 11: 1.25, 12: 0.90}
+FACTOR_DIA_SEMANA = [1.0, 1.0, 1.0, 0.95, 0.80, 0.25, 0.05]
+
+
+# ============= ESCRITURA =============
+
+class Cargador:
+    """Escribe filas en lotes con INSERT de muchas filas o LOAD DATA LOCAL INFILE"""
+
+    def __init__(self, conn, metodo, lote):
+        self.conn = conn
+        self.metodo = metodo
+        self.lote = lote
+        self._pendientes = {}  # tabla -> (columnas, filas)
+        self.totales = {}
+
+    def agregar(self, tabla, columnas, fila):
+        _, filas = self._pendientes.setdefault(tabla, (columnas, []))
+        filas.append(fila)
+        if len(filas) >= self.lote:
+            self.vaciar(tabla)
+
+    def vaciar(self, tabla=None):
+        tablas = [tabla] if tabla else list(self._pendientes)
+        for t in tablas:
+            columnas, filas = self._pendientes.get(t, (None, []))
+            if not filas:
+                continue
+            if self.metodo == 'load':
+                self._load_data(t, columnas, filas)
+            else:
+                self._insert(t, columnas, filas)
+            self.totales[t] = self.totales.get(t, 0) + len(filas)
+            filas.clear()
+        self.conn.commit()
+
+    def _insert(self, tabla, columnas, filas):
+        fila_sql = '(' + ', '.join(['%s'] * len(columnas)) + ')'
+        query = f"INSERT INTO {tabla} ({', '.join(columnas)}) VALUES " + ', '.join([fila_sql] * len(filas))
+        cursor = self.conn.cursor()
+        cursor.execute(query, [v for fila in filas for v in fila])
+        cursor.close()
+
+    def _load_data(self, tabla, columnas, filas):
+        with tempfile.NamedTemporaryFile('w', suffix='.csv', encoding='utf-8',
+                                         newline='', delete=False) as f:
+            escritor = csv.writer(f, lineterminator='\n')
+            for fila in filas:
+                # Con ESCAPED BY '' el NULL se escribe como la palabra NULL sin comillas
+                escritor.writerow(['NULL' if v is None else v for v in fila])
+            ruta = f.name
+        try:
+            cursor = self.conn.cursor()
+            cursor.execute(f"""
+                LOAD DATA LOCAL INFILE %s INTO TABLE {tabla}
+                CHARACTER SET utf8mb4
+                FIELDS TERMINATED BY ',' OPTIONALLY ENCLOSED BY '"' ESCAPED BY ''
+                LINES TERMINATED BY '\\n'
+                ({', '.join(columnas)})
+            """, (ruta,))
+            cursor.close()
+        finally:
+            os.unlink(ruta)
+
+
+# ============= GENERACIÓN =============
+
+def generar_catalogo(rng, args, cargador, conn):
+    """Facultades, programas y edificios/salas; retorna (programas, salas)"""
+    cursor = conn.cursor()
+    cursor.execute("SELECT COALESCE(MAX(id_facultad), 0) FROM facultad")
+    id_facultad = cursor.fetchone()[0]
+    cursor.close()
+
+    programas = []  # (nombre, tipo, id_facultad)
+    for i in range(args.facultades):
+        area, carreras = AREAS[i % len(AREAS)]
+        sufijo = f" {i // len(AREAS) + 1}" if i >= len(AREAS) else ''
+        id_facultad += 1
+        cargador.agregar('facultad', ('id_facultad', 'nombre'),
+                         (id_facultad, f"Facultad de {area}{sufijo}"))
+        for carrera in carreras:
+            programas.append((f"Licenciatura en {carrera}{sufijo}", 'grado', id_facultad))
+        programas.append((f"Maestría en {area}{sufijo}", 'posgrado', id_facultad))
+        if rng.random() < 0.5:
+            programas.append((f"Doctorado en {area}{sufijo}", 'posgrado', id_facultad))
+    cargador.vaciar('facultad')
+    for nombre, tipo, facultad in programas:
+        cargador.agregar('programa_academico', ('nombre_programa', 'id_facultad', 'tipo'),
+                         (nombre, facultad, tipo))
+    cargador.vaciar('programa_academico')
+
+    salas = []  # (nombre_sala, edificio, capacidad, tipo_sala)
+    por_edificio = math.ceil(args.salas / args.edificios)
+    for e in range(args.edificios):
+        edificio = f"Edificio G{e + 1:02d}"
+        cargador.agregar('edificio', ('nombre_edificio', 'direccion', 'departamento'),
+                         (edificio, f"Calle {rng.choice(APELLIDOS)} {rng.randint(100, 3999)}",
+                          rng.choice(DEPARTAMENTOS)))
+        for s in range(min(por_edificio, args.salas - len(salas))):
+            tipo = rng.choices(['libre', 'posgrado', 'docente'], weights=[70, 15, 15])[0]
+            capacidad = rng.choice([4, 4, 6, 6, 6, 8, 8, 10, 12, 20, 30])
+            salas.append((f"Sala {s // 10 + 1}{s % 10:02d}", edificio, capacidad, tipo))
+    cargador.vaciar('edificio')
+    for sala in salas:
+        cargador.agregar('sala', ('nombre_sala', 'edificio', 'capacidad', 'tipo_sala'), sala)
+    cargador.vaciar('sala')
+    return programas, salas
+
+
+def generar_participantes(rng, args, cargador, programas):
+    """Participantes, login y programas; retorna {'libre': [...], 'posgrado': [...], 'docente': [...]}"""
+    grado = [p for p in programas if p[1] == 'grado']
+    posgrado = [p for p in programas if p[1] == 'posgrado']
+    pool = {'libre': [], 'posgrado': [], 'docente': []}
+
+    for i in range(args.participantes):
+        ci = str(BASE_CI + i)
+        nombre = rng.choice(NOMBRES)
+        apellido = rng.choice(APELLIDOS)
+        correo = f"{nombre.lower()}.{apellido.lower().replace(' ', '')}.{i}@{DOMINIO_CORREO}"
+        cargador.agregar('participante', ('ci', 'nombre', 'apellido', 'email'),
+                         (ci, nombre, apellido, correo))
+        cargador.agregar('login', ('correo', 'contrasena'), (correo, HASH_PASSWORD))
+
+        sorteo = rng.random()
+        if sorteo < 0.08:
+            rol, programa = 'docente', rng.choice(programas)
+            pool['docente'].append(ci)
+        elif sorteo < 0.20 and posgrado:
+            rol, programa = 'alumno', rng.choice(posgrado)
+            pool['posgrado'].append(ci)
+        else:
+            rol, programa = 'alumno', rng.choice(grado)
+        pool['libre'].append(ci)
+        cargador.agregar('participante_programa_academico',
+                         ('ci_participante', 'nombre_programa', 'rol'), (ci, programa[0], rol))
+
+    for tabla in ('participante', 'login', 'participante_programa_academico'):
+        cargador.vaciar(tabla)
+    return pool
+
+
+def peso_dia(dia):
+    return FACTOR_MES[dia.month] * FACTOR_DIA_SEMANA[dia.weekday()]
+
+
+def generar_reservas(rng, args, cargador, conn, salas, turnos, pool):
+    """Reservas, participantes y sanciones por falta de asistencia"""
+    hasta = args.hasta
+    desde = hasta - timedelta(days=int(365.25 * args.anios))
+    hoy = args.hoy
+    dias = [desde + timedelta(days=d) for d in range((hasta - desde).days + 1)]
+    pesos = [peso_dia(d) for d in dias]
+    total_peso = sum(pesos)
+
+    # Demanda por turno: baja temprano y de noche, pico a media tarde
+    n_turnos = len(turnos)
+    peso_turno = [0.4 + math.sin(math.pi * (t + 0.5) / n_turnos) for t in range(n_turnos)]
+    total_turno = sum(peso_turno)
+    # Algunas salas son mucho más populares que otras
+    peso_sala = [rng.paretovariate(2.0) for _ in salas]
+
+    cursor = conn.cursor()
+    cursor.execute("SELECT (SELECT COALESCE(MAX(id_reserva), 0) FROM reserva), "
+                   "(SELECT COALESCE(MAX(id_sancion), 0) FROM sancion_participante)")
+    id_reserva, id_sancion = cursor.fetchone()
+    cursor.close()
+
+    columnas_reserva = ('id_reserva', 'nombre_sala', 'edificio', 'fecha', 'id_turno', 'estado')
+    columnas_rp = ('ci_participante', 'id_reserva', 'fecha_solicitud_reserva', 'asistencia')
+    columnas_sancion = ('id_sancion', 'ci_participante', 'fecha_inicio', 'fecha_fin')
+
+    generadas = 0
+    arrastre = 0.0
+    inicio = time.monotonic()
+    for dia, peso in zip(dias, pesos):
+        esperado = args.reservas * peso / total_peso + arrastre
+        cantidad = min(int(esperado), len(salas) * n_turnos)
+        arrastre = esperado - cantidad
+
+        for t, id_turno in enumerate(turnos):
+            k = min(int(len(salas) * 0.8), round(cantidad * peso_turno[t] / total_turno))
+            if not k:
+                continue
+            elegidas = set()
+            while len(elegidas) < k:
+                elegidas.update(rng.choices(range(len(salas)), weights=peso_sala, k=k - len(elegidas)))
+
+            for indice in sorted(elegidas):
+                nombre_sala, edificio, capacidad, tipo_sala = salas[indice]
+                id_reserva += 1
+                if dia < hoy:
+                    estado = rng.choices(['finalizada', 'sin asistencia', 'cancelada'], weights=[70, 12, 18])[0]
+                elif dia == hoy:
+                    estado = 'activa'
+                else:
+                    estado = rng.choices(['activa', 'cancelada'], weights=[92, 8])[0]
+                cargador.agregar('reserva', columnas_reserva,
+                                 (id_reserva, nombre_sala, edificio, dia, id_turno, estado))
+
+                candidatos = pool[tipo_sala] or pool['libre']
+                n = min(capacidad, len(candidatos), rng.choices([1, 2, 3, 4, 6], weights=[35, 30, 18, 12, 5])[0])
+                integrantes = rng.sample(candidatos, n)
+                solicitud = datetime.combine(dia - timedelta(days=rng.randint(0, 14)), datetime.min.time()) \
+                    + timedelta(minutes=rng.randint(8 * 60, 22 * 60))
+                for j, ci in enumerate(integrantes):
+                    if estado == 'finalizada':
+                        # Al menos uno asistió
+                        asistencia = 1 if j == 0 or rng.random() < 0.85 else 0
+                    elif estado == 'sin asistencia':
+                        asistencia = 0
+                    else:
+                        asistencia = None
+                    cargador.agregar('reserva_participante', columnas_rp,
+                                     (ci, id_reserva, solicitud, asistencia))
+
+                    if estado == 'sin asistencia' and rng.random() < args.prob_sancion:
+                        id_sancion += 1
+                        fin = dia + timedelta(days=60)
+                        cargador.agregar('sancion_participante', columnas_sancion,
+                                         (id_sancion, ci, dia + timedelta(days=1), fin))
+                generadas += 1
+
+        if dia.day == 1 and dia.month == 1:
+            print(f"   {dia.year}: {generadas:,} reservas ({time.monotonic() - inicio:.0f}s)")
+
+    cargador.vaciar()
+    return generadas
+
+
+# ============= MAIN =============
+
+def limpiar(conn):
+    """Vacía todas las tablas de datos (conserva turnos y contadores de versión)"""
+    cursor = conn.cursor()
+    cursor.execute("SET FOREIGN_KEY_CHECKS = 0")
+    for tabla in ('cuota_participante_dia', 'cuota_participante_semana',
+                  'reserva_participante', 'sancion_participante', 'reserva',
+                  'reserva_participante_historico', 'reserva_historico',
+                  'participante_programa_academico', 'participante', 'login',
+                  'sala', 'edificio', 'programa_academico', 'facultad'):
+        cursor.execute(f"TRUNCATE TABLE {tabla}")
+    cursor.execute("SET FOREIGN_KEY_CHECKS = 1")
+    cursor.close()
+
+
+def obtener_turnos(conn):
+    cursor = conn.cursor()
+    cursor.execute("SELECT id_turno FROM turno ORDER BY hora_inicio")
+    turnos = [fila[0] for fila in cursor.fetchall()]
+    if not turnos:
+        cursor.executemany(
+            "INSERT INTO turno (hora_inicio, hora_fin) VALUES (%s, %s)",
+            [(f"{h:02d}:00:00", f"{h + 1:02d}:00:00") for h in range(8, 23)]
+        )
+        conn.commit()
+        cursor.execute("SELECT id_turno FROM turno ORDER BY hora_inicio")
+        turnos = [fila[0] for fila in cursor.fetchall()]
+    cursor.close()
+    return turnos
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--semilla', type=int, default=42)
+    parser.add_argument('--participantes', type=int, default=10000)
+    parser.add_argument('--reservas', type=int, default=200000)
+    parser.add_argument('--anios', type=float, default=5)
+    parser.add_argument('--hasta', type=date.fromisoformat, default=None,
+                        help='última fecha con reservas (por defecto --hoy + 30 días)')
+    parser.add_argument('--hoy', type=date.fromisoformat, default=date.today(),
+                        help='fecha que separa reservas pasadas (finalizadas/sin asistencia) de futuras (activas)')
+    parser.add_argument('--facultades', type=int, default=8)
+    parser.add_argument('--edificios', type=int, default=8)
+    parser.add_argument('--salas', type=int, default=60,
+                        help='mínimo de salas; se agregan más si no alcanzan para las reservas pedidas')
+    parser.add_argument('--prob-sancion', type=float, default=0.5,
+                        help='probabilidad de sancionar a cada participante de una reserva sin asistencia')
+    parser.add_argument('--metodo', choices=['insert', 'load'], default='insert')
+    parser.add_argument('--lote', type=int, default=5000, help='filas por sentencia / archivo')
+    parser.add_argument('--limpiar', action='store_true',
+                        help='vaciar las tablas de datos antes de generar (¡borra todo!)')
+    args = parser.parse_args()
+    if args.hasta is None:
+        args.hasta = args.hoy + timedelta(days=30)
+
+    # Cada (sala, fecha, turno) admite una sola reserva: dimensionar las
+    # salas para que la ocupación promedio no pase del 60% (en los picos
+    # se llega al 80% de las salas por turno)
+    dias = int(365.25 * args.anios) + 1
+    turnos_estimados = 15
+    necesarias = math.ceil(args.reservas / (dias * turnos_estimados * 0.6))
+    if necesarias > args.salas:
+        print(f"ℹ️ {args.salas} salas no alcanzan para {args.reservas:,} reservas: se usan {necesarias}")
+        args.salas = necesarias
+    args.edificios = min(args.edificios, args.salas)
+
+    rng = random.Random(args.semilla)
+    try:
+        conn = mysql.connector.connect(**DB_CONFIG, allow_local_infile=args.metodo == 'load')
+    except Error as e:
+        print(f"❌ Error al conectar a MySQL: {e}")
+        return 1
+
+    try:
+        cursor = conn.cursor()
+        # Carga masiva: los datos generados ya son consistentes
+        cursor.execute("SET SESSION unique_checks = 0")
+        cursor.execute("SET SESSION foreign_key_checks = 0")
+        cursor.close()
+
+        if args.limpiar:
+            print("🧹 Vaciando tablas de datos...")
+            limpiar(conn)
+
+        turnos = obtener_turnos(conn)
+        cargador = Cargador(conn, args.metodo, args.lote)
+
+        print("🏛️ Generando catálogo...")
+        programas, salas = generar_catalogo(rng, args, cargador, conn)
+        print(f"👥 Generando {args.participantes:,} participantes...")
+        pool = generar_participantes(rng, args, cargador, programas)
+        print(f"📅 Generando {args.reservas:,} reservas entre "
+              f"{args.hasta - timedelta(days=int(365.25 * args.anios))} y {args.hasta}...")
+        generadas = generar_reservas(rng, args, cargador, conn, salas, turnos, pool)
+
+        # La carga masiva no pasa por las escrituras que mantienen el libro de cuotas
+        print("📒 Reconstruyendo el libro de cuotas...")
+        cursor = conn.cursor()
+        cuotas.reconstruir(cursor)
+        conn.commit()
+
+        # Invalidar las cachés en memoria de los procesos que estén corriendo
+        cursor.execute("UPDATE version_cache SET version = version + 1")
+        cursor.execute("ANALYZE TABLE reserva, reserva_participante, participante, sancion_participante, "
+                       "cuota_participante_dia, cuota_participante_semana, reserva_historico, reserva_participante_historico")
+        cursor.fetchall()
+        cursor.close()
+        conn.commit()
+    except Error as e:
+        conn.rollback()
+        print(f"❌ Error generando datos: {e}")
+        return 1
+    finally:
+        conn.close()
+
+    print(f"\n✅ {generadas:,} reservas generadas")
+    for tabla, total in cargador.totales.items():
+        print(f"   {tabla:<35} {total:>12,}")
+    print(f"\nPara reproducir: --semilla {args.semilla} --hoy {args.hoy} --hasta {args.hasta} "
+          f"--participantes {args.participantes} --reservas {args.reservas} --anios {args.anios}")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
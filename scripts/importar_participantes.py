@@ -0,0 +1,55 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Importación masiva de participantes desde un CSV
+
+Columnas (con encabezado): ci, nombre, apellido, email, password, programa, rol
+Las filas con errores se informan por línea y no frenan al resto.
+
+Uso:
+    python scripts/importar_participantes.py cohorte.csv [--lote 500] [--hilos 8] [--errores errores.csv]
+"""
+
+import argparse
+import csv
+import os
+import sys
+import time
+
+RAIZ = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, RAIZ)
+
+from modules import importacion
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('archivo', help='CSV a importar')
+    parser.add_argument('--lote', type=int, default=importacion.LOTE, help='filas por INSERT y por commit')
+    parser.add_argument('--hilos', type=int, default=None, help='hilos para el hash de contraseñas')
+    parser.add_argument('--errores', help='escribir el reporte de errores completo en este CSV')
+    args = parser.parse_args()
+
+    inicio = time.perf_counter()
+    with open(args.archivo, encoding='utf-8-sig', newline='') as f:
+        exito, mensaje, reporte = importacion.importar_participantes(f, lote=args.lote, hilos=args.hilos)
+    segundos = time.perf_counter() - inicio
+
+    print(f"{'✅' if exito else '❌'} {mensaje} en {segundos:.1f}s")
+    for linea, ci, error in reporte.errores[:20]:
+        print(f"   línea {linea:<7} {ci:<12} {error}")
+    if reporte.total_errores > 20:
+        print(f"   ... ({reporte.total_errores - 20} errores más)")
+
+    if args.errores and reporte.errores:
+        with open(args.errores, 'w', encoding='utf-8', newline='') as f:
+            escritor = csv.writer(f)
+            escritor.writerow(['linea', 'ci', 'error'])
+            escritor.writerows(reporte.errores)
+        print(f"   Reporte de errores: {args.errores}")
+
+    return 0 if exito and not reporte.total_errores else 1
+
+
+if __name__ == '__main__':
+    sys.exit(main())
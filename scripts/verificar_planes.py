@@ -0,0 +1,311 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Verificación de planes de ejecución de todas las sentencias SQL del proyecto
+
+Recolecta las sentencias de db/*.py, modules/*.py, app.py y
+sql/consultas_reportes.sql, ejecuta EXPLAIN FORMAT=JSON sobre una base con
+datos (ver scripts/generar_datos.py) y falla si alguna hace un recorrido
+completo, un filesort o una tabla temporal sobre más filas que el umbral.
+
+Uso:
+    python scripts/verificar_planes.py [--umbral 1000] [-v]
+"""
+
+import argparse
+import ast
+import glob
+import json
+import os
+import re
+import sys
+
+RAIZ = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, RAIZ)
+
+from mysql.connector import Error
+from db.connection import obtener_pool
+
+ARCHIVOS_PY = ['db/*.py', 'modules/*.py', 'app.py']
+ARCHIVO_REPORTES = 'sql/consultas_reportes.sql'
+
+# Sentencias que recorren tablas completas a propósito. Para estas solo se
+# verifica que los JOIN usen índices (un recorrido completo de la tabla
+# interna de un JOIN multiplica filas y nunca es aceptable).
+PERMITIDAS = {
+    'sql/consultas_reportes.sql': 'reportes BI: agregan toda la historia (se sirven desde la caché de reportes)',
+    'modules/reportes.py': 'reportes BI de consola: agregan toda la historia',
+    'modules/exportacion.py': 'exportación completa en streaming por clave primaria',
+    'modules/disponibilidad.py:_cargar_catalogo': 'catálogo completo de salas y turnos (tablas chicas)',
+    'modules/participantes.py:obtener_participantes': 'listado completo para desplegables',
+    'modules/sanciones.py:obtener_sanciones': 'listado completo (CLI)',
+    'modules/sanciones.py:obtener_estadisticas_sanciones': 'estadísticas globales de sanciones',
+    'app.py:admin_dashboard': 'conteos globales del dashboard',
+    'modules/cuotas.py': 'reconstrucción/verificación del libro de cuotas: recorren todas las reservas activas',
+    'modules/archivado.py': 'archivado: recorre por fecha los períodos ya cerrados',
+}
+
+# Sustitución de las partes dinámicas de los f-strings y de los campos de
+# str.format (las demás se omiten: las condiciones opcionales quedan vacías,
+# como en la primera página de la paginación)
+SUSTITUCIONES_FSTRING = {
+    'marcas': '%s',
+    'marcas_pares': '(%s, %s)',
+    'casos': 'WHEN ci_participante = %s AND id_reserva = %s THEN %s',
+}
+
+# Columnas que se reconocen antes de un placeholder para elegir un valor de ejemplo
+COLUMNAS_EJEMPLO = [
+    'ci_participante', 'ci_creador', 'ci', 'correo', 'email', 'nombre_sala', 'edificio',
+    'nombre_edificio', 'id_reserva', 'id_turno', 'id_sancion', 'nombre_programa',
+    'fecha_inicio', 'fecha_fin', 'fecha', 'estado', 'asistencia', 'rol', 'nombre',
+    'LIMIT',
+]
+
+RE_SQL = re.compile(r'^\s*(SELECT|UPDATE|DELETE|INSERT\s+INTO\s+\w+\s*(?:\([^)]*\))?\s*SELECT|WITH)\b',
+                    re.IGNORECASE | re.DOTALL)
+RE_PLACEHOLDER = re.compile(r'%\((\w+)\)s|%s')
+RE_CAMPO_FORMAT = re.compile(r'\{(\w+)\}')
+
+
+# ============= RECOLECCIÓN =============
+
+class _Recolector(ast.NodeVisitor):
+    """Junta los literales SQL de un archivo Python con la función que los contiene"""
+
+    def __init__(self, archivo):
+        self.archivo = archivo
+        self.funciones = []
+        self.sentencias = []
+
+    def visit_FunctionDef(self, nodo):
+        self.funciones.append(nodo.name)
+        self.generic_visit(nodo)
+        self.funciones.pop()
+
+    visit_AsyncFunctionDef = visit_FunctionDef
+
+    def _agregar(self, sql, linea):
+        if RE_SQL.match(sql):
+            funcion = self.funciones[-1] if self.funciones else ''
+            self.sentencias.append((f"{self.archivo}:{funcion}" if funcion else self.archivo,
+                                    f"{self.archivo}:{linea}", sql))
+
+    def visit_Constant(self, nodo):
+        if isinstance(nodo.value, str):
+            sql = RE_CAMPO_FORMAT.sub(lambda m: SUSTITUCIONES_FSTRING.get(m.group(1), ''), nodo.value)
+            self._agregar(sql, nodo.lineno)
+
+    def visit_JoinedStr(self, nodo):
+        partes = []
+        for valor in nodo.values:
+            if isinstance(valor, ast.Constant):
+                partes.append(str(valor.value))
+            else:
+                nombre = ast.unparse(valor.value) if hasattr(ast, 'unparse') else ''
+                partes.append(SUSTITUCIONES_FSTRING.get(nombre, ''))
+        self._agregar(''.join(partes), nodo.lineno)
+
+
+def sentencias_python():
+    sentencias = []
+    for patron in ARCHIVOS_PY:
+        for ruta in sorted(glob.glob(os.path.join(RAIZ, patron))):
+            archivo = os.path.relpath(ruta, RAIZ)
+            with open(ruta, encoding='utf-8') as f:
+                arbol = ast.parse(f.read(), archivo)
+            recolector = _Recolector(archivo)
+            recolector.visit(arbol)
+            sentencias.extend(recolector.sentencias)
+    return sentencias
+
+
+def sentencias_reportes():
+    with open(os.path.join(RAIZ, ARCHIVO_REPORTES), encoding='utf-8') as f:
+        contenido = f.read()
+    sentencias = []
+    for bloque in contenido.split(';'):
+        lineas = [l for l in bloque.split('\n') if l.strip() and not l.strip().startswith('--')]
+        sql = '\n'.join(lineas)
+        if RE_SQL.match(sql):
+            numero = re.findall(r'CONSULTA (?:ADICIONAL )?(\d+)', bloque)
+            ubicacion = f"{ARCHIVO_REPORTES}#{numero[-1] if numero else '?'}"
+            sentencias.append((ARCHIVO_REPORTES, ubicacion, sql))
+    return sentencias
+
+
+# ============= PARÁMETROS DE EJEMPLO =============
+
+def valores_ejemplo(cursor):
+    """Valores reales de la base para completar los placeholders"""
+    def uno(query):
+        cursor.execute(query)
+        fila = cursor.fetchone()
+        return fila or {}
+
+    rp = uno("SELECT ci_participante, id_reserva FROM reserva_participante LIMIT 1")
+    sala = uno("SELECT nombre_sala, edificio FROM sala LIMIT 1")
+    login = uno("SELECT correo FROM login LIMIT 1")
+    sancion = uno("SELECT id_sancion FROM sancion_participante LIMIT 1")
+    turno = uno("SELECT id_turno FROM turno LIMIT 1")
+    programa = uno("SELECT nombre_programa FROM programa_academico LIMIT 1")
+    cursor.execute("SELECT CURDATE() as hoy")
+    hoy = cursor.fetchone()['hoy']
+
+    ci = rp.get('ci_participante', '0')
+    return {
+        'ci_participante': ci, 'ci_creador': ci, 'ci': ci,
+        'correo': login.get('correo', ''), 'email': login.get('correo', ''),
+        'nombre_sala': sala.get('nombre_sala', ''), 'edificio': sala.get('edificio', ''),
+        'nombre_edificio': sala.get('edificio', ''),
+        'id_reserva': rp.get('id_reserva', 1), 'id_turno': turno.get('id_turno', 1),
+        'id_sancion': sancion.get('id_sancion', 1),
+        'nombre_programa': programa.get('nombre_programa', ''),
+        'fecha_inicio': hoy, 'fecha_fin': hoy, 'fecha': hoy,
+        'inicio_semana': hoy, 'fin_semana': hoy,
+        'estado': 'activa', 'asistencia': 1, 'rol': 'alumno', 'nombre': 'reserva',
+        'LIMIT': 50,
+    }
+
+
+def completar_parametros(sql, ejemplos):
+    """Arma los parámetros según la columna que precede a cada placeholder"""
+    nombrados = {}
+    posicionales = []
+    for m in RE_PLACEHOLDER.finditer(sql):
+        if m.group(1):
+            nombre = m.group(1)
+            nombrados[nombre] = ejemplos.get(nombre, ejemplos.get(nombre.split('_')[0], 1))
+            continue
+        contexto = sql[max(0, m.start() - 120):m.start()]
+        mejor, posicion = None, -1
+        for columna in COLUMNAS_EJEMPLO:
+            for encontrada in re.finditer(r'\b' + columna + r'\b', contexto):
+                if encontrada.start() > posicion:
+                    mejor, posicion = columna, encontrada.start()
+        posicionales.append(ejemplos.get(mejor, 1))
+    if nombrados:
+        return nombrados
+    return tuple(posicionales) or None
+
+
+# ============= ANÁLISIS DEL PLAN =============
+
+def _filas_tablas(nodo):
+    """Máximo de filas producidas por las tablas dentro de un nodo del plan"""
+    maximo = 0
+    if isinstance(nodo, dict):
+        tabla = nodo.get('table')
+        if isinstance(tabla, dict):
+            maximo = max(maximo, tabla.get('rows_produced_per_join', 0),
+                         tabla.get('rows_examined_per_scan', 0))
+        for valor in nodo.values():
+            maximo = max(maximo, _filas_tablas(valor))
+    elif isinstance(nodo, list):
+        for valor in nodo:
+            maximo = max(maximo, _filas_tablas(valor))
+    return maximo
+
+
+def problemas_plan(plan, umbral, solo_joins=False):
+    """Lista de problemas encontrados en un plan EXPLAIN FORMAT=JSON"""
+    problemas = []
+
+    def recorrer(nodo):
+        if isinstance(nodo, list):
+            for valor in nodo:
+                recorrer(valor)
+            return
+        if not isinstance(nodo, dict):
+            return
+
+        bucle = nodo.get('nested_loop')
+        if isinstance(bucle, list):
+            for posicion, paso in enumerate(bucle):
+                tabla = paso.get('table', {}) if isinstance(paso, dict) else {}
+                filas = tabla.get('rows_examined_per_scan', 0)
+                sin_indice = tabla.get('access_type') == 'ALL' or 'using_join_buffer' in tabla
+                if posicion > 0 and sin_indice and filas > umbral:
+                    problemas.append(f"JOIN sin índice sobre {tabla.get('table_name')} ({filas} filas por fila externa)")
+
+        tabla = nodo.get('table')
+        if not solo_joins and isinstance(tabla, dict):
+            filas = tabla.get('rows_examined_per_scan', 0)
+            if tabla.get('access_type') in ('ALL', 'index') and filas > umbral:
+                problemas.append(f"recorrido completo de {tabla.get('table_name')} ({filas} filas)")
+
+        if not solo_joins:
+            filas = _filas_tablas(nodo)
+            if nodo.get('using_filesort') and filas > umbral:
+                problemas.append(f"filesort sobre ~{filas} filas")
+            if nodo.get('using_temporary_table') and filas > umbral:
+                problemas.append(f"tabla temporal sobre ~{filas} filas")
+
+        for valor in nodo.values():
+            recorrer(valor)
+
+    recorrer(plan)
+    # Los nodos anidados pueden reportar el mismo problema más de una vez
+    return list(dict.fromkeys(problemas))
+
+
+def permitida(identificador):
+    archivo = identificador.split(':')[0]
+    return PERMITIDAS.get(identificador) or PERMITIDAS.get(archivo)
+
+
+# ============= MAIN =============
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--umbral', type=int, default=int(os.getenv('PLANES_UMBRAL_FILAS', '1000')),
+                        help='filas a partir de las cuales un recorrido/filesort/temporal es falla')
+    parser.add_argument('-v', '--verbose', action='store_true', help='mostrar también las sentencias que pasan')
+    args = parser.parse_args()
+
+    sentencias = sentencias_python() + sentencias_reportes()
+
+    try:
+        conn = obtener_pool().obtener()
+    except Error as e:
+        print(f"❌ Error al conectar a MySQL: {e}")
+        return 1
+
+    fallas = 0
+    try:
+        cursor = conn.cursor(dictionary=True)
+        ejemplos = valores_ejemplo(cursor)
+        if not ejemplos['id_reserva']:
+            print("⚠️ La base no tiene reservas: los planes no serán representativos")
+
+        for identificador, ubicacion, sql in sentencias:
+            motivo = permitida(identificador)
+            try:
+                cursor.execute("EXPLAIN FORMAT=JSON " + sql, completar_parametros(sql, ejemplos))
+                fila = cursor.fetchone()
+                plan = json.loads(fila['EXPLAIN'])
+            except Error as e:
+                fallas += 1
+                print(f"❌ {ubicacion} ({identificador}): EXPLAIN falló: {e}")
+                continue
+
+            problemas = problemas_plan(plan, args.umbral, solo_joins=bool(motivo))
+            if problemas:
+                fallas += 1
+                print(f"❌ {ubicacion} ({identificador})")
+                for problema in problemas:
+                    print(f"     - {problema}")
+                if args.verbose:
+                    print('     ' + ' '.join(sql.split()))
+            elif args.verbose:
+                print(f"✅ {ubicacion} ({identificador})" + (f" [permitida: {motivo}]" if motivo else ""))
+        cursor.close()
+    finally:
+        conn.close()
+
+    print(f"\n📊 {len(sentencias)} sentencias analizadas, {fallas} con problemas (umbral {args.umbral} filas)")
+    return 1 if fallas else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -29,8 +29,10 @@ CREATE TABLE participante (
     ci VARCHAR(20) PRIMARY KEY,
     nombre VARCHAR(50) NOT NULL,
     apellido VARCHAR(50) NOT NULL,
-    email VARCHAR(100) NOT NULL UNIQUE
+    email VARCHAR(100) NOT NULL UNIQUE,
     -- FK eliminado: ahora el correo es independiente del login
+    -- Se incrementa al cambiar sus programas/roles: invalida el perfil guardado en la sesión
+    version_perfil INT UNSIGNED NOT NULL DEFAULT 0
 ) ENGINE=InnoDB;
 
 -- Tabla participante_programa_academico
@@ -105,8 +107,83 @@ CREATE TABLE sancion_participante (
     FOREIGN KEY (ci_participante) REFERENCES participante(ci) ON DELETE CASCADE
 ) ENGINE=InnoDB;
 
+-- Libro de cuotas: reservas activas por participante y día / semana ISO (YEARWEEK(fecha, 3)).
+-- Lo mantienen las escrituras de reservas (modules/cuotas.py); se reconstruye con scripts/cuotas.py
+CREATE TABLE cuota_participante_dia (
+    ci_participante VARCHAR(20) NOT NULL,
+    fecha DATE NOT NULL,
+    horas_activas SMALLINT NOT NULL DEFAULT 0,  -- un turno = una hora
+    PRIMARY KEY (ci_participante, fecha),
+    -- Un libro desincronizado hace fallar la escritura en lugar de quedar negativo
+    CONSTRAINT chk_cuota_dia_no_negativa CHECK (horas_activas >= 0),
+    FOREIGN KEY (ci_participante) REFERENCES participante(ci) ON DELETE CASCADE
+) ENGINE=InnoDB;
+
+CREATE TABLE cuota_participante_semana (
+    ci_participante VARCHAR(20) NOT NULL,
+    semana INT NOT NULL,
+    reservas_activas SMALLINT NOT NULL DEFAULT 0,
+    PRIMARY KEY (ci_participante, semana),
+    CONSTRAINT chk_cuota_semana_no_negativa CHECK (reservas_activas >= 0),
+    FOREIGN KEY (ci_participante) REFERENCES participante(ci) ON DELETE CASCADE
+) ENGINE=InnoDB;
+
+-- Archivo histórico (parte fría): reservas cerradas de períodos ya terminados.
+-- reserva no se puede particionar por fecha (las tablas particionadas no admiten
+-- claves foráneas); scripts/archivar_reservas.py mueve las filas hasta acá.
+-- Sin claves foráneas: el histórico se conserva aunque se borren salas o participantes.
+CREATE TABLE reserva_historico (
+    id_reserva INT PRIMARY KEY,
+    nombre_sala VARCHAR(50) NOT NULL,
+    edificio VARCHAR(50) NOT NULL,
+    fecha DATE NOT NULL,
+    id_turno INT NOT NULL,
+    estado ENUM('activa', 'cancelada', 'sin asistencia', 'finalizada') NOT NULL,
+    INDEX idx_reserva_historico_fecha (fecha),
+    INDEX idx_reserva_historico_sala (nombre_sala, edificio)
+) ENGINE=InnoDB;
+
+CREATE TABLE reserva_participante_historico (
+    ci_participante VARCHAR(20) NOT NULL,
+    id_reserva INT NOT NULL,
+    fecha_solicitud_reserva DATETIME NOT NULL,
+    asistencia BOOLEAN DEFAULT NULL,
+    PRIMARY KEY (ci_participante, id_reserva),
+    INDEX idx_reserva_participante_historico_reserva (id_reserva, asistencia)
+) ENGINE=InnoDB;
+
+-- Parte caliente + archivo, para los reportes con historico=1
+CREATE VIEW reserva_todas AS
+    SELECT id_reserva, nombre_sala, edificio, fecha, id_turno, estado FROM reserva
+    UNION ALL
+    SELECT id_reserva, nombre_sala, edificio, fecha, id_turno, estado FROM reserva_historico;
+
+CREATE VIEW reserva_participante_todas AS
+    SELECT ci_participante, id_reserva, fecha_solicitud_reserva, asistencia FROM reserva_participante
+    UNION ALL
+    SELECT ci_participante, id_reserva, fecha_solicitud_reserva, asistencia FROM reserva_participante_historico;
+
+-- Contadores de versión para invalidar cachés en memoria entre procesos
+CREATE TABLE version_cache (
+    nombre VARCHAR(50) PRIMARY KEY,
+    version BIGINT UNSIGNED NOT NULL DEFAULT 0
+) ENGINE=InnoDB;
+
+INSERT INTO version_cache (nombre) VALUES
+('reserva'), ('reserva_detalle'), ('sala'), ('sancion'), ('participante');
+
 -- Índices
 CREATE INDEX idx_reserva_fecha ON reserva(fecha);
 CREATE INDEX idx_reserva_estado ON reserva(estado);
 CREATE INDEX idx_sancion_fechas ON sancion_participante(ci_participante, fecha_inicio, fecha_fin);
 CREATE INDEX idx_participante_programa ON participante_programa_academico(ci_participante, rol);
+-- Paginación por cursor de los listados de administración
+-- (InnoDB agrega la clave primaria al final de cada índice secundario)
+CREATE INDEX idx_participante_orden ON participante(apellido, nombre, ci);
+CREATE INDEX idx_sancion_inicio ON sancion_participante(fecha_inicio, id_sancion);
+-- Sanciones vigentes: CURDATE() BETWEEN fecha_inicio AND fecha_fin (rango sobre fecha_fin)
+CREATE INDEX idx_sancion_fin ON sancion_participante(fecha_fin, fecha_inicio);
+-- Participantes y asistencia de una reserva (la PK empieza por ci_participante)
+CREATE INDEX idx_reserva_participante_reserva ON reserva_participante(id_reserva, asistencia);
+-- Reservas de una sala por estado (eliminar_sala, estadísticas de sala, admisión)
+CREATE INDEX idx_reserva_sala_estado ON reserva(nombre_sala, edificio, estado);
@@ -114,4 +114,20 @@ INSERT INTO reserva_participante (ci_participante, id_reserva, asistencia) VALUE
 -- Datos de sancion_participante (ninguna sanción activa inicialmente)
 -- Se pueden agregar ejemplos de sanciones pasadas
 INSERT INTO sancion_participante (ci_participante, fecha_inicio, fecha_fin) VALUES
-('12345678', DATE_SUB(CURDATE(), INTERVAL 90 DAY), DATE_SUB(CURDATE(), INTERVAL 30 DAY));
\ No newline at end of file
+('12345678', DATE_SUB(CURDATE(), INTERVAL 90 DAY), DATE_SUB(CURDATE(), INTERVAL 30 DAY));
+
+-- Libro de cuotas de las reservas activas de ejemplo
+-- (mismo cálculo que modules/cuotas.py reconstruir / scripts/cuotas.py --reconstruir)
+INSERT INTO cuota_participante_dia (ci_participante, fecha, horas_activas)
+SELECT rp.ci_participante, r.fecha, COUNT(*)
+FROM reserva_participante rp
+JOIN reserva r ON r.id_reserva = rp.id_reserva
+WHERE r.estado = 'activa'
+GROUP BY rp.ci_participante, r.fecha;
+
+INSERT INTO cuota_participante_semana (ci_participante, semana, reservas_activas)
+SELECT rp.ci_participante, YEARWEEK(r.fecha, 3), COUNT(*)
+FROM reserva_participante rp
+JOIN reserva r ON r.id_reserva = rp.id_reserva
+WHERE r.estado = 'activa'
+GROUP BY rp.ci_participante, YEARWEEK(r.fecha, 3);